@@ -0,0 +1,311 @@
+"""
+Local stand-ins for rss.app, Gemini and ElevenLabs used by the benchmarks.
+
+One Starlette app serves all three upstreams on a local port:
+    GET  /feeds/{id}.xml                          fixture media-RSS feeds (ETag aware)
+    POST /v1beta/models/{model}:generateContent     canned Gemini completion
+    POST /v1beta/models/{model}:streamGenerateContent  the same, in chunks
+    POST /v1beta/cachedContents                    Gemini context cache (also GET/DELETE)
+    POST /v1/text-to-speech/{voice}/stream        synthetic MP3 frames
+    GET  /v1/voices                               a single fake voice
+
+Each upstream has its own latency and failure rate; Gemini can also take
+longer the more uncached input it is sent. This module must not
+import the app's config or services: the load test sets the environment
+that points the app at these servers before the app is imported.
+"""
+
+import asyncio
+import email.utils
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+CANNED_ANSWER = (
+    "Here's what's coming up in Stillwater this weekend. **Friday** there's live "
+    "music downtown at Eskimo Joe's, and the farmers market opens Saturday "
+    "morning on Main Street. OSU has a home game Saturday afternoon, so expect "
+    "traffic near Boone Pickens Stadium. The city also posted a reminder about "
+    "road work on Sixth Avenue, so plan an extra few minutes for your drive."
+)
+
+# One silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, 417 bytes
+MP3_FRAME = b"\xff\xfb\x90\x00" + bytes(413)
+
+
+@dataclass
+class UpstreamProfile:
+    """
+    Simulated behavior of one upstream.
+    
+    Attributes:
+        latency: Seconds before the response starts
+        failure_rate: Fraction of requests answered with a 500
+        chunk_delay: Seconds between chunks of streamed responses
+        prefill_per_1k: Extra seconds per 1,000 uncached input tokens
+            (Gemini only; cached prefix tokens are free)
+    """
+    
+    latency: float = 0.0
+    failure_rate: float = 0.0
+    chunk_delay: float = 0.0
+    prefill_per_1k: float = 0.0
+    
+    async def delay(self) -> None:
+        """Wait out the response latency (with +/-20% jitter)."""
+        if self.latency > 0:
+            await asyncio.sleep(self.latency * random.uniform(0.8, 1.2))
+    
+    def should_fail(self) -> bool:
+        """Decide whether this request fails."""
+        return random.random() < self.failure_rate
+
+
+def make_feed(username: str, count: int) -> bytes:
+    """Build a media-RSS document shaped like rss.app's Instagram feeds."""
+    items = []
+    for i in range(count):
+        published = email.utils.formatdate(1_792_238_400 - i * 3600, usegmt=True)
+        items.append(
+            f"""<item>
+<title><![CDATA[Post {i} from {username}: game day downtown &amp; live music tonight #okstate]]></title>
+<description><![CDATA[<div><img src="https://scontent.cdninstagram.com/{i}.jpg" style="width: 100%;"/><div>Caption for post {i} with a few sentences of text about what is happening around town this weekend.</div></div>]]></description>
+<link>https://www.instagram.com/p/{username[:4]}{i:010d}/</link>
+<guid isPermaLink="false">{hashlib.md5(f"{username}{i}".encode()).hexdigest()}</guid>
+<dc:creator><![CDATA[@{username}]]></dc:creator>
+<pubDate>{published}</pubDate>
+<media:content medium="image" url="https://scontent.cdninstagram.com/v/t51.29350-15/{username}_{i}_n.jpg"/>
+</item>"""
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss xmlns:dc="http://purl.org/dc/elements/1.1/" '
+        'xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+        'xmlns:atom="http://www.w3.org/2005/Atom" '
+        'xmlns:media="http://search.yahoo.com/mrss/" version="2.0">'
+        f"<channel><title>{username}</title><link>https://www.instagram.com/{username}</link>"
+        f"<description>{username} on Instagram</description>"
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def create_app(
+    rss: UpstreamProfile,
+    gemini: UpstreamProfile,
+    tts: UpstreamProfile,
+    feed_entries: int = 50
+) -> Starlette:
+    """
+    Build the fake upstream app.
+    
+    Args:
+        rss: Behavior of the RSS feeds
+        gemini: Behavior of the Gemini API
+        tts: Behavior of the ElevenLabs API
+        feed_entries: Number of entries in each fixture feed
+    
+    Returns:
+        Starlette application
+    """
+    feeds: Dict[str, bytes] = {}
+    caches: Dict[str, Dict] = {}
+    
+    async def feed(request: Request) -> Response:
+        await rss.delay()
+        if rss.should_fail():
+            return Response(status_code=500)
+        
+        feed_id = request.path_params["feed_id"]
+        if feed_id not in feeds:
+            feeds[feed_id] = make_feed(feed_id, feed_entries)
+        body = feeds[feed_id]
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(body, media_type="application/rss+xml", headers={"ETag": etag})
+    
+    async def gemini_generate(request: Request) -> Response:
+        await gemini.delay()
+        if gemini.should_fail():
+            return _gemini_error()
+        
+        payload = await request.json()
+        cached_tokens = 0
+        if payload.get("cachedContent"):
+            cache = caches.get(payload["cachedContent"])
+            if cache is None:
+                return _gemini_error(404, "NOT_FOUND", "CachedContent not found")
+            cached_tokens = cache["usageMetadata"]["totalTokenCount"]
+        prompt_tokens = _count_tokens(payload)
+        await asyncio.sleep(prompt_tokens / 1000 * gemini.prefill_per_1k)
+        usage = {
+            "promptTokenCount": prompt_tokens + cached_tokens,
+            "cachedContentTokenCount": cached_tokens,
+            "candidatesTokenCount": len(CANNED_ANSWER) // 4,
+        }
+        
+        method = request.path_params["method"]
+        if method == "generateContent":
+            return JSONResponse(_gemini_chunk(CANNED_ANSWER, usage))
+        if method != "streamGenerateContent":
+            return JSONResponse({"error": {"code": 404, "message": method}}, status_code=404)
+        
+        async def chunks() -> AsyncIterator[bytes]:
+            words = CANNED_ANSWER.split(" ")
+            pieces = [" ".join(words[i:i + 8]) + " " for i in range(0, len(words), 8)]
+            yield b"["
+            for i, piece in enumerate(pieces):
+                if i:
+                    await asyncio.sleep(gemini.chunk_delay)
+                    yield b",\n"
+                last = i == len(pieces) - 1
+                yield json.dumps(_gemini_chunk(piece, usage if last else None)).encode("utf-8")
+            yield b"]"
+        
+        return StreamingResponse(chunks(), media_type="application/json")
+    
+    async def create_cache(request: Request) -> Response:
+        payload = await request.json()
+        name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+        now = time.time()
+        ttl = float(payload.get("ttl", "3600s").rstrip("s"))
+        caches[name] = {
+            "name": name,
+            "model": payload["model"],
+            "displayName": payload.get("displayName", ""),
+            "createTime": _rfc3339(now),
+            "updateTime": _rfc3339(now),
+            "expireTime": _rfc3339(now + ttl),
+            "usageMetadata": {"totalTokenCount": _count_tokens(payload)},
+        }
+        return JSONResponse(caches[name])
+    
+    async def cache_resource(request: Request) -> Response:
+        name = f"cachedContents/{request.path_params['cache_id']}"
+        if name not in caches:
+            return _gemini_error(404, "NOT_FOUND", "CachedContent not found")
+        if request.method == "DELETE":
+            del caches[name]
+            return JSONResponse({})
+        return JSONResponse(caches[name])
+    
+    async def tts_stream(request: Request) -> Response:
+        await tts.delay()
+        if tts.should_fail():
+            return JSONResponse({"detail": {"status": "fake_failure"}}, status_code=500)
+        
+        payload = await request.json()
+        # Roughly one second of audio (38 frames) per 15 characters of text
+        frames = max(8, len(payload.get("text", "")) * 38 // 15)
+        
+        async def audio() -> AsyncIterator[bytes]:
+            for start in range(0, frames, 16):
+                if start:
+                    await asyncio.sleep(tts.chunk_delay)
+                yield MP3_FRAME * min(16, frames - start)
+        
+        return StreamingResponse(audio(), media_type="audio/mpeg")
+    
+    async def voices(request: Request) -> Response:
+        await tts.delay()
+        return JSONResponse({"voices": [
+            {"voice_id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel", "category": "premade"}
+        ]})
+    
+    return Starlette(routes=[
+        Route("/feeds/{feed_id}.xml", feed),
+        Route("/v1beta/models/{model}:{method}", gemini_generate, methods=["POST"]),
+        Route("/v1beta/cachedContents", create_cache, methods=["POST"]),
+        Route("/v1beta/cachedContents/{cache_id}", cache_resource, methods=["GET", "DELETE"]),
+        Route("/v1/text-to-speech/{voice_id}/stream", tts_stream, methods=["POST"]),
+        Route("/v1/voices", voices),
+    ])
+
+
+def _gemini_chunk(text: str, usage: Optional[Dict] = None) -> Dict:
+    """One GenerateContentResponse holding a piece of text (and the usage report)."""
+    chunk = {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0,
+        }]
+    }
+    if usage is not None:
+        chunk["usageMetadata"] = usage
+    return chunk
+
+
+def _count_tokens(payload: Dict) -> int:
+    """Estimate the input tokens of a request's contents and system instruction (~4 chars each)."""
+    contents = payload.get("contents", [])
+    if payload.get("systemInstruction"):
+        contents = contents + [payload["systemInstruction"]]
+    chars = sum(
+        len(part.get("text", ""))
+        for content in contents
+        for part in content.get("parts", [])
+    )
+    return chars // 4
+
+
+def _rfc3339(timestamp: float) -> str:
+    """Format a timestamp the way Google APIs do."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _gemini_error(
+    code: int = 500,
+    status: str = "INTERNAL",
+    message: str = "Simulated failure"
+) -> Response:
+    """A Google API style error (a simulated internal error by default)."""
+    return JSONResponse(
+        {"error": {"code": code, "message": message, "status": status}},
+        status_code=code
+    )
+
+
+def free_port() -> int:
+    """Find an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Runs an ASGI app with uvicorn on a background thread."""
+    
+    def __init__(self, app, port: int = 0):
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="on"
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+    
+    def __enter__(self) -> 'BackgroundServer':
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"Server on port {self.port} failed to start")
+            time.sleep(0.01)
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
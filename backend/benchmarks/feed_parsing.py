@@ -0,0 +1,74 @@
+"""
+Benchmark feed parsing: feedparser's full object model vs the streaming parser.
+
+Generates rss.app-shaped media-RSS feeds of increasing size and compares
+parse time and peak memory for ingesting the first FEED_INGEST_LIMIT
+entries. Run from the backend directory:
+    python -m benchmarks.feed_parsing
+"""
+
+import time
+import tracemalloc
+from typing import Callable, List
+from benchmarks.fake_upstreams import make_feed
+from config.settings import settings
+from models.post import Post
+from services.feed_parser import StreamingFeedParser
+from services.rss_service import RSSService
+
+SIZES = (100, 1_000, 10_000)
+REPEATS = 3
+USERNAME = "stillwaternewspress"
+
+
+def feedparser_path(content: bytes) -> List[Post]:
+    """Previous behavior: parse everything with feedparser, keep the first N."""
+    return RSSService._parse_with_feedparser(USERNAME, content, settings.FEED_INGEST_LIMIT)
+
+
+def streaming_path(content: bytes) -> List[Post]:
+    """New behavior: pull-parse and stop after N entries."""
+    return StreamingFeedParser.parse(USERNAME, content, settings.FEED_INGEST_LIMIT)
+
+
+def time_per_parse(func: Callable, content: bytes) -> float:
+    """Average wall-clock seconds per parse."""
+    func(content)
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        func(content)
+    return (time.perf_counter() - started) / REPEATS
+
+
+def peak_memory(func: Callable, content: bytes) -> int:
+    """Peak bytes allocated during one parse."""
+    tracemalloc.start()
+    func(content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    """Print parse time and peak memory for each parser and feed size."""
+    limit = settings.FEED_INGEST_LIMIT
+    print(f"ingesting the first {limit} entries, {REPEATS} repeats\n")
+    print(f"{'entries':>8}{'size':>10}  {'parser':<12}{'time':>11}{'peak mem':>12}{'speedup':>9}")
+    
+    for size in SIZES:
+        content = make_feed(USERNAME, size)
+        assert streaming_path(content) == feedparser_path(content)
+        
+        baseline = time_per_parse(feedparser_path, content)
+        for name, func in (("feedparser", feedparser_path), ("streaming", streaming_path)):
+            seconds = baseline if func is feedparser_path else time_per_parse(func, content)
+            print(
+                f"{size:>8}{len(content) / 1024:>8.0f}KB  {name:<12}"
+                f"{seconds * 1000:>8.2f} ms{peak_memory(func, content) / 1024:>9.0f} KB"
+                f"{baseline / seconds:>8.1f}x"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
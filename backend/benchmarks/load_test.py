@@ -0,0 +1,313 @@
+"""
+Offline load test for the API against local upstream stand-ins.
+
+Starts the fake rss.app / Gemini / ElevenLabs servers from fake_upstreams,
+points the app at them, serves main.app with uvicorn and drives each
+endpoint with concurrent requests. Reports requests/sec and p50/p95/p99
+latency per endpoint, and can compare against a saved baseline to catch
+regressions. Run from the backend directory:
+    
+    python -m benchmarks.load_test --requests 200 --concurrency 20
+    python -m benchmarks.load_test --json results.json
+    python -m benchmarks.load_test --baseline results.json --tolerance 0.25
+    python -m benchmarks.load_test --endpoints chat --no-context-cache
+
+The process exits with status 1 if any endpoint regressed past the
+tolerance or failed more often than --max-error-rate.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+import httpx
+from benchmarks.fake_upstreams import BackgroundServer, UpstreamProfile, create_app
+
+ENDPOINTS = ("posts", "posts_all", "chat", "chat_stream", "tts")
+
+QUESTIONS = (
+    "What's happening downtown this weekend?",
+    "Any live music tonight?",
+    "When is the next OSU home game?",
+    "Is there road work I should know about?",
+    "What are the best places to eat on Main Street?",
+)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class EndpointResult:
+    """Latency samples and error count for one endpoint's run."""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.first_byte: List[float] = []
+        self.errors = 0
+        self.elapsed = 0.0
+    
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + self.errors
+    
+    def summary(self) -> Dict:
+        """Summarize the run in seconds and requests/sec."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "rps": self.requests / self.elapsed if self.elapsed else 0.0,
+            "p50": percentile(self.latencies, 50),
+            "p95": percentile(self.latencies, 95),
+            "p99": percentile(self.latencies, 99),
+            "ttfb_p50": percentile(self.first_byte, 50),
+        }
+
+
+def build_requests(accounts: List[str], unique: bool) -> Dict[str, Callable[[int], Dict]]:
+    """
+    Request factories per endpoint, taking the request number.
+    
+    With unique=True, chat questions and TTS text vary per request so the
+    answer and audio caches are bypassed and every request reaches the
+    (fake) upstream.
+    """
+    def suffix(i: int, tag: str = "") -> str:
+        return f" ({tag}#{i})" if unique else ""
+    
+    def chat_body(i: int, tag: str) -> Dict:
+        # /chat and /chat/stream share the answer cache, so tag them apart
+        return {"message": QUESTIONS[i % len(QUESTIONS)] + suffix(i, tag)}
+    
+    return {
+        "posts": lambda i: {
+            "method": "GET", "url": "/posts",
+            "params": {"username": accounts[i % len(accounts)]},
+        },
+        "posts_all": lambda i: {"method": "GET", "url": "/posts/all"},
+        "chat": lambda i: {"method": "POST", "url": "/chat", "json": chat_body(i, "c")},
+        "chat_stream": lambda i: {"method": "POST", "url": "/chat/stream", "json": chat_body(i, "s")},
+        "tts": lambda i: {
+            "method": "POST", "url": "/tts",
+            "json": {"text": "The farmers market opens Saturday morning on Main Street." + suffix(i)},
+        },
+    }
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    name: str,
+    factory: Callable[[int], Dict],
+    total: int,
+    concurrency: int
+) -> EndpointResult:
+    """Send `total` requests to one endpoint with `concurrency` workers."""
+    result = EndpointResult(name)
+    counter = itertools.count()
+    
+    async def worker() -> None:
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            started = time.perf_counter()
+            first_byte: Optional[float] = None
+            try:
+                async with client.stream(**factory(i)) as response:
+                    async for _ in response.aiter_raw():
+                        if first_byte is None:
+                            first_byte = time.perf_counter() - started
+                    failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            
+            if failed:
+                result.errors += 1
+            else:
+                result.latencies.append(time.perf_counter() - started)
+                result.first_byte.append(first_byte or result.latencies[-1])
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def drive(base_url: str, args: argparse.Namespace, accounts: List[str]) -> Dict[str, Dict]:
+    """Warm the app up, then load each selected endpoint in turn."""
+    factories = build_requests(accounts, unique=not args.allow_cache_hits)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        # Cold start: fill the post store so every endpoint sees a warm server
+        await client.get("/posts/all")
+        
+        results = {}
+        for name in args.endpoints:
+            result = await run_endpoint(
+                client, name, factories[name], args.requests, args.concurrency
+            )
+            results[name] = result.summary()
+        return results
+
+
+def print_report(results: Dict[str, Dict]) -> None:
+    """Print a results table (latencies in milliseconds)."""
+    print(
+        f"\n{'endpoint':<12}{'reqs':>6}{'errors':>8}{'req/s':>9}"
+        f"{'p50':>9}{'p95':>9}{'p99':>9}{'ttfb p50':>10}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<12}{r['requests']:>6}{r['errors']:>8}{r['rps']:>9.1f}"
+            f"{r['p50'] * 1000:>9.1f}{r['p95'] * 1000:>9.1f}{r['p99'] * 1000:>9.1f}"
+            f"{r['ttfb_p50'] * 1000:>10.1f}"
+        )
+
+
+def print_gemini_usage(stats: Dict) -> None:
+    """Print Gemini input tokens and latency per call, with and without the cached prefix."""
+    for label, calls in stats["calls"].items():
+        if calls["calls"]:
+            print(
+                f"gemini, context cache {label}: {calls['calls']} calls, "
+                f"{calls['avg_uncached_tokens']:.0f} input tokens sent + "
+                f"{calls['avg_cached_tokens']:.0f} cached per call, "
+                f"first text after {calls['avg_first_text_seconds'] * 1000:.1f} ms"
+            )
+
+
+def find_regressions(
+    results: Dict[str, Dict],
+    baseline: Dict[str, Dict],
+    tolerance: float,
+    max_error_rate: float
+) -> List[str]:
+    """Compare results with a baseline run; return descriptions of regressions."""
+    problems = []
+    for name, r in results.items():
+        if r["error_rate"] > max_error_rate:
+            problems.append(f"{name}: error rate {r['error_rate']:.1%} > {max_error_rate:.1%}")
+        
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base["p95"] and r["p95"] > base["p95"] * (1 + tolerance):
+            problems.append(
+                f"{name}: p95 {r['p95'] * 1000:.1f}ms vs baseline {base['p95'] * 1000:.1f}ms"
+            )
+        if base["rps"] and r["rps"] < base["rps"] * (1 - tolerance):
+            problems.append(f"{name}: {r['rps']:.1f} req/s vs baseline {base['rps']:.1f} req/s")
+    return problems
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help=f"Comma-separated subset of {', '.join(ENDPOINTS)}")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--allow-cache-hits", action="store_true",
+                        help="Repeat identical chat/TTS requests instead of unique ones")
+    parser.add_argument("--feed-entries", type=int, default=50, help="Entries per fixture feed")
+    parser.add_argument("--gemini-prefill-per-1k", type=float, default=0.05,
+                        help="Extra fake Gemini seconds per 1,000 uncached input tokens")
+    parser.add_argument("--no-context-cache", action="store_true",
+                        help="Send full Gemini prompts instead of using a cached posts prefix")
+    for name, latency, chunk_delay in (("rss", 0.05, 0.0), ("gemini", 0.3, 0.02), ("tts", 0.2, 0.01)):
+        parser.add_argument(f"--{name}-latency", type=float, default=latency,
+                            help=f"Seconds before the fake {name} upstream responds")
+        parser.add_argument(f"--{name}-failure-rate", type=float, default=0.0,
+                            help=f"Fraction of fake {name} requests that fail")
+        parser.add_argument(f"--{name}-chunk-delay", type=float, default=chunk_delay,
+                            help=f"Seconds between streamed {name} chunks")
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative p95 / req/s regression vs the baseline")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="Allowed error rate per endpoint")
+    args = parser.parse_args(argv)
+    
+    args.endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    profiles = {
+        name: UpstreamProfile(
+            latency=getattr(args, f"{name}_latency"),
+            failure_rate=getattr(args, f"{name}_failure_rate"),
+            chunk_delay=getattr(args, f"{name}_chunk_delay"),
+        )
+        for name in ("rss", "gemini", "tts")
+    }
+    profiles["gemini"].prefill_per_1k = args.gemini_prefill_per_1k
+    
+    with tempfile.TemporaryDirectory(prefix="stillwater-load-") as data_dir, \
+            BackgroundServer(create_app(feed_entries=args.feed_entries, **profiles)) as fakes:
+        # Must be set before the app's settings are imported
+        os.environ.update({
+            "GEMINI_API_KEY": "load-test",
+            "ELEVENLABS_API_KEY": "load-test",
+            "GEMINI_API_ENDPOINT": fakes.url,
+            "ELEVENLABS_BASE_URL": fakes.url,
+            "RSS_FEED_BASE_URL": fakes.url,
+            "POST_STORE_PATH": os.path.join(data_dir, "posts.db"),
+            "TTS_CACHE_DIR": os.path.join(data_dir, "tts_cache"),
+            "SHARED_CACHE_PATH": os.path.join(data_dir, "shared_cache.db"),
+            "FEED_POLLER_LOCK_PATH": os.path.join(data_dir, "feed_poller.lock"),
+            "GEMINI_CONTEXT_CACHE": "false" if args.no_context_cache else "true",
+            # Every simulated client shares one address
+            "CHAT_RATE_PER_MINUTE": "0",
+            "TTS_RATE_PER_MINUTE": "0",
+        })
+        import main as api
+        from services.rss_service import RSSService
+        logging.getLogger().setLevel(logging.WARNING)
+        
+        print(
+            f"{args.requests} requests x {len(args.endpoints)} endpoints, "
+            f"concurrency {args.concurrency}, upstreams at {fakes.url}"
+        )
+        with BackgroundServer(api.app) as server:
+            results = asyncio.run(drive(server.url, args, RSSService.get_account_names()))
+            stats = httpx.get(f"{server.url}/stats").json()
+    
+    print_report(results)
+    print_gemini_usage(stats["gemini_context_cache"])
+    
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+    
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    problems = find_regressions(results, baseline, args.tolerance, args.max_error_rate)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
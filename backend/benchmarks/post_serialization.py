@@ -0,0 +1,104 @@
+"""
+Benchmark the posts response path: dicts + pydantic vs Post records + fast JSON.
+
+Run from the backend directory:
+    python -m benchmarks.post_serialization
+"""
+
+import json
+import time
+import tracemalloc
+from typing import Callable, List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from models.post import Post
+from models.schemas import PostResponse
+from utils import fast_json
+
+SIZES = (1_000, 10_000)
+REPEATS = 20
+
+_adapter = TypeAdapter(List[PostResponse])
+
+
+def make_posts(count: int) -> List[Post]:
+    """Build realistic-looking posts."""
+    return [
+        Post(
+            id=f"https://www.instagram.com/p/{i:011d}/",
+            title=f"Post number {i} from downtown Stillwater, with a caption of typical length #okstate",
+            link=f"https://www.instagram.com/p/{i:011d}/",
+            image=f"https://scontent.cdninstagram.com/v/t51.29350-15/{i}_n.jpg?stp=dst-jpg",
+            published="2026-10-17T12:00:00+00:00",
+            account="stillwaternewspress",
+            timestamp=1_792_238_400.0 - i * 60,
+        )
+        for i in range(count)
+    ]
+
+
+def pydantic_path(posts: List[dict]) -> bytes:
+    """What FastAPI does for response_model=List[PostResponse] with dicts."""
+    validated = _adapter.validate_python(posts)
+    content = jsonable_encoder(validated)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def stdlib_path(posts: List[Post]) -> bytes:
+    """Fast path without orjson installed."""
+    return json.dumps(
+        posts, default=Post.to_dict, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def cpu_per_call(func: Callable, payload) -> float:
+    """Average CPU seconds per call."""
+    func(payload)
+    started = time.process_time()
+    for _ in range(REPEATS):
+        func(payload)
+    return (time.process_time() - started) / REPEATS
+
+
+def memory_of(factory: Callable) -> int:
+    """Bytes allocated to build and hold a payload."""
+    tracemalloc.start()
+    payload = factory()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del payload
+    return size
+
+
+def main() -> None:
+    """Print CPU per request and memory for each path and size."""
+    encoder = "orjson" if fast_json.orjson is not None else "json (orjson missing)"
+    print(f"fast encoder: {encoder}, {REPEATS} repeats\n")
+    print(f"{'posts':>7}  {'path':<28}{'cpu/request':>14}{'speedup':>10}")
+    
+    for size in SIZES:
+        records = make_posts(size)
+        dicts = [post.to_dict() for post in records]
+        assert json.loads(pydantic_path(dicts)) == json.loads(fast_json.dumps(records))
+        
+        baseline = cpu_per_call(pydantic_path, dicts)
+        rows = [
+            ("dicts + pydantic + json", baseline),
+            ("Post + json", cpu_per_call(stdlib_path, records)),
+            ("Post + fast_json.dumps", cpu_per_call(fast_json.dumps, records)),
+        ]
+        for name, seconds in rows:
+            print(f"{size:>7}  {name:<28}{seconds * 1000:>11.2f} ms{baseline / seconds:>9.1f}x")
+        
+        dict_bytes = memory_of(lambda: [post.to_dict() for post in make_posts(size)])
+        post_bytes = memory_of(lambda: make_posts(size))
+        print(
+            f"{size:>7}  memory: dicts {dict_bytes / 1024:.0f} KiB, "
+            f"Post records {post_bytes / 1024:.0f} KiB\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
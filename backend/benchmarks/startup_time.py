@@ -0,0 +1,104 @@
+"""
+Benchmark cold-start cost: importing the app, and what each module adds.
+
+Every sample runs in a fresh interpreter with `python -X importtime`, so
+nothing is cached between runs. Reports the median wall time to import
+main (and, with --clients, to also build the Gemini and ElevenLabs
+clients), then the heaviest packages and modules by cumulative import
+time. Run from the backend directory:
+    
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --clients --top 30
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| \s*(\S+)$")
+
+_IMPORT_APP = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+_IMPORT_APP_AND_CLIENTS = (
+    "import time; t = time.perf_counter(); import main; "
+    "main.GeminiService(); main.TTSService(); print(time.perf_counter() - t)"
+)
+
+
+def sample(code: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """
+    Run code in a fresh interpreter with import timing on.
+    
+    Returns:
+        Tuple of (wall seconds printed by the code, list of
+        (module, self microseconds, cumulative microseconds))
+    """
+    env = {
+        **os.environ,
+        "PYTHONWARNINGS": "ignore",
+        "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "benchmark"),
+        "ELEVENLABS_API_KEY": os.environ.get("ELEVENLABS_API_KEY", "benchmark"),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, check=True
+    )
+    
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, name = match.groups()
+            modules.append((name, int(own), int(cumulative)))
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+
+def by_package(modules: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Sum self import time (microseconds) per top-level package."""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, own, _ in modules:
+        totals[name.split(".")[0]] += own
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure app import time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to sample")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--clients", action="store_true",
+                        help="Also construct the Gemini and ElevenLabs clients")
+    args = parser.parse_args()
+    
+    code = _IMPORT_APP_AND_CLIENTS if args.clients else _IMPORT_APP
+    walls = []
+    packages: Dict[str, List[int]] = defaultdict(list)
+    modules: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        wall, timings = sample(code)
+        walls.append(wall)
+        for package, total in by_package(timings).items():
+            packages[package].append(total)
+        for name, _, cumulative in timings:
+            modules[name].append(cumulative)
+    
+    label = "import main + clients" if args.clients else "import main"
+    print(f"{label}: median {statistics.median(walls) * 1000:.0f} ms over {args.runs} runs "
+          f"(min {min(walls) * 1000:.0f} ms)\n")
+    
+    print(f"{'package (self time)':<40}{'ms':>10}")
+    ranked = sorted(packages.items(), key=lambda item: -statistics.median(item[1]))
+    for package, totals in ranked[:args.top]:
+        print(f"{package:<40}{statistics.median(totals) / 1000:>10.1f}")
+    
+    print(f"\n{'module (cumulative)':<40}{'ms':>10}")
+    ranked = sorted(modules.items(), key=lambda item: -statistics.median(item[1]))
+    for name, totals in ranked[:args.top]:
+        print(f"{name:<40}{statistics.median(totals) / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,14 @@ class Settings:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     
+    # Upstream endpoint overrides (unset in production; used to point at local stand-ins)
+    GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+    ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL")
+    RSS_FEED_BASE_URL = os.getenv("RSS_FEED_BASE_URL")
+    
+    # Load the AI SDKs in the background at startup instead of on first use
+    STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "false").lower() == "true"
+    
     # Gemini Configuration
     GEMINI_MODEL = "gemini-2.0-flash"
     GEMINI_TEMPERATURE = 0.7
@@ -37,14 +45,159 @@ class Settings:
     GEMINI_TOP_K = 40
     GEMINI_MAX_TOKENS = 1024
     
+    # Gemini Context Caching - the system prompt and current posts block are uploaded
+    # once as a cached prefix, so each chat only sends the question
+    GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "true").lower() == "true"
+    GEMINI_CONTEXT_CACHE_MODEL = os.getenv("GEMINI_CONTEXT_CACHE_MODEL", GEMINI_MODEL)
+    GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+    GEMINI_CONTEXT_CACHE_TOKEN_BUDGET = int(os.getenv("GEMINI_CONTEXT_CACHE_TOKEN_BUDGET", "8000"))
+    
+    # Chat Answer Cache Configuration
+    CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "600"))
+    CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "500"))
+    
+    # Chat Session Configuration - history past the token budget is folded into
+    # a summary, so prompts stay about the same size however long a chat runs
+    CHAT_SESSION_IDLE_TTL = float(os.getenv("CHAT_SESSION_IDLE_TTL", "1800"))
+    CHAT_SESSION_MAX = int(os.getenv("CHAT_SESSION_MAX", "10000"))
+    CHAT_SESSION_ANSWER_CHARS = 600  # Stored answers are cut to this length
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "600"))
+    CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "150"))
+    
     # TTS Configuration
     DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Rachel voice
     TTS_MODEL = "eleven_turbo_v2_5"
     TTS_OUTPUT_FORMAT = "mp3_44100_128"
+    TTS_MIN_SEGMENT_CHARS = 20  # Shorter sentences are merged with the next one
+    TTS_PIPELINE_DEPTH = int(os.getenv("TTS_PIPELINE_DEPTH", "2"))
+    TTS_SEGMENT_BUFFER_CHUNKS = 32  # Audio chunks buffered per sentence in flight
+    TTS_CACHE_DIR = os.getenv(
+        "TTS_CACHE_DIR",
+        str(Path(__file__).parent.parent / "data" / "tts_cache")
+    )
+    TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
     
     # Posts Configuration
     MAX_POSTS_PER_ACCOUNT = 5
     MAX_POSTS_FOR_CONTEXT = 40
+    MAX_POSTS_HISTORY = 100
+    MAX_RETAINED_SNAPSHOTS = 8
+    
+    # Live post stream (/posts/stream)
+    POSTS_STREAM_POLL_INTERVAL = float(os.getenv("POSTS_STREAM_POLL_INTERVAL", "5"))
+    POSTS_STREAM_HEARTBEAT = float(os.getenv("POSTS_STREAM_HEARTBEAT", "15"))
+    POSTS_STREAM_MAX_SUBSCRIBERS = int(os.getenv("POSTS_STREAM_MAX_SUBSCRIBERS", "5000"))
+    POSTS_STREAM_MAX_AGE = float(os.getenv("POSTS_STREAM_MAX_AGE", "300"))
+    POSTS_STREAM_CLIENT_BUFFER = 16  # Events queued per client before it is disconnected
+    POSTS_STREAM_REPLAY_EVENTS = 256  # Recent events kept for Last-Event-ID resumes
+    
+    # Query-aware context selection (0 disables ranking)
+    CONTEXT_TOP_K = int(os.getenv("CONTEXT_TOP_K", "12"))
+    CONTEXT_CANDIDATE_POSTS = int(os.getenv("CONTEXT_CANDIDATE_POSTS", "100"))
+    
+    # Prompt Builder Configuration (0 budget means unlimited; captions are
+    # trimmed to SNIPPET_CHARS before posts are dropped)
+    PROMPT_CONTEXT_TOKEN_BUDGET = int(os.getenv("PROMPT_CONTEXT_TOKEN_BUDGET", "1500"))
+    PROMPT_TRIMMED_SNIPPET_CHARS = int(os.getenv("PROMPT_TRIMMED_SNIPPET_CHARS", "80"))
+    PROMPT_FRAGMENT_CACHE_SIZE = 2000
+    
+    # HTTP Caching Configuration
+    POSTS_CACHE_CONTROL = os.getenv(
+        "POSTS_CACHE_CONTROL",
+        "public, max-age=60, stale-while-revalidate=300"
+    )
+    # Delta responses (?since=) change as posts arrive, so they are always revalidated
+    POSTS_DELTA_CACHE_CONTROL = os.getenv("POSTS_DELTA_CACHE_CONTROL", "no-cache")
+    ACCOUNTS_CACHE_CONTROL = os.getenv(
+        "ACCOUNTS_CACHE_CONTROL",
+        "public, max-age=3600, stale-while-revalidate=86400"
+    )
+    HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))
+    
+    # Request Profiling (off unless sampled or requested with X-Profile: <PROFILE_TOKEN>)
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+    PROFILE_DIR = os.getenv(
+        "PROFILE_DIR",
+        str(Path(__file__).parent.parent / "data" / "profiles")
+    )
+    PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+    PROFILE_RECENT_REQUESTS = 500
+    
+    # Post Store Configuration
+    POST_STORE_PATH = os.getenv(
+        "POST_STORE_PATH",
+        str(Path(__file__).parent.parent / "data" / "posts.db")
+    )
+    FEED_INGEST_LIMIT = int(os.getenv("FEED_INGEST_LIMIT", "50"))
+    
+    # RSS Fetching Configuration
+    RSS_FETCH_TIMEOUT = float(os.getenv("RSS_FETCH_TIMEOUT", "10"))
+    RSS_MAX_CONNECTIONS = int(os.getenv("RSS_MAX_CONNECTIONS", "20"))
+    
+    # Upstream Limits - (max concurrent calls, timeout in seconds) per upstream
+    UPSTREAM_LIMITS = {
+        "rss": (
+            int(os.getenv("RSS_CONCURRENCY", "8")),
+            RSS_FETCH_TIMEOUT,
+        ),
+        "gemini": (
+            int(os.getenv("GEMINI_CONCURRENCY", "16")),
+            float(os.getenv("GEMINI_TIMEOUT", "60")),
+        ),
+        "tts": (
+            int(os.getenv("TTS_CONCURRENCY", "8")),
+            float(os.getenv("TTS_TIMEOUT", "60")),
+        ),
+    }
+    
+    # Upstream Queues - (max queued calls, max seconds to wait for a slot); 0 is unbounded
+    UPSTREAM_QUEUES = {
+        "rss": (0, 0.0),
+        "gemini": (
+            int(os.getenv("GEMINI_MAX_QUEUE", "32")),
+            float(os.getenv("GEMINI_MAX_QUEUE_WAIT", "10")),
+        ),
+        "tts": (
+            int(os.getenv("TTS_MAX_QUEUE", "16")),
+            float(os.getenv("TTS_MAX_QUEUE_WAIT", "10")),
+        ),
+    }
+    
+    # Per-client Rate Limits - (requests per minute, burst); 0 requests disables
+    RATE_LIMITS = {
+        "chat": (
+            float(os.getenv("CHAT_RATE_PER_MINUTE", "10")),
+            int(os.getenv("CHAT_RATE_BURST", "5")),
+        ),
+        "tts": (
+            float(os.getenv("TTS_RATE_PER_MINUTE", "10")),
+            int(os.getenv("TTS_RATE_BURST", "5")),
+        ),
+    }
+    RATE_LIMIT_MAX_CLIENTS = 10000
+    TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+    FORWARDED_PROXY_HOPS = int(os.getenv("FORWARDED_PROXY_HOPS", "1"))  # Proxies appending to X-Forwarded-For
+    
+    # Feed Cache Configuration (seconds)
+    FEED_CACHE_TTL = float(os.getenv("FEED_CACHE_TTL", "300"))
+    FEED_CACHE_STALE_TTL = float(os.getenv("FEED_CACHE_STALE_TTL", "3600"))
+    
+    # Multi-worker Coordination - one worker (holding the lock file) polls the feeds,
+    # and chat answers are shared between workers through a SQLite cache
+    FEED_POLLER = os.getenv("FEED_POLLER", "true").lower() == "true"
+    FEED_POLL_INTERVAL = float(os.getenv("FEED_POLL_INTERVAL", str(FEED_CACHE_TTL)))
+    FEED_POLLER_LOCK_PATH = os.getenv(
+        "FEED_POLLER_LOCK_PATH",
+        str(Path(__file__).parent.parent / "data" / "feed_poller.lock")
+    )
+    SHARED_CACHE_ENABLED = os.getenv("SHARED_CACHE_ENABLED", "true").lower() == "true"
+    SHARED_CACHE_PATH = os.getenv(
+        "SHARED_CACHE_PATH",
+        str(Path(__file__).parent.parent / "data" / "shared_cache.db")
+    )
+    SHARED_CACHE_BUSY_TIMEOUT = 2.0
     
     # System Prompt
     SYSTEM_PROMPT = """You are a helpful AI assistant for Stillwater Pulse, a platform that aggregates Instagram posts from local Stillwater, Oklahoma organizations and businesses.
@@ -3,7 +3,10 @@ Stillwater Pulse API - Main application entry point.
 """
 
 import os
+import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -13,8 +16,17 @@ apply_cgi_fix()
 
 # Import configuration and routers
 from config.settings import settings
-from routers import posts, chat, tts
+from routers import posts, chat, tts, stats, profiles
 from models.schemas import HealthResponse
+from services.gemini_service import GeminiService
+from services.post_broadcaster import PostBroadcaster
+from services.post_store import PostStore
+from services.rss_service import RSSService
+from services.shared_cache import SharedCache
+from services.tts_service import TTSService
+from services.upstream import shutdown_upstreams
+from utils.metrics_middleware import MetricsMiddleware
+from utils.profiling_middleware import ProfilingMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +35,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# -------------------------------------------------------------------
+# Application Lifespan
+# -------------------------------------------------------------------
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup, an optional background warm-up, and shutdown."""
+    await startup_event()
+    warmup = asyncio.create_task(warm_up()) if settings.STARTUP_WARMUP else None
+    try:
+        yield
+    finally:
+        if warmup is not None:
+            warmup.cancel()
+        await shutdown_event()
+
 # -------------------------------------------------------------------
 # FastAPI Application
 # -------------------------------------------------------------------
@@ -30,7 +58,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title=settings.APP_TITLE,
     version=settings.API_VERSION,
-    description="API for aggregating Instagram posts from Stillwater, Oklahoma"
+    description="API for aggregating Instagram posts from Stillwater, Oklahoma",
+    lifespan=lifespan
 )
 
 # -------------------------------------------------------------------
@@ -43,8 +72,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Audio-URL", "X-TTS-Cache", "X-Chat-Cache", "X-Chat-Session", "X-Posts-Snapshot", "X-Posts-Cursor", "X-Posts-Has-More", "X-Prompt-Tokens", "X-Profile-Id", "Retry-After"],
 )
 
+# -------------------------------------------------------------------
+# Profiling and Metrics Middleware (metrics outermost, so it times everything)
+# -------------------------------------------------------------------
+
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # -------------------------------------------------------------------
 # Include Routers
 # -------------------------------------------------------------------
@@ -52,6 +89,8 @@ app.add_middleware(
 app.include_router(posts.router)
 app.include_router(chat.router)
 app.include_router(tts.router)
+app.include_router(stats.router)
+app.include_router(profiles.router)
 
 # -------------------------------------------------------------------
 # Health Check
@@ -71,7 +110,6 @@ async def health_check():
 # Application Startup
 # -------------------------------------------------------------------
 
-@app.on_event("startup")
 async def startup_event():
     """Run on application startup."""
     host = os.getenv("HOST", "127.0.0.1")
@@ -90,8 +128,35 @@ async def startup_event():
     except ValueError as e:
         logger.warning(f"⚠️  Configuration warning: {e}")
 
+    # Only one worker process actually polls; the rest read the shared post store
+    if settings.FEED_POLLER:
+        RSSService.start_poller()
+
+
+async def warm_up():
+    """
+    Load the AI SDKs and build their clients before the first request needs them.
+    
+    Runs in the background after startup, so the server accepts requests
+    (e.g. /posts) right away; enabled with STARTUP_WARMUP.
+    """
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, GeminiService)
+        await loop.run_in_executor(None, TTSService)
+        logger.info(f"🔥 Warmed up AI clients in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logger.warning(f"⚠️  Skipped warm-up: {e}")
+
 
-@app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown."""
-    logger.info("👋 Shutting down Stillwater Pulse API")
\ No newline at end of file
+    logger.info("👋 Shutting down Stillwater Pulse API")
+    await PostBroadcaster().stop()
+    await RSSService.stop_poller()
+    await RSSService.close_client()
+    PostStore().close()
+    if settings.SHARED_CACHE_ENABLED:
+        SharedCache().close()
+    shutdown_upstreams()
\ No newline at end of file
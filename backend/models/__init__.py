@@ -1,5 +1,6 @@
-"""Pydantic models for request/response validation."""
+"""Pydantic models for request/response validation, plus internal records."""
 
+from .post import Post
 from .schemas import (
     PostResponse,
     ChatRequest,
@@ -11,6 +12,7 @@ from .schemas import (
 )
 
 __all__ = [
+    'Post',
     'PostResponse',
     'ChatRequest',
     'ChatResponse',
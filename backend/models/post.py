@@ -0,0 +1,58 @@
+"""
+Compact in-memory record for an ingested post.
+"""
+
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass(frozen=True, slots=True)
+class Post:
+    """
+    Immutable post as used throughout the services.
+    
+    Slotted so large lists stay small in memory, and laid out in the same
+    field order as PostResponse so it serializes directly to the API shape.
+    """
+    
+    id: str
+    title: str
+    link: str
+    image: str
+    published: str
+    account: str
+    timestamp: float
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Post':
+        """
+        Build a post from a loosely shaped dictionary (e.g. sent by a client).
+        
+        Args:
+            data: Dictionary with any of the post fields
+        
+        Returns:
+            Post with missing fields defaulted
+        """
+        link = str(data.get("link") or "")
+        return cls(
+            id=str(data.get("id") or link),
+            title=str(data.get("title") or ""),
+            link=link,
+            image=str(data.get("image") or ""),
+            published=str(data.get("published") or data.get("pubDate") or ""),
+            account=str(data.get("account") or ""),
+            timestamp=float(data.get("timestamp") or 0.0),
+        )
+    
+    def to_dict(self) -> Dict:
+        """Get the post as a plain dictionary in the API response shape."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "link": self.link,
+            "image": self.image,
+            "published": self.published,
+            "account": self.account,
+            "timestamp": self.timestamp,
+        }
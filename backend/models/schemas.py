@@ -2,27 +2,59 @@
 Pydantic models for request/response validation.
 """
 
-from pydantic import BaseModel, Field
+import math
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Dict, Optional
 
 
 class PostResponse(BaseModel):
     """Response model for a single Instagram post."""
+    id: Optional[str] = None
     title: str
     link: str
     image: str
     published: str
+    account: Optional[str] = None
+    timestamp: Optional[float] = None
 
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str = Field(..., min_length=1, description="User's message")
-    posts: List[Dict] = Field(default=[], description="Recent posts for context")
+    posts: List[Dict] = Field(
+        default=[],
+        description="Recent posts for context (deprecated, prefer snapshot_id)"
+    )
+    snapshot_id: Optional[str] = Field(
+        default=None,
+        description="X-Posts-Snapshot value from /posts/all the client was shown"
+    )
+    session_id: Optional[str] = Field(
+        default=None,
+        description="Chat session to continue (X-Chat-Session from a previous reply)"
+    )
+    
+    @field_validator("posts")
+    @classmethod
+    def check_post_timestamps(cls, posts: List[Dict]) -> List[Dict]:
+        """Reject uploaded posts whose timestamp isn't a number."""
+        for index, post in enumerate(posts):
+            timestamp = post.get("timestamp")
+            if not timestamp:
+                continue
+            try:
+                valid = math.isfinite(float(timestamp))
+            except (TypeError, ValueError):
+                valid = False
+            if not valid:
+                raise ValueError(f"posts[{index}].timestamp must be a number")
+        return posts
 
 
 class ChatResponse(BaseModel):
     """Response model for chat endpoint."""
     response: str = Field(..., description="AI assistant's response")
+    session_id: Optional[str] = Field(default=None, description="Chat session id for follow-ups")
 
 
 class TTSRequest(BaseModel):
@@ -1,6 +1,6 @@
 # routers/__init__.py
 """API route handlers."""
 
-from . import posts, chat, tts
+from . import posts, chat, tts, stats, profiles
 
-__all__ = ['posts', 'chat', 'tts']
\ No newline at end of file
+__all__ = ['posts', 'chat', 'tts', 'stats', 'profiles']
\ No newline at end of file
@@ -2,10 +2,22 @@
 Router for AI chat endpoint.
 """
 
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, HTTPException
+import time
+from typing import AsyncIterator, Dict, Optional
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from models.post import Post
 from models.schemas import ChatRequest, ChatResponse
+from services.chat_cache import ChatCache
+from services.chat_sessions import ChatSession, ChatSessionStore
 from services.gemini_service import GeminiService
+from services.post_snapshot import PostSnapshot, SnapshotService
+from services.prompt_builder import PromptContext
+from services.upstream import UpstreamOverloadedError, UpstreamTimeoutError, get_upstream
+from utils.admission import enforce_rate_limit, overloaded
 
 logger = logging.getLogger(__name__)
 
@@ -13,30 +25,84 @@ router = APIRouter(prefix="", tags=["chat"])
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, response: Response, http_request: Request):
     """
     Chat with AI about Stillwater Instagram posts.
     
+    The posts context is built server-side from the snapshot the client
+    names (or the current one), keeping only the posts most relevant to
+    the question, so clients don't need to upload posts. Repeat
+    questions against the same posts are answered from the chat cache;
+    the X-Chat-Cache header reports HIT or MISS, and generated answers
+    report the estimated prompt size in X-Prompt-Tokens. Only questions
+    that reach Gemini count against the client's rate limit.
+    
+    Follow-up questions continue the conversation named by session_id;
+    the id to send next time is returned in session_id and the
+    X-Chat-Session header. Only a session's first question is answered
+    from the chat cache, since later answers depend on the history.
+    
     Args:
-        request: ChatRequest with user message and optional posts context
+        request: ChatRequest with user message, optional snapshot id and
+            optional session id
+        response: Outgoing response (for the cache and session headers)
+        http_request: Incoming request (to identify the client)
         
     Returns:
         ChatResponse with AI-generated response
         
     Raises:
-        HTTPException: 500 if AI generation fails
+        HTTPException: 429 if the client is over its rate limit, 500 if
+            AI generation fails, 503 if Gemini is at capacity, 504 if it
+            times out
     """
     try:
         # Initialize Gemini service
         gemini = GeminiService()
         
-        # Generate response
-        response_text = gemini.generate_response(
+        snapshot = await _resolve_snapshot(request)
+        sessions = ChatSessionStore()
+        session = await asyncio.to_thread(sessions.get_or_create, request.session_id)
+        history = session.history()
+        response.headers["X-Chat-Session"] = session.id
+        
+        # Answer repeat questions from the cache
+        cache = ChatCache()
+        cached_text = await _cached_answer(request.message, snapshot.fingerprint, history)
+        if cached_text is not None:
+            await asyncio.to_thread(sessions.add_turn, session, request.message, cached_text)
+            response.headers["X-Chat-Cache"] = "HIT"
+            return ChatResponse(response=cached_text, session_id=session.id)
+        
+        enforce_rate_limit(http_request, "chat")
+        
+        # Generate response from the posts relevant to the question
+        context = _build_context(snapshot, request.message, history)
+        response_text = await gemini.generate_response_async(
             message=request.message,
-            posts=request.posts
+            posts=context.posts,
+            posts_context=context.text,
+            prefix=context.prefix,
+            history=history
         )
+        if not history:
+            await asyncio.to_thread(cache.put, request.message, snapshot.fingerprint, response_text)
+        await asyncio.to_thread(sessions.add_turn, session, request.message, response_text)
         
-        return ChatResponse(response=response_text)
+        response.headers["X-Chat-Cache"] = "MISS"
+        response.headers["X-Prompt-Tokens"] = str(context.prompt_tokens)
+        return ChatResponse(response=response_text, session_id=session.id)
+    
+    except HTTPException:
+        raise
+    
+    except UpstreamOverloadedError as e:
+        logger.warning(f"Shedding chat request: {str(e)}")
+        raise overloaded(e)
+    
+    except UpstreamTimeoutError as e:
+        logger.error(f"Timeout in chat endpoint: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
         
     except ValueError as e:
         # Configuration error (missing API key, etc.)
@@ -52,4 +118,199 @@ async def chat(request: ChatRequest):
         raise HTTPException(
             status_code=500,
             detail=f"Error generating chat response: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Chat with AI, streaming the answer as Server-Sent Events.
+    
+    Each chunk is sent as a `data: {"text": ...}` event as soon as Gemini
+    produces it, followed by an `event: done` event. Failures after the
+    stream has started are sent as an `event: error` event. Cached
+    answers are sent as a single chunk. The chat session id is returned
+    in the X-Chat-Session header; the turn is only added to the session
+    once the answer is complete.
+    
+    Rate limiting and Gemini's queue are checked before the stream
+    starts, so overload still gets a proper 429 / 503 status.
+    
+    Args:
+        request: ChatRequest with user message and optional snapshot id
+        http_request: Incoming request (to identify the client)
+    
+    Returns:
+        StreamingResponse of text/event-stream events
+    
+    Raises:
+        HTTPException: 429 if the client is over its rate limit, 500 if
+            the Gemini service can't be configured or the prompt can't be
+            prepared, 503 if Gemini is at capacity
+    """
+    try:
+        gemini = GeminiService()
+        
+        snapshot = await _resolve_snapshot(request)
+        sessions = ChatSessionStore()
+        session = await asyncio.to_thread(sessions.get_or_create, request.session_id)
+        history = session.history()
+        cached_text = await _cached_answer(request.message, snapshot.fingerprint, history)
+        
+        headers = {
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Chat-Cache": "MISS" if cached_text is None else "HIT",
+            "X-Chat-Session": session.id
+        }
+        
+        if cached_text is not None:
+            await asyncio.to_thread(sessions.add_turn, session, request.message, cached_text)
+            events = _cached_events(cached_text)
+        else:
+            enforce_rate_limit(http_request, "chat")
+            get_upstream("gemini").admit()
+            
+            context = _build_context(snapshot, request.message, history)
+            headers["X-Prompt-Tokens"] = str(context.prompt_tokens)
+            events = _stream_events(
+                gemini, request.message, context, snapshot.fingerprint, session, history
+            )
+    
+    except HTTPException:
+        raise
+    
+    except UpstreamOverloadedError as e:
+        logger.warning(f"Shedding chat stream: {str(e)}")
+        raise overloaded(e)
+    
+    except ValueError as e:
+        logger.error(f"ValueError in chat stream endpoint: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Configuration error: {str(e)}"
+        )
+    
+    except Exception as e:
+        # Anything failing before the stream starts still gets a proper status
+        logger.error(f"Exception in chat stream endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error preparing chat response: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers=headers
+    )
+
+
+async def _resolve_snapshot(request: ChatRequest) -> PostSnapshot:
+    """
+    Pick the candidate posts for a chat request.
+    
+    Posts uploaded by older clients are still honored; otherwise the
+    server-side snapshot the client names (or the current one) is used.
+    """
+    if request.posts:
+        return PostSnapshot([Post.from_dict(post) for post in request.posts])
+    
+    return await SnapshotService().resolve(request.snapshot_id)
+
+
+async def _cached_answer(message: str, fingerprint: str, history: str) -> Optional[str]:
+    """
+    Look up a cached answer; only questions without history are cached.
+    
+    Like every chat cache and session call here, the lookup runs in a
+    thread: with SHARED_CACHE_ENABLED it reads SQLite, which can wait
+    up to SHARED_CACHE_BUSY_TIMEOUT on another worker's write.
+    """
+    if history:
+        return None
+    return await asyncio.to_thread(ChatCache().get, message, fingerprint)
+
+
+def _build_context(snapshot: PostSnapshot, message: str, history: str) -> PromptContext:
+    """Build the budgeted posts context for a question and log its size."""
+    context = SnapshotService().build_context(snapshot, message, history)
+    if context.prefix is not None:
+        logger.info(f"Chat prompt: ~{context.prompt_tokens} tokens after the cached posts prefix")
+    else:
+        logger.info(
+            f"Chat prompt: ~{context.prompt_tokens} tokens, {len(context.posts)} posts "
+            f"({context.trimmed} trimmed, {context.dropped} dropped)"
+        )
+    return context
+
+
+async def _cached_events(text: str) -> AsyncIterator[str]:
+    """Send a cached answer as one chunk followed by the done event."""
+    yield _sse({"text": text})
+    yield _sse({}, event="done")
+
+
+async def _stream_events(
+    gemini: GeminiService,
+    message: str,
+    context: PromptContext,
+    fingerprint: str,
+    session: ChatSession,
+    history: str
+) -> AsyncIterator[str]:
+    """Format Gemini's streamed chunks as SSE events, logging time-to-first-token."""
+    started = time.perf_counter()
+    first_token = None
+    parts = []
+    
+    try:
+        chunks = gemini.stream_response_async(
+            message=message,
+            posts=context.posts,
+            posts_context=context.text,
+            prefix=context.prefix,
+            history=history
+        )
+        async for text in chunks:
+            if first_token is None:
+                first_token = time.perf_counter() - started
+                logger.info(f"Chat stream time-to-first-token: {first_token:.3f}s")
+            parts.append(text)
+            yield _sse({"text": text})
+        
+        # Only complete answers are worth caching or remembering
+        answer = "".join(parts).strip()
+        if not answer:
+            # e.g. every chunk was blocked by a safety filter
+            logger.warning("Chat stream produced no text")
+            yield _sse({"detail": "Gemini returned an empty response"}, event="error")
+            return
+        if not history:
+            await asyncio.to_thread(ChatCache().put, message, fingerprint, answer)
+        await asyncio.to_thread(ChatSessionStore().add_turn, session, message, answer)
+        yield _sse({}, event="done")
+    
+    except UpstreamOverloadedError as e:
+        # Lost the race for Gemini's queue after the stream was admitted
+        logger.warning(f"Shedding chat stream: {str(e)}")
+        yield _sse(
+            {"detail": f"Service busy: {str(e)}", "retry_after": e.retry_after},
+            event="error"
+        )
+    
+    except Exception as e:
+        logger.error(f"Exception in chat stream: {str(e)}", exc_info=True)
+        yield _sse({"detail": f"Error generating chat response: {str(e)}"}, event="error")
+    
+    finally:
+        logger.info(
+            f"Chat stream finished: {len(parts)} chunks in "
+            f"{time.perf_counter() - started:.3f}s"
+        )
+
+
+def _sse(data: Dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
\ No newline at end of file
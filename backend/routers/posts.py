@@ -2,44 +2,179 @@
 Router for Instagram posts endpoints.
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from config.settings import settings
 from models.schemas import PostResponse
+from services.post_broadcaster import PostBroadcaster
+from services.post_snapshot import SnapshotService
+from services.post_store import PostStore
 from services.rss_service import RSSService
+from utils.cached_response import cached_json_response
+from utils.fast_json import dumps
+from utils.feed_cursor import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="", tags=["posts"])
 
 
 @router.get("/accounts", response_model=List[str])
-async def get_accounts():
+async def get_accounts(request: Request):
     """
     Get list of all available Instagram account usernames.
     
+    Args:
+        request: Incoming request (for conditional and encoding headers)
+    
     Returns:
         List of account names
     """
-    return RSSService.get_account_names()
+    body = dumps(RSSService.get_account_names())
+    return cached_json_response(request, body, settings.ACCOUNTS_CACHE_CONTROL)
+
+
+@router.get("/posts/all", response_model=List[PostResponse])
+async def get_all_posts(request: Request):
+    """
+    Fetch latest posts from every Instagram account in one request.
+    
+    Feeds are fetched concurrently, so latency is roughly that of the
+    slowest single feed rather than the sum of all of them. The
+    X-Posts-Snapshot header identifies the chat context for these posts;
+    clients send it back as snapshot_id instead of uploading the posts.
+    X-Posts-Cursor can be passed to /posts?since= to poll for new posts.
+    
+    Args:
+        request: Incoming request (for conditional and encoding headers)
+    
+    Returns:
+        List of recent posts from all accounts, newest first
+    """
+    # Taken first so posts ingested while fetching come back in the next delta
+    cursor = encode_cursor(PostStore().latest_seq)
+    posts = await RSSService.fetch_all_posts()
+    # Post records already have the PostResponse shape, so skip re-validation
+    return cached_json_response(
+        request,
+        dumps(posts),
+        settings.POSTS_CACHE_CONTROL,
+        headers={
+            "X-Posts-Snapshot": SnapshotService().current().id,
+            "X-Posts-Cursor": cursor,
+        }
+    )
+
+
+@router.get("/posts/stream")
+async def stream_posts(
+    request: Request,
+    since: Optional[str] = Query(
+        None, description="Cursor: also send posts ingested after it"
+    )
+):
+    """
+    Push newly ingested posts as Server-Sent Events.
+    
+    Each batch of new posts is sent as an `event: posts` event whose data
+    is the list of posts and whose id is the cursor after them, so a
+    reconnecting EventSource resumes from Last-Event-ID without missing
+    or refetching posts. A client can start from the X-Posts-Cursor of
+    /posts/all with since. Comment heartbeats keep idle connections open,
+    and streams end after POSTS_STREAM_MAX_AGE for the client to reconnect.
+    
+    Args:
+        request: Incoming request (for the Last-Event-ID header)
+        since: Cursor to resume from when there is no Last-Event-ID
+    
+    Returns:
+        StreamingResponse of text/event-stream events
+    
+    Raises:
+        HTTPException: 400 if the cursor is invalid, 503 if this worker
+            already has the maximum number of subscribers
+    """
+    cursor = request.headers.get("last-event-id") or since
+    try:
+        seq = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    broadcaster = PostBroadcaster()
+    if broadcaster.full:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many live post subscribers, please retry",
+            headers={"Retry-After": str(int(settings.POSTS_STREAM_HEARTBEAT))}
+        )
+    
+    subscription = broadcaster.subscribe(seq)
+    return StreamingResponse(
+        broadcaster.events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/posts", response_model=List[PostResponse])
 async def get_posts(
-    username: str = Query(..., description="Instagram username")
+    request: Request,
+    username: Optional[str] = Query(
+        None, description="Instagram username (optional with since or before)"
+    ),
+    since: Optional[str] = Query(
+        None, description="Cursor: only return posts ingested after it"
+    ),
+    before: Optional[str] = Query(
+        None, description="Cursor: return the page of posts ingested up to it"
+    ),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=settings.MAX_POSTS_HISTORY,
+        description="Maximum number of posts to return"
+    )
 ):
     """
-    Fetch latest posts from a specific Instagram account.
+    Fetch latest posts from a specific Instagram account, or page through
+    posts by when they were ingested.
+    
+    Every response carries an opaque X-Posts-Cursor header:
+    
+    - With username only: the latest posts of that account; poll for new
+      posts by passing the cursor back as since.
+    - With since: posts inserted or changed after the cursor, across all
+      accounts (or just username's), oldest first. The cursor to poll
+      with next is returned; when nothing is new the body is [] and the
+      cursor is unchanged.
+    - With before: the next older page of history, most recent first,
+      and the cursor for the page after it.
+    
+    X-Posts-Has-More is "true" when a since or before page was cut off
+    at the limit.
     
     Args:
+        request: Incoming request (for conditional and encoding headers)
         username: Instagram account username
+        since: Cursor from a previous response to poll from
+        before: Cursor from a previous response to page back from
+        limit: Maximum number of posts to return
         
     Returns:
-        List of recent posts (title, link, image, published date)
+        List of posts (title, link, image, published date)
         
     Raises:
-        HTTPException: 404 if username not found, 500 if fetch fails
+        HTTPException: 400 if the cursor is invalid or no username or
+            cursor is given, 404 if username not found, 500 if fetch fails
     """
+    if since is not None or before is not None:
+        return await _get_post_page(request, username, since, before, limit)
+    if username is None:
+        raise HTTPException(status_code=400, detail="username, since or before is required")
+    
     try:
-        posts = RSSService.fetch_posts(username)
-        return posts
+        cursor = encode_cursor(PostStore().latest_seq)
+        posts = await RSSService.fetch_posts(username, limit or settings.MAX_POSTS_PER_ACCOUNT)
+        body = dumps(posts)
         
     except ValueError as e:
         # Username not found
@@ -50,4 +185,50 @@ async def get_posts(
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching RSS feed: {str(e)}"
-        )
\ No newline at end of file
+        )
+    
+    return cached_json_response(
+        request, body, settings.POSTS_CACHE_CONTROL, headers={"X-Posts-Cursor": cursor}
+    )
+
+
+async def _get_post_page(
+    request: Request,
+    username: Optional[str],
+    since: Optional[str],
+    before: Optional[str],
+    limit: Optional[int]
+):
+    """Serve one since (delta) or before (history) page of posts."""
+    if since is not None and before is not None:
+        raise HTTPException(status_code=400, detail="Pass either since or before, not both")
+    
+    try:
+        seq = decode_cursor(since if since is not None else before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    limit = limit or settings.MAX_POSTS_HISTORY
+    try:
+        if since is not None:
+            posts, seq = await RSSService.fetch_changes(seq, username, limit)
+            cache_control = settings.POSTS_DELTA_CACHE_CONTROL
+        else:
+            if username is not None and not RSSService.validate_account(username):
+                raise ValueError(f"Username '{username}' not found")
+            posts, seq = PostStore().history_before(seq, username, limit)
+            cache_control = settings.POSTS_CACHE_CONTROL
+    
+    except ValueError as e:
+        # Username not found
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return cached_json_response(
+        request,
+        dumps(posts),
+        cache_control,
+        headers={
+            "X-Posts-Cursor": encode_cursor(seq),
+            "X-Posts-Has-More": "true" if len(posts) == limit else "false",
+        }
+    )
\ No newline at end of file
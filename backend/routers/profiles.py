@@ -0,0 +1,82 @@
+"""
+Router for browsing request profiles.
+"""
+
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from config.settings import settings
+from services.profiler import RequestProfiler
+
+
+def require_profile_token(x_profile: Optional[str] = Header(None)) -> None:
+    """
+    Only let clients holding PROFILE_TOKEN read profiles.
+    
+    Profiles expose request paths and code-level timings, so they are
+    guarded by the same X-Profile token that requests them; with no
+    token configured they can't be read at all.
+    
+    Raises:
+        HTTPException: 403 if the token is unset, missing or wrong
+    """
+    if not settings.PROFILE_TOKEN or x_profile is None or not hmac.compare_digest(
+        x_profile.encode("latin-1", "replace"), settings.PROFILE_TOKEN.encode("latin-1")
+    ):
+        raise HTTPException(status_code=403, detail="A valid X-Profile token is required")
+
+
+router = APIRouter(
+    prefix="/profiles",
+    tags=["profiles"],
+    dependencies=[Depends(require_profile_token)]
+)
+
+
+@router.get("/slowest")
+async def get_slowest_requests(limit: int = Query(20, ge=1, le=200)):
+    """
+    List the slowest recently profiled requests.
+    
+    Args:
+        limit: Maximum number of requests to return
+    
+    Returns:
+        Profile summaries (duration and phase breakdown), slowest first
+    
+    Raises:
+        HTTPException: 403 without a valid X-Profile token
+    """
+    profiler = RequestProfiler()
+    return {
+        "profiles": profiler.slowest(limit),
+        "stats": profiler.stats(),
+    }
+
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+async def get_profile_report(
+    profile_id: str,
+    limit: int = Query(40, ge=1, le=500),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls|ncalls)$")
+):
+    """
+    Show the call profile of one profiled request.
+    
+    Args:
+        profile_id: Value of the X-Profile-Id response header
+        limit: Number of functions to list
+        sort: pstats sort order
+    
+    Returns:
+        pstats text report
+    
+    Raises:
+        HTTPException: 403 without a valid X-Profile token, 404 if no
+            call profile is stored under that ID
+    """
+    report = RequestProfiler().report(profile_id, limit, sort)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"No call profile '{profile_id}'")
+    return report
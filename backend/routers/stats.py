@@ -0,0 +1,174 @@
+"""
+Router for runtime statistics used to tune caches and limits.
+"""
+
+from typing import Dict, Iterator, Tuple
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from config.settings import settings
+from services.audio_cache import AudioCache
+from services.chat_cache import ChatCache
+from services.chat_sessions import ChatSessionStore
+from services.context_cache import GeminiContextCache
+from services.metrics import REGISTRY
+from services.post_broadcaster import PostBroadcaster
+from services.post_snapshot import SnapshotService
+from services.post_store import PostStore
+from services.profiler import RequestProfiler
+from services.prompt_builder import PromptBuilder
+from services.rate_limiter import rate_limit_stats
+from services.rss_service import RSSService
+from services.shared_cache import SharedCache
+from services.upstream import upstream_stats
+
+router = APIRouter(prefix="", tags=["stats"])
+
+
+@router.get("/stats")
+async def get_stats():
+    """
+    Get runtime statistics for the API's caches and upstream lanes.
+    
+    Returns:
+        Dictionary of counters grouped by component
+    """
+    return {
+        "feed_cache": RSSService.cache_stats(),
+        "feeds": RSSService.feed_stats(),
+        "feed_parser": RSSService.parser_stats(),
+        "feed_poller": RSSService.poller_stats(),
+        "post_store": PostStore().stats(),
+        "post_stream": PostBroadcaster().stats(),
+        "upstreams": upstream_stats(),
+        "rate_limits": rate_limit_stats(),
+        "tts_cache": AudioCache().stats(),
+        "chat_cache": ChatCache().stats(),
+        "chat_sessions": ChatSessionStore().stats(),
+        "gemini_context_cache": GeminiContextCache().stats(),
+        "shared_cache": SharedCache().stats() if settings.SHARED_CACHE_ENABLED else None,
+        "snapshots": SnapshotService().stats(),
+        "prompt_builder": PromptBuilder().stats(),
+        "profiler": RequestProfiler().stats(),
+    }
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Get request, upstream and cache metrics for Prometheus to scrape.
+    
+    Returns:
+        Metrics in the Prometheus text exposition format
+    """
+    # CONTENT_TYPE_LATEST already names the charset, so set the header as-is
+    return Response(
+        content=generate_latest(REGISTRY),
+        headers={"Content-Type": CONTENT_TYPE_LATEST}
+    )
+
+
+class StatsCollector:
+    """
+    Exposes the counters behind /stats as Prometheus metrics.
+    
+    The caches and upstream lanes already count everything; reading
+    their stats at scrape time keeps the request paths free of extra
+    bookkeeping.
+    """
+    
+    def collect(self) -> Iterator:
+        caches = {
+            "feed": _hits_and_misses(RSSService.cache_stats(), ("hits", "stale"), ("misses",)),
+            "chat": _hits_and_misses(ChatCache().stats(), ("hits",), ("misses",)),
+            "tts_audio": _hits_and_misses(AudioCache().stats(), ("hits",), ("misses",)),
+            "prompt_fragments": _hits_and_misses(
+                PromptBuilder().stats(), ("fragment_hits",), ("fragment_misses",)
+            ),
+            "snapshots": _hits_and_misses(SnapshotService().stats(), ("reuses",), ("builds",)),
+        }
+        hits = CounterMetricFamily(
+            "stillwater_cache_hits", "Cache lookups answered from the cache.", labels=["cache"]
+        )
+        misses = CounterMetricFamily(
+            "stillwater_cache_misses", "Cache lookups that had to do the work.", labels=["cache"]
+        )
+        ratio = GaugeMetricFamily(
+            "stillwater_cache_hit_ratio", "Share of cache lookups that were hits.", labels=["cache"]
+        )
+        for name, (hit, miss) in caches.items():
+            hits.add_metric([name], hit)
+            misses.add_metric([name], miss)
+            ratio.add_metric([name], hit / (hit + miss) if hit + miss else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+        
+        feed_requests = CounterMetricFamily(
+            "stillwater_feed_requests", "Feed downloads attempted.", labels=["feed"]
+        )
+        not_modified = CounterMetricFamily(
+            "stillwater_feed_not_modified",
+            "Feed downloads answered with 304 Not Modified.",
+            labels=["feed"]
+        )
+        for feed, stats in RSSService.feed_stats().items():
+            feed_requests.add_metric([feed], stats["requests"])
+            not_modified.add_metric([feed], stats["not_modified"])
+        yield feed_requests
+        yield not_modified
+        
+        lanes = {
+            "in_flight": GaugeMetricFamily(
+                "stillwater_upstream_in_flight", "Upstream calls holding a slot.", labels=["upstream"]
+            ),
+            "waiting": GaugeMetricFamily(
+                "stillwater_upstream_waiting", "Upstream calls queued for a slot.", labels=["upstream"]
+            ),
+            "concurrency": GaugeMetricFamily(
+                "stillwater_upstream_concurrency", "Upstream lane slot limit.", labels=["upstream"]
+            ),
+        }
+        for upstream, stats in upstream_stats().items():
+            for key, family in lanes.items():
+                family.add_metric([upstream], stats[key])
+        yield from lanes.values()
+        
+        poller = RSSService.poller_stats()
+        leader = GaugeMetricFamily(
+            "stillwater_feed_poller_leader",
+            "1 if this worker is the one polling the feeds."
+        )
+        leader.add_metric([], 1.0 if poller and poller["leader"] else 0.0)
+        yield leader
+        
+        store = PostStore().stats()
+        posts = GaugeMetricFamily("stillwater_post_store_posts", "Posts in the local post store.")
+        posts.add_metric([], store["posts"])
+        yield posts
+        
+        stream = PostBroadcaster().stats()
+        subscribers = GaugeMetricFamily(
+            "stillwater_post_stream_subscribers", "Open /posts/stream connections."
+        )
+        subscribers.add_metric([], stream["subscribers"])
+        yield subscribers
+        dropped = CounterMetricFamily(
+            "stillwater_post_stream_dropped",
+            "Post stream clients disconnected for falling behind."
+        )
+        dropped.add_metric([], stream["dropped"])
+        yield dropped
+
+
+def _hits_and_misses(
+    stats: Dict,
+    hit_keys: Tuple[str, ...],
+    miss_keys: Tuple[str, ...]
+) -> Tuple[int, int]:
+    """Sum a cache's hit and miss counters from its stats dictionary."""
+    return sum(stats[k] for k in hit_keys), sum(stats[k] for k in miss_keys)
+
+
+REGISTRY.register(StatsCollector())
@@ -2,11 +2,17 @@
 Router for text-to-speech endpoints.
 """
 
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException
+from typing import AsyncIterator, Dict
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from models.schemas import TTSRequest, VoicesResponse
+from services.audio_cache import AudioCache, AudioCacheWriter
 from services.tts_service import TTSService
+from services.upstream import UpstreamOverloadedError, UpstreamTimeoutError
+from utils.admission import enforce_rate_limit, overloaded
+from utils.ranged_response import ranged_file_response
 
 logger = logging.getLogger(__name__)
 
@@ -14,38 +20,77 @@ router = APIRouter(prefix="/tts", tags=["tts"])
 
 
 @router.post("")
-async def text_to_speech(request: TTSRequest):
+async def text_to_speech(request: TTSRequest, http_request: Request):
     """
     Convert text to speech using ElevenLabs.
     
+    Audio is streamed to the client as ElevenLabs produces it, sentence
+    by sentence, so playback can start after the first sentence. Finished
+    audio is kept in the on-disk cache; repeat requests are served from
+    it, and the X-Audio-URL header points to a cacheable, seekable copy.
+    Only requests that reach ElevenLabs count against the rate limit.
+    
     Args:
         request: TTSRequest with text and optional voice_id
+        http_request: Incoming request (for Range / If-None-Match headers)
         
     Returns:
         Audio stream (MP3)
         
     Raises:
-        HTTPException: 500 if TTS generation fails
+        HTTPException: 400 if there is no speakable text, 429 if the
+            client is over its rate limit, 500 if TTS generation fails,
+            503 if ElevenLabs is at capacity, 504 if it times out
     """
     try:
+        # Serve previously synthesized audio straight from disk
+        cache = AudioCache()
+        key = AudioCache.make_key(
+            TTSService.strip_markdown(request.text),
+            request.voice_id
+        )
+        cached_path = cache.get(key)
+        if cached_path is not None:
+            return ranged_file_response(
+                http_request,
+                cached_path,
+                media_type="audio/mpeg",
+                etag=f'"{key}"',
+                headers=_audio_headers(key, "HIT")
+            )
+        
+        enforce_rate_limit(http_request, "tts")
+        
         # Initialize TTS service
         tts = TTSService()
         
-        # Generate audio
-        audio_bytes = tts.generate_speech(
+        # Wait for the first chunk so upstream failures still get an error status
+        audio_stream = tts.stream_speech(
             text=request.text,
             voice_id=request.voice_id
         )
+        first_chunk = await audio_stream.__anext__()
         
-        # Return streaming response
+        # Return streaming response, saving a copy to the cache as it goes
         return StreamingResponse(
-            audio_bytes,
+            _stream_and_cache(first_chunk, audio_stream, cache.writer(key)),
             media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "inline; filename=speech.mp3",
-                "Cache-Control": "no-cache"
-            }
+            headers=_audio_headers(key, "MISS")
         )
+    
+    except HTTPException:
+        raise
+    
+    except StopAsyncIteration:
+        raise HTTPException(status_code=400, detail="No speakable text")
+    
+    except UpstreamOverloadedError as e:
+        logger.warning(f"Shedding TTS request: {str(e)}")
+        raise overloaded(e)
+    
+    except UpstreamTimeoutError as e:
+        logger.error(f"Timeout in TTS endpoint: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
         
     except ValueError as e:
         # Configuration error
@@ -77,7 +122,7 @@ async def get_voices():
     """
     try:
         tts = TTSService()
-        voices = tts.get_available_voices()
+        voices = await tts.get_available_voices_async()
         return VoicesResponse(voices=voices)
         
     except Exception as e:
@@ -85,4 +130,72 @@ async def get_voices():
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching voices: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/audio/{key}")
+async def get_cached_audio(key: str, request: Request):
+    """
+    Serve previously synthesized audio from the on-disk cache.
+    
+    Supports ETag revalidation and byte Range requests, so browsers can
+    seek and replay without downloading the file again.
+    
+    Args:
+        key: Cache key from the X-Audio-URL header of a /tts response
+        request: Incoming request (for Range / If-None-Match headers)
+    
+    Returns:
+        Audio file (MP3), or a partial / not-modified response
+    
+    Raises:
+        HTTPException: 404 if the audio isn't cached
+    """
+    path = AudioCache().get(key) if AudioCache.is_valid_key(key) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    return ranged_file_response(
+        request,
+        path,
+        media_type="audio/mpeg",
+        etag=f'"{key}"',
+        headers={
+            "Content-Disposition": "inline; filename=speech.mp3",
+            # Content-addressed: the bytes behind a key never change
+            "Cache-Control": "public, max-age=31536000, immutable"
+        }
+    )
+
+
+def _audio_headers(key: str, cache_status: str) -> Dict[str, str]:
+    """Build response headers for /tts audio."""
+    return {
+        "Content-Disposition": "inline; filename=speech.mp3",
+        "Cache-Control": "no-cache",
+        "X-Audio-URL": f"{router.prefix}/audio/{key}",
+        "X-TTS-Cache": cache_status
+    }
+
+
+async def _stream_and_cache(
+    first_chunk: bytes,
+    rest: AsyncIterator[bytes],
+    writer: AudioCacheWriter
+) -> AsyncIterator[bytes]:
+    """Yield the audio stream while writing it to the cache; keep it only if complete."""
+    completed = False
+    try:
+        writer.write(first_chunk)
+        yield first_chunk
+        async for chunk in rest:
+            writer.write(chunk)
+            yield chunk
+        completed = True
+    
+    finally:
+        if not completed:
+            writer.abort()
+    
+    # Publishing rescans the shared cache directory, so keep it off the loop
+    await asyncio.to_thread(writer.commit)
\ No newline at end of file
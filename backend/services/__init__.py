@@ -1,7 +1,24 @@
-"""Business logic services."""
+"""Business logic services.
 
-from .rss_service import RSSService
-from .gemini_service import GeminiService
-from .tts_service import TTSService
+Services are imported on first access (``from services import GeminiService``
+loads only the Gemini service), so importing the package stays cheap.
+"""
 
-__all__ = ['RSSService', 'GeminiService', 'TTSService']
\ No newline at end of file
+import importlib
+
+_SERVICE_MODULES = {
+    'PostStore': 'post_store',
+    'RSSService': 'rss_service',
+    'GeminiService': 'gemini_service',
+    'TTSService': 'tts_service',
+    'SnapshotService': 'post_snapshot',
+}
+
+__all__ = ['PostStore', 'RSSService', 'GeminiService', 'TTSService', 'SnapshotService']
+
+
+def __getattr__(name: str):
+    module = _SERVICE_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
\ No newline at end of file
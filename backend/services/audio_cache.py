@@ -0,0 +1,199 @@
+"""
+Content-addressed on-disk cache for synthesized speech.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCacheWriter:
+    """Streams one audio file into the cache, publishing it only when complete."""
+    
+    def __init__(self, cache: 'AudioCache', key: str):
+        self._cache = cache
+        self._key = key
+        self._tmp_path = cache.directory / f"{key}.{uuid.uuid4().hex}.tmp"
+        self._file = open(self._tmp_path, "wb")
+    
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk of audio."""
+        self._file.write(chunk)
+    
+    def commit(self) -> None:
+        """
+        Publish the finished file under its key.
+        
+        Blocking (it rescans the cache directory); call it off the event loop.
+        """
+        self._file.close()
+        os.replace(self._tmp_path, self._cache.path(self._key))
+        self._cache._add(self._key)
+    
+    def abort(self) -> None:
+        """Discard a partial file (e.g. the client disconnected mid-stream)."""
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class AudioCache:
+    """
+    Disk cache of MP3 files keyed by a hash of everything that affects the audio.
+    
+    Keys cover the cleaned text, voice, TTS model and output format, so
+    identical requests map to the same file. The total size is capped
+    at TTS_CACHE_MAX_BYTES with least-recently-used eviction; file mtimes
+    record recency so the order survives restarts. Worker processes share
+    the directory, so audio synthesized by one is served by all of them;
+    the cap is enforced against what is actually on disk, so it holds
+    for the directory as a whole however many workers write to it.
+    """
+    
+    _instance: Optional['AudioCache'] = None
+    _index: Optional['OrderedDict[str, int]'] = None
+    
+    def __new__(cls):
+        """Singleton pattern to share one index per process."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Create the cache directory and load the index (only once)."""
+        if self._index is None:
+            self.directory = Path(settings.TTS_CACHE_DIR)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.max_bytes = settings.TTS_CACHE_MAX_BYTES
+            self._lock = threading.Lock()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.adopted = 0
+            self.total_bytes = 0
+            
+            # Partial files left behind by interrupted writes are never valid
+            for tmp_path in self.directory.glob("*.tmp"):
+                if time.time() - tmp_path.stat().st_mtime > 3600:
+                    tmp_path.unlink(missing_ok=True)
+            
+            self._index, self.total_bytes = self._scan()
+    
+    @staticmethod
+    def make_key(clean_text: str, voice_id: str) -> str:
+        """
+        Build the cache key for a synthesis request.
+        
+        Args:
+            clean_text: Text after markdown stripping
+            voice_id: ElevenLabs voice ID
+        
+        Returns:
+            Hex SHA-256 digest identifying the audio
+        """
+        material = json.dumps(
+            [clean_text, voice_id, settings.TTS_MODEL, settings.TTS_OUTPUT_FORMAT]
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def is_valid_key(key: str) -> bool:
+        """Check that a key looks like one make_key produced."""
+        return len(key) == 64 and all(c in "0123456789abcdef" for c in key)
+    
+    def path(self, key: str) -> Path:
+        """Get the file path for a key."""
+        return self.directory / f"{key}.mp3"
+    
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Look up cached audio, marking it as recently used.
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            Path to the MP3 file, or None if it isn't cached
+        """
+        path = self.path(key)
+        with self._lock:
+            try:
+                size = path.stat().st_size
+            except OSError:
+                size = None
+            if size is None:
+                self.total_bytes -= self._index.pop(key, 0)
+                self.misses += 1
+                return None
+            if key not in self._index:
+                # Written by another worker process sharing the directory
+                self._index[key] = size
+                self.total_bytes += size
+                self.adopted += 1
+            self._index.move_to_end(key)
+            self.hits += 1
+        
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+    
+    def writer(self, key: str) -> AudioCacheWriter:
+        """Start writing audio for a key."""
+        return AudioCacheWriter(self, key)
+    
+    def stats(self) -> Dict:
+        """Get cache size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "adopted": self.adopted,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+    
+    def _add(self, key: str) -> None:
+        """Register a committed file and evict old ones over the size cap."""
+        with self._lock:
+            # Other workers add and evict files too, so size the cache from disk
+            self._index, self.total_bytes = self._scan()
+            if key in self._index:
+                self._index.move_to_end(key)
+            
+            while self.total_bytes > self.max_bytes and len(self._index) > 1:
+                old_key, old_size = self._index.popitem(last=False)
+                self.total_bytes -= old_size
+                self.evictions += 1
+                try:
+                    self.path(old_key).unlink(missing_ok=True)
+                except OSError as e:
+                    logger.warning(f"Could not evict cached audio {old_key}: {e}")
+    
+    def _scan(self) -> Tuple['OrderedDict[str, int]', int]:
+        """Read every cached file's size, least recently used first."""
+        files = []
+        for path in self.directory.glob("*.mp3"):
+            try:
+                stat = path.stat()
+            except OSError:
+                # Evicted by another worker since the listing
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        files.sort()
+        
+        index = OrderedDict((key, size) for _, key, size in files)
+        return index, sum(index.values())
@@ -0,0 +1,189 @@
+"""
+Cache of chat answers keyed by normalized question and posts snapshot.
+"""
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from config.settings import settings
+from models.post import Post
+from .shared_cache import SharedCache
+
+
+class ChatCache:
+    """
+    LRU cache of Gemini answers with a TTL.
+    
+    Keys combine the normalized question with a fingerprint of the posts
+    that would go into the prompt, so an answer is only reused against
+    the same context. Entries are only dropped by the LRU, the TTL, or
+    when the post store moves on and SnapshotService calls retain() with
+    the post sets still in use; storing an answer for some other post set
+    (a pinned snapshot, or posts uploaded by an older client) leaves the
+    rest of the cache alone.
+    
+    With SHARED_CACHE_ENABLED, answers are also written to the SharedCache
+    that every worker process reads, so a question answered by one
+    worker isn't sent to Gemini again by another.
+    """
+    
+    _instance: Optional['ChatCache'] = None
+    _entries: Optional['OrderedDict[Tuple[str, str], Tuple[float, str]]'] = None
+    
+    def __new__(cls):
+        """Singleton pattern to share one cache per process."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Initialize the cache (only once)."""
+        if self._entries is None:
+            self.ttl = settings.CHAT_CACHE_TTL
+            self.max_entries = settings.CHAT_CACHE_MAX_ENTRIES
+            self._lock = threading.Lock()
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+            self.evictions = 0
+            self.invalidations = 0
+            self.shared_hits = 0
+            self._shared = SharedCache() if settings.SHARED_CACHE_ENABLED else None
+            self._entries = OrderedDict()
+    
+    @staticmethod
+    def normalize_message(message: str) -> str:
+        """
+        Normalize a question so trivially different phrasings share a key.
+        
+        Lowercases, folds unicode, drops punctuation and collapses whitespace.
+        """
+        text = unicodedata.normalize("NFKC", message).casefold()
+        text = re.sub(r"[^\w\s]", " ", text)
+        return " ".join(text.split())
+    
+    @staticmethod
+    def posts_fingerprint(posts: List[Post]) -> str:
+        """
+        Fingerprint the candidate posts for the prompt context.
+        
+        Args:
+            posts: Posts the prompt's context is selected from
+        
+        Returns:
+            Hex digest that changes whenever the candidate posts change
+        """
+        digest = hashlib.sha256()
+        for post in posts:
+            for field in (post.id, post.link, post.account, post.title):
+                digest.update(field.encode("utf-8"))
+                digest.update(b"\x1f")
+            digest.update(b"\x1e")
+        return digest.hexdigest()
+    
+    def get(self, message: str, fingerprint: str) -> Optional[str]:
+        """
+        Look up a cached answer.
+        
+        Args:
+            message: User's message (normalized internally)
+            fingerprint: Fingerprint of the posts context
+        
+        Returns:
+            Cached answer, or None on a miss
+        """
+        key = (self.normalize_message(message), fingerprint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] >= self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        
+        answer = self._get_shared(key)
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+                return None
+            self._store(key, answer)
+            self.hits += 1
+            self.shared_hits += 1
+            return answer
+    
+    def put(self, message: str, fingerprint: str, answer: str) -> None:
+        """
+        Store an answer.
+        
+        Args:
+            message: User's message (normalized internally)
+            fingerprint: Fingerprint of the posts context
+            answer: Generated answer
+        """
+        key = (self.normalize_message(message), fingerprint)
+        with self._lock:
+            self._store(key, answer)
+        
+        if self._shared is not None:
+            self._shared.put(
+                "chat", self._shared_key(key), answer.encode("utf-8"),
+                ttl=self.ttl, tag=fingerprint, max_entries=self.max_entries
+            )
+    
+    def retain(self, fingerprints: Set[str]) -> None:
+        """
+        Drop answers for every post set except the given ones.
+        
+        Args:
+            fingerprints: Fingerprints of the post sets still in use
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[1] not in fingerprints]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        
+        if self._shared is not None:
+            self._shared.invalidate_except("chat", *fingerprints)
+    
+    def stats(self) -> Dict:
+        """Get cache size and hit-rate counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "shared_hits": self.shared_hits,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+    
+    def _store(self, key: Tuple[str, str], answer: str) -> None:
+        """Add an entry to the in-process LRU (lock held)."""
+        self._entries[key] = (time.monotonic(), answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def _get_shared(self, key: Tuple[str, str]) -> Optional[str]:
+        """Look an entry up in the cross-process cache, if enabled."""
+        if self._shared is None:
+            return None
+        value = self._shared.get("chat", self._shared_key(key))
+        return value.decode("utf-8") if value is not None else None
+    
+    @staticmethod
+    def _shared_key(key: Tuple[str, str]) -> str:
+        """Flatten a (message, fingerprint) key for the shared cache."""
+        return f"{key[1]}:{key[0]}"
+
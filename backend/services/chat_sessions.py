@@ -0,0 +1,220 @@
+"""
+Server-side chat sessions with a bounded, summarized history.
+"""
+
+import json
+import re
+import secrets
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config.settings import settings
+from .prompt_builder import PromptBuilder
+from .shared_cache import SharedCache
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)", re.S)
+
+
+class ChatSession:
+    """
+    One conversation: a short summary of older turns plus the recent ones.
+    
+    Turns are (question, answer) pairs with answers cut to
+    CHAT_SESSION_ANSWER_CHARS, since the prompt only needs the gist.
+    """
+    
+    __slots__ = ("id", "summary", "turns", "summarized")
+    
+    def __init__(
+        self,
+        session_id: str,
+        summary: str = "",
+        turns: Optional[List[Tuple[str, str]]] = None,
+        summarized: int = 0
+    ):
+        self.id = session_id
+        self.summary = summary
+        self.turns = turns or []
+        self.summarized = summarized
+    
+    def history(self) -> str:
+        """
+        Format the conversation so far for the prompt.
+        
+        Returns:
+            History block, or "" for a new session
+        """
+        if not self.summary and not self.turns:
+            return ""
+        lines = ["Conversation so far:"]
+        if self.summary:
+            lines.append(f"Earlier in this conversation:\n{self.summary}")
+        for question, answer in self.turns:
+            lines.append(f"User: {question}\nAssistant: {answer}")
+        return "\n".join(lines) + "\n\n"
+    
+    def encode(self) -> bytes:
+        """Serialize compactly for the shared cache."""
+        payload = json.dumps(
+            [self.summary, self.turns, self.summarized], separators=(",", ":")
+        )
+        return zlib.compress(payload.encode("utf-8"))
+    
+    @classmethod
+    def decode(cls, session_id: str, data: bytes) -> 'ChatSession':
+        """Rebuild a session serialized with encode()."""
+        summary, turns, summarized = json.loads(zlib.decompress(data))
+        return cls(session_id, summary, [tuple(turn) for turn in turns], summarized)
+
+
+class ChatSessionStore:
+    """
+    Keeps chat sessions server-side so follow-up questions have context.
+    
+    Once a session's history passes CHAT_HISTORY_TOKEN_BUDGET, its oldest
+    turns are rolled into a summary of one line per turn (the question
+    and the first sentence of the answer), which is itself capped at
+    CHAT_SUMMARY_TOKEN_BUDGET by dropping its oldest lines. The history
+    sent with each question therefore stays roughly the same size however
+    long the conversation runs. Sessions idle for CHAT_SESSION_IDLE_TTL
+    are dropped. With SHARED_CACHE_ENABLED, sessions live in the shared
+    cache so any worker process can continue a conversation.
+    """
+    
+    _instance: Optional['ChatSessionStore'] = None
+    _sessions: Optional['OrderedDict[str, Tuple[float, bytes]]'] = None
+    
+    def __new__(cls):
+        """Singleton pattern to share sessions across requests."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Initialize session storage (only once)."""
+        if self._sessions is None:
+            self.idle_ttl = settings.CHAT_SESSION_IDLE_TTL
+            self.max_sessions = settings.CHAT_SESSION_MAX
+            self._lock = threading.Lock()
+            self._shared = SharedCache() if settings.SHARED_CACHE_ENABLED else None
+            self.created = 0
+            self.resumed = 0
+            self.expired = 0
+            self.turns = 0
+            self.summarized_turns = 0
+            self.history_tokens = 0
+            self.max_history_tokens = 0
+            self._sessions = OrderedDict()
+    
+    def get_or_create(self, session_id: Optional[str]) -> ChatSession:
+        """
+        Resume a session, or start a new one.
+        
+        Args:
+            session_id: Session id the client received (optional)
+        
+        Returns:
+            The stored session, or a new empty one with a fresh id if the
+            id is missing, malformed or has expired
+        """
+        if session_id and _SESSION_ID.match(session_id):
+            data = self._load(session_id)
+            if data is not None:
+                self.resumed += 1
+                return ChatSession.decode(session_id, data)
+            self.expired += 1
+        
+        self.created += 1
+        return ChatSession(secrets.token_urlsafe(16))
+    
+    def add_turn(self, session: ChatSession, question: str, answer: str) -> None:
+        """
+        Append a finished turn, summarizing older turns if over budget.
+        
+        Args:
+            session: Session the question was asked in
+            question: User's message
+            answer: Assistant's full answer
+        """
+        limit = settings.CHAT_SESSION_ANSWER_CHARS
+        if len(answer) > limit:
+            answer = answer[:limit].rstrip() + "…"
+        session.turns.append((question, answer))
+        
+        budget = settings.CHAT_HISTORY_TOKEN_BUDGET
+        while (
+            len(session.turns) > 1
+            and PromptBuilder.estimate_tokens(session.history()) > budget
+        ):
+            self._summarize_oldest(session)
+        
+        tokens = PromptBuilder.estimate_tokens(session.history())
+        self.turns += 1
+        self.history_tokens += tokens
+        self.max_history_tokens = max(self.max_history_tokens, tokens)
+        self._save(session)
+    
+    def stats(self) -> Dict:
+        """Get session counters and the history size sent per question."""
+        return {
+            "sessions": len(self._sessions) if self._shared is None else None,
+            "created": self.created,
+            "resumed": self.resumed,
+            "expired": self.expired,
+            "turns": self.turns,
+            "summarized_turns": self.summarized_turns,
+            "avg_history_tokens": self.history_tokens / self.turns if self.turns else 0.0,
+            "max_history_tokens": self.max_history_tokens,
+        }
+    
+    def _summarize_oldest(self, session: ChatSession) -> None:
+        """Fold the oldest verbatim turn into the session's summary."""
+        question, answer = session.turns.pop(0)
+        match = _FIRST_SENTENCE.match(answer)
+        gist = (match.group(1) if match else answer)[:160]
+        lines = session.summary.split("\n") if session.summary else []
+        lines.append(f"- User asked: {question[:160]} / Assistant: {gist}")
+        
+        budget = settings.CHAT_SUMMARY_TOKEN_BUDGET
+        while len(lines) > 1 and PromptBuilder.estimate_tokens("\n".join(lines)) > budget:
+            lines.pop(0)
+        session.summary = "\n".join(lines)
+        session.summarized += 1
+        self.summarized_turns += 1
+    
+    def _load(self, session_id: str) -> Optional[bytes]:
+        """Read a stored session, dropping idle ones."""
+        if self._shared is not None:
+            return self._shared.get("chat_session", session_id)
+        
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.idle_ttl:
+                del self._sessions[session_id]
+                return None
+            return entry[1]
+    
+    def _save(self, session: ChatSession) -> None:
+        """Store a session, evicting idle and least recently used ones."""
+        data = session.encode()
+        if self._shared is not None:
+            self._shared.put(
+                "chat_session", session.id, data,
+                ttl=self.idle_ttl, max_entries=self.max_sessions
+            )
+            return
+        
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session.id] = (now, data)
+            self._sessions.move_to_end(session.id)
+            while self._sessions:
+                oldest_id, (used_at, _) = next(iter(self._sessions.items()))
+                if len(self._sessions) <= self.max_sessions and now - used_at < self.idle_ttl:
+                    break
+                del self._sessions[oldest_id]
@@ -0,0 +1,283 @@
+"""
+Gemini context caching for the system prompt and the current posts block.
+"""
+
+import datetime
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from config.settings import settings
+from .metrics import GEMINI_FIRST_TEXT, GEMINI_INPUT_TOKENS
+from .shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+
+class CachedPrefix:
+    """
+    Posts block to serve from a Gemini cached prefix.
+    
+    The key is the posts snapshot's fingerprint, so the prefix is
+    uploaded again exactly when the posts change.
+    """
+    
+    __slots__ = ("key", "text")
+    
+    def __init__(self, key: str, text: str):
+        self.key = key
+        self.text = text
+
+
+class GeminiContextCache:
+    """
+    Registers the system prompt plus a posts block as a Gemini cached prefix.
+    
+    The prefix is created once per posts fingerprint and shared between
+    worker processes through the SharedCache, so each chat only sends the
+    question. Only the newest prefix is kept; the one it replaces is
+    deleted rather than left to bill storage until its TTL. Fingerprints
+    whose prefix can't be created (e.g. too small for the model's cache
+    minimum) fall back to the normal prompt until the posts change.
+    """
+    
+    _instance: Optional['GeminiContextCache'] = None
+    _models: Optional[Dict[str, Tuple[object, object, bool]]] = None
+    
+    # Prefixes this close to expiry are recreated rather than used
+    _REFRESH_MARGIN = 120
+    
+    def __new__(cls):
+        """Singleton pattern to share the cached prefix across requests."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Initialize prefix tracking (only once)."""
+        if self._models is None:
+            self._lock = threading.Lock()
+            self._shared = SharedCache() if settings.SHARED_CACHE_ENABLED else None
+            self._failed: Optional[str] = None
+            # Per-fingerprint locks so only one thread uploads a given prefix
+            self._creating: Dict[str, threading.Lock] = {}
+            self.creates = 0
+            self.create_errors = 0
+            self.reuses = 0
+            self.shared_reuses = 0
+            self.expired = 0
+            self._calls = {"used": [0, 0, 0, 0.0], "unused": [0, 0, 0, 0.0]}
+            self._models = {}
+    
+    @staticmethod
+    def enabled() -> bool:
+        """Whether context caching is switched on."""
+        return settings.GEMINI_CONTEXT_CACHE
+    
+    def usable(self, key: str, tokens: int) -> bool:
+        """
+        Check whether a posts block should be served from a cached prefix.
+        
+        Args:
+            key: Posts fingerprint
+            tokens: Estimated size of the posts block
+        
+        Returns:
+            True unless caching is off, the block is below the model's
+            caching minimum, or creating its prefix already failed
+        """
+        return (
+            self.enabled()
+            and tokens >= settings.GEMINI_CONTEXT_CACHE_MIN_TOKENS
+            and key != self._failed
+        )
+    
+    def model_for(self, prefix: CachedPrefix, generation_config: Dict):
+        """
+        Get a Gemini model bound to the cached prefix, creating it if needed.
+        
+        Blocking; runs in the Gemini upstream lane.
+        
+        Args:
+            prefix: Posts block and its fingerprint
+            generation_config: Generation parameters for the model
+        
+        Returns:
+            GenerativeModel using the cached prefix, or None to fall back
+            to sending the whole prompt
+        """
+        with self._lock:
+            model = self._current_model(prefix.key)
+            if model is not None or prefix.key == self._failed:
+                return model
+            creating = self._creating.setdefault(prefix.key, threading.Lock())
+        
+        # Create outside the main lock so a slow upload doesn't stall chats
+        # using other prefixes; concurrent chats for the same posts share it
+        with creating:
+            try:
+                with self._lock:
+                    model = self._current_model(prefix.key)
+                    if model is not None or prefix.key == self._failed:
+                        return model
+                return self._create(prefix, generation_config)
+            finally:
+                with self._lock:
+                    self._creating.pop(prefix.key, None)
+    
+    def invalidate(self, key: str) -> None:
+        """Forget a prefix Gemini no longer has (e.g. expired early)."""
+        with self._lock:
+            if self._models.pop(key, None) is not None:
+                self.expired += 1
+        if self._shared is not None:
+            self._shared.delete("gemini_context", key)
+    
+    def record_call(
+        self,
+        used: bool,
+        first_text: float,
+        prompt_tokens: int,
+        cached_tokens: int
+    ) -> None:
+        """
+        Record a Gemini call's input tokens and latency.
+        
+        Args:
+            used: Whether the call used a cached prefix
+            first_text: Seconds until the first text arrived
+            prompt_tokens: Total input tokens, including cached ones
+            cached_tokens: Input tokens served from the cached prefix
+        """
+        label = "used" if used else "unused"
+        GEMINI_INPUT_TOKENS.labels(label, "cached").inc(cached_tokens)
+        GEMINI_INPUT_TOKENS.labels(label, "uncached").inc(prompt_tokens - cached_tokens)
+        GEMINI_FIRST_TEXT.labels(label).observe(first_text)
+        
+        totals = self._calls[label]
+        totals[0] += 1
+        totals[1] += prompt_tokens - cached_tokens
+        totals[2] += cached_tokens
+        totals[3] += first_text
+    
+    def stats(self) -> Dict:
+        """Get prefix counters and per-call averages with and without the cache."""
+        calls = {}
+        for label, (count, uncached, cached, seconds) in self._calls.items():
+            calls[label] = {
+                "calls": count,
+                "avg_uncached_tokens": uncached / count if count else 0.0,
+                "avg_cached_tokens": cached / count if count else 0.0,
+                "avg_first_text_seconds": seconds / count if count else 0.0,
+            }
+        return {
+            "enabled": self.enabled(),
+            "model": settings.GEMINI_CONTEXT_CACHE_MODEL,
+            "prefixes": len(self._models),
+            "creates": self.creates,
+            "create_errors": self.create_errors,
+            "reuses": self.reuses,
+            "shared_reuses": self.shared_reuses,
+            "expired": self.expired,
+            "calls": calls,
+        }
+    
+    def _current_model(self, key: str):
+        """Get the model for a prefix that isn't about to expire (lock held)."""
+        entry = self._models.get(key)
+        if entry is not None and self._remaining(entry[1]) > self._REFRESH_MARGIN:
+            self.reuses += 1
+            return entry[0]
+        return None
+    
+    def _create(self, prefix: CachedPrefix, generation_config: Dict):
+        """Upload a prefix (or adopt another worker's) and make it the current one."""
+        import google.generativeai as genai
+        
+        try:
+            cached = self._shared_prefix(prefix.key)
+            if cached is not None:
+                self.shared_reuses += 1
+                owned = False
+            else:
+                cached = genai.caching.CachedContent.create(
+                    model=settings.GEMINI_CONTEXT_CACHE_MODEL,
+                    display_name=f"stillwater-{prefix.key[:16]}",
+                    system_instruction=settings.SYSTEM_PROMPT,
+                    contents=[prefix.text],
+                    ttl=datetime.timedelta(seconds=settings.GEMINI_CONTEXT_CACHE_TTL),
+                )
+                self.creates += 1
+                owned = True
+                self._share_prefix(prefix.key, cached)
+                logger.info(
+                    f"Created Gemini context cache {cached.name} "
+                    f"({cached.usage_metadata.total_token_count} tokens)"
+                )
+        except Exception as e:
+            self.create_errors += 1
+            self._failed = prefix.key
+            logger.warning(f"Gemini context caching unavailable, sending full prompts: {e}")
+            return None
+        
+        model = genai.GenerativeModel.from_cached_content(
+            cached, generation_config=generation_config
+        )
+        with self._lock:
+            replaced = self._replace(prefix.key, (model, cached, owned))
+        for old_cached in replaced:
+            try:
+                old_cached.delete()
+            except Exception as e:
+                logger.warning(f"Could not delete Gemini context cache: {e}")
+        return model
+    
+    @staticmethod
+    def _remaining(cached) -> float:
+        """Seconds until a cached prefix expires."""
+        return cached.expire_time.timestamp() - time.time()
+    
+    def _replace(self, key: str, entry: Tuple[object, object, bool]) -> List[object]:
+        """
+        Make a prefix the current one (lock held).
+        
+        Returns:
+            Prefixes this worker created that were replaced, for the
+            caller to delete once the lock is released
+        """
+        replaced = []
+        for old_key, (_, old_cached, owned) in list(self._models.items()):
+            if old_key == key:
+                continue
+            del self._models[old_key]
+            if owned:
+                replaced.append(old_cached)
+        self._models[key] = entry
+        return replaced
+    
+    def _shared_prefix(self, key: str):
+        """Get a prefix another worker already created for these posts."""
+        if self._shared is None:
+            return None
+        value = self._shared.get("gemini_context", key)
+        if value is None:
+            return None
+        
+        import google.generativeai as genai
+        
+        name, expires_at = json.loads(value)
+        if expires_at - time.time() <= self._REFRESH_MARGIN:
+            return None
+        return genai.caching.CachedContent.get(name)
+    
+    def _share_prefix(self, key: str, cached) -> None:
+        """Publish a new prefix for the other workers."""
+        if self._shared is None:
+            return
+        self._shared.put(
+            "gemini_context", key,
+            json.dumps([cached.name, cached.expire_time.timestamp()]).encode("utf-8"),
+            ttl=self._remaining(cached), tag=key
+        )
+        self._shared.invalidate_except("gemini_context", key)
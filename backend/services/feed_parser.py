@@ -0,0 +1,172 @@
+"""
+Incremental RSS 2.0 parser that stops once it has enough entries.
+"""
+
+import calendar
+import email.utils
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from models.post import Post
+
+
+class StreamingFeedParser:
+    """
+    Pull parser for the RSS 2.0 / media-RSS feeds rss.app serves.
+    
+    The document is fed to the XML parser in chunks and each <item> is
+    turned into a Post as soon as it closes, so parsing stops after the
+    first `limit` entries instead of building an object model of the
+    whole feed. Anything that isn't a well-formed RSS 2.0 document is
+    left to feedparser, which is far more forgiving.
+    """
+    
+    CHUNK_SIZE = 16 * 1024
+    
+    _MEDIA_NS = "search.yahoo.com/mrss"
+    _ITUNES_NS = "itunes.com/dtds/podcast"
+    
+    parsed = 0
+    fallbacks = 0
+    
+    @staticmethod
+    def parse(username: str, content: bytes, limit: int) -> Optional[List[Post]]:
+        """
+        Parse up to `limit` entries from an RSS document.
+        
+        Args:
+            username: Instagram account username the feed belongs to
+            content: Raw RSS document
+            limit: Maximum number of entries to parse
+        
+        Returns:
+            Posts in feed order, or None if the document needs feedparser
+        """
+        parser = ET.XMLPullParser(events=("start", "end"))
+        posts: List[Post] = []
+        depth = 0
+        in_channel = False
+        
+        try:
+            for offset in range(0, len(content), StreamingFeedParser.CHUNK_SIZE):
+                parser.feed(content[offset:offset + StreamingFeedParser.CHUNK_SIZE])
+                
+                for event, elem in parser.read_events():
+                    if event == "start":
+                        depth += 1
+                        if depth == 1 and elem.tag != "rss":
+                            StreamingFeedParser.fallbacks += 1
+                            return None
+                        if depth == 2 and elem.tag == "channel":
+                            in_channel = True
+                        continue
+                    
+                    depth -= 1
+                    if in_channel and depth == 2 and elem.tag == "item":
+                        posts.append(StreamingFeedParser._to_post(username, elem))
+                        elem.clear()
+                        if len(posts) >= limit:
+                            StreamingFeedParser.parsed += 1
+                            return posts
+            parser.close()
+        except ET.ParseError:
+            StreamingFeedParser.fallbacks += 1
+            return None
+        
+        if not in_channel:
+            StreamingFeedParser.fallbacks += 1
+            return None
+        
+        StreamingFeedParser.parsed += 1
+        return posts
+    
+    @staticmethod
+    def stats() -> Dict:
+        """Get counts of streamed parses and feedparser fallbacks."""
+        return {
+            "parsed": StreamingFeedParser.parsed,
+            "fallbacks": StreamingFeedParser.fallbacks,
+        }
+    
+    @staticmethod
+    def _to_post(username: str, item: ET.Element) -> Post:
+        """Build a Post from a closed <item> element."""
+        title = ""
+        link = ""
+        guid = ""
+        guid_is_link = True
+        pub_date = None
+        media_content = None
+        media_thumbnail = None
+        itunes_image = None
+        
+        for child in item:
+            tag = child.tag
+            if tag == "title":
+                title = (child.text or "").strip()
+            elif tag == "link":
+                link = (child.text or "").strip()
+            elif tag == "guid":
+                guid = (child.text or "").strip()
+                guid_is_link = child.get("isPermaLink", "true").lower() != "false"
+            elif tag == "pubDate":
+                pub_date = (child.text or "").strip()
+            elif StreamingFeedParser._MEDIA_NS in tag:
+                media_content, media_thumbnail = StreamingFeedParser._media(
+                    child, media_content, media_thumbnail
+                )
+            elif tag.endswith("}image") and StreamingFeedParser._ITUNES_NS in tag:
+                itunes_image = itunes_image or child.get("href", "")
+        
+        # Same rules as feedparser: a permalink guid stands in for a missing link
+        if not link and guid and guid_is_link:
+            link = guid
+        
+        if media_content is not None:
+            image = media_content
+        elif media_thumbnail is not None:
+            image = media_thumbnail
+        else:
+            image = itunes_image or ""
+        
+        timestamp, published = StreamingFeedParser._published(pub_date)
+        return Post(
+            id=guid or link,
+            title=title,
+            link=link,
+            image=image,
+            published=published,
+            account=username,
+            timestamp=timestamp,
+        )
+    
+    @staticmethod
+    def _media(
+        elem: ET.Element,
+        content: Optional[str],
+        thumbnail: Optional[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Record the first media:content / media:thumbnail URLs, including inside media:group."""
+        local = elem.tag.rsplit("}", 1)[-1]
+        if local == "group":
+            for child in elem:
+                content, thumbnail = StreamingFeedParser._media(child, content, thumbnail)
+        elif local == "content" and content is None:
+            content = elem.get("url", "")
+        elif local == "thumbnail" and thumbnail is None:
+            thumbnail = elem.get("url", "")
+        return content, thumbnail
+    
+    @staticmethod
+    def _published(pub_date: Optional[str]) -> Tuple[float, str]:
+        """Convert an RFC 822 pubDate to (UTC timestamp, ISO 8601 string)."""
+        if pub_date is None:
+            return 0.0, ""
+        
+        parsed = email.utils.parsedate_tz(pub_date)
+        if parsed is None or parsed[9] is None:
+            # Unparseable (or zoneless) dates are passed through, as feedparser does
+            return 0.0, pub_date
+        
+        timestamp = float(calendar.timegm(parsed[:9]) - parsed[9])
+        return timestamp, datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
@@ -2,9 +2,13 @@
 Service for Gemini AI chat functionality.
 """
 
-import google.generativeai as genai
-from typing import List, Dict, Optional
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from config.settings import settings
+from models.post import Post
+from .context_cache import CachedPrefix, GeminiContextCache
+from .prompt_builder import PromptBuilder
+from .upstream import get_upstream
 
 
 class GeminiService:
@@ -23,42 +27,45 @@ class GeminiService:
         """Initialize Gemini model (only once)."""
         if self._model is None:
             settings.validate()
-            genai.configure(api_key=settings.GEMINI_API_KEY)
+            # Imported on first use: the SDK is the slowest part of a cold start
+            import google.generativeai as genai
+            
+            if settings.GEMINI_API_ENDPOINT:
+                # Custom endpoints (e.g. a local stand-in) are only reachable over REST
+                genai.configure(
+                    api_key=settings.GEMINI_API_KEY,
+                    transport="rest",
+                    client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT}
+                )
+            else:
+                genai.configure(api_key=settings.GEMINI_API_KEY)
             self._model = genai.GenerativeModel(settings.GEMINI_MODEL)
     
     @staticmethod
-    def build_posts_context(posts: List[Dict]) -> str:
+    def build_posts_context(posts: List[Post]) -> str:
         """
         Build context string from posts data.
         
+        Posts beyond the prompt's token budget are trimmed or left out
+        (see PromptBuilder).
+        
         Args:
             posts: List of post dictionaries
             
         Returns:
             Formatted context string for the AI
         """
-        if not posts:
-            return ""
-        
-        context = "\n\nRecent Stillwater Instagram posts:\n"
-        max_posts = settings.MAX_POSTS_FOR_CONTEXT
-        
-        for i, post in enumerate(posts[:max_posts], 1):
-            title = post.get('title', 'Untitled')
-            account = post.get('account', 'Unknown')
-            snippet = post.get('contentSnippet', title)
-            context += f"{i}. From @{account}: {title}\n   {snippet}\n"
-        
-        return context
+        return PromptBuilder().build(posts[:settings.MAX_POSTS_FOR_CONTEXT]).text
     
     @staticmethod
-    def build_prompt(user_message: str, posts_context: str) -> str:
+    def build_prompt(user_message: str, posts_context: str, history: str = "") -> str:
         """
         Build complete prompt for Gemini.
         
         Args:
             user_message: User's question
             posts_context: Context from recent posts
+            history: Earlier turns of the chat session (optional)
             
         Returns:
             Complete prompt string
@@ -67,47 +74,241 @@ class GeminiService:
 
 {posts_context}
 
-User question: {user_message}
+{GeminiService.build_question(user_message, history)}"""
+    
+    @staticmethod
+    def build_question(user_message: str, history: str = "") -> str:
+        """
+        Build the part of the prompt that follows the posts context.
+        
+        This is all that is sent when the system prompt and posts are
+        served from a cached prefix.
+        
+        Args:
+            user_message: User's question
+            history: Earlier turns of the chat session (optional)
+            
+        Returns:
+            Conversation history, question and answering instructions
+        """
+        return f"""{history}User question: {user_message}
 
 Please provide a helpful response based on the available information. If the information isn't in the recent posts, let the user know and offer general suggestions about how they might find what they're looking for."""
     
-    def generate_response(self, message: str, posts: List[Dict] = None) -> str:
+    def generate_response(
+        self,
+        message: str,
+        posts: List[Post] = None,
+        posts_context: Optional[str] = None,
+        prefix: Optional[CachedPrefix] = None,
+        history: str = ""
+    ) -> str:
         """
         Generate AI response to user message.
         
         Args:
             message: User's message
             posts: Optional list of posts for context
+            posts_context: Optional preformatted context, used instead of posts
+            prefix: Optional posts block to serve from a Gemini cached
+                prefix; posts_context is sent instead if the cache fails
+            history: Earlier turns of the chat session (optional)
+            
+        Returns:
+            AI-generated response string
+            
+        Raises:
+            Exception: If generation fails
+        """
+        if posts_context is None:
+            posts_context = self.build_posts_context(posts or [])
+        
+        model, prompt = self._model_and_prompt(message, posts_context, prefix, history)
+        cached = model is not self._model
+        
+        # Generate response
+        started = time.perf_counter()
+        try:
+            response = model.generate_content(
+                prompt,
+                generation_config=self._generation_config()
+            )
+        except Exception as e:
+            if not cached or not self._is_missing_cache(e):
+                raise
+            GeminiContextCache().invalidate(prefix.key)
+            return self.generate_response(message, posts, posts_context, None, history)
+        
+        self._record_usage(response, cached, time.perf_counter() - started, prompt)
+        
+        # Extract and return text
+        return self._extract_response_text(response)
+    
+    async def generate_response_async(
+        self,
+        message: str,
+        posts: List[Post] = None,
+        posts_context: Optional[str] = None,
+        prefix: Optional[CachedPrefix] = None,
+        history: str = ""
+    ) -> str:
+        """
+        Generate AI response without blocking the event loop.
+        
+        Runs generate_response in the Gemini upstream's thread pool,
+        under its concurrency limit and timeout.
+        
+        Args:
+            message: User's message
+            posts: Optional list of posts for context
+            posts_context: Optional preformatted context, used instead of posts
+            prefix: Optional posts block to serve from a Gemini cached prefix
+            history: Earlier turns of the chat session (optional)
             
         Returns:
             AI-generated response string
             
+        Raises:
+            UpstreamTimeoutError: If Gemini doesn't answer in time
+            Exception: If generation fails
+        """
+        return await get_upstream("gemini").run(
+            self.generate_response, message, posts, posts_context, prefix, history,
+            target=settings.GEMINI_MODEL
+        )
+    
+    def stream_response(
+        self,
+        message: str,
+        posts: List[Post] = None,
+        posts_context: Optional[str] = None,
+        prefix: Optional[CachedPrefix] = None,
+        history: str = ""
+    ) -> Iterator[str]:
+        """
+        Generate AI response as a stream of text chunks.
+        
+        Args:
+            message: User's message
+            posts: Optional list of posts for context
+            posts_context: Optional preformatted context, used instead of posts
+            prefix: Optional posts block to serve from a Gemini cached
+                prefix; posts_context is sent instead if the cache fails
+            history: Earlier turns of the chat session (optional)
+            
+        Yields:
+            Text chunks in the order Gemini produces them
+            
         Raises:
             Exception: If generation fails
         """
-        if posts is None:
-            posts = []
+        if posts_context is None:
+            posts_context = self.build_posts_context(posts or [])
         
-        # Build context and prompt
-        posts_context = self.build_posts_context(posts)
-        full_prompt = self.build_prompt(message, posts_context)
+        model, prompt = self._model_and_prompt(message, posts_context, prefix, history)
+        cached = model is not self._model
+        
+        started = time.perf_counter()
+        first_text = None
+        last = None
+        try:
+            response = model.generate_content(
+                prompt,
+                generation_config=self._generation_config(),
+                stream=True
+            )
+            
+            for chunk in response:
+                last = chunk
+                # Chunks without text parts (e.g. safety metadata) have nothing to send
+                if chunk.candidates and chunk.candidates[0].content.parts:
+                    if first_text is None:
+                        first_text = time.perf_counter() - started
+                    yield chunk.text
+        except Exception as e:
+            if first_text is not None or not cached or not self._is_missing_cache(e):
+                raise
+            GeminiContextCache().invalidate(prefix.key)
+            yield from self.stream_response(message, posts, posts_context, None, history)
+            return
+        
+        if last is not None:
+            self._record_usage(last, cached, first_text or time.perf_counter() - started, prompt)
+    
+    async def stream_response_async(
+        self,
+        message: str,
+        posts: List[Post] = None,
+        posts_context: Optional[str] = None,
+        prefix: Optional[CachedPrefix] = None,
+        history: str = ""
+    ) -> AsyncIterator[str]:
+        """
+        Stream AI response chunks without blocking the event loop.
+        
+        Holds one Gemini upstream slot for the whole stream; each chunk
+        is awaited with the upstream's timeout.
+        
+        Args:
+            message: User's message
+            posts: Optional list of posts for context
+            posts_context: Optional preformatted context, used instead of posts
+            prefix: Optional posts block to serve from a Gemini cached prefix
+            history: Earlier turns of the chat session (optional)
+            
+        Yields:
+            Text chunks in the order Gemini produces them
+            
+        Raises:
+            UpstreamTimeoutError: If Gemini stalls between chunks
+            Exception: If generation fails
+        """
+        async for chunk in get_upstream("gemini").iterate(
+            self.stream_response, message, posts, posts_context, prefix, history,
+            target=settings.GEMINI_MODEL
+        ):
+            yield chunk
+    
+    def _model_and_prompt(
+        self,
+        message: str,
+        posts_context: str,
+        prefix: Optional[CachedPrefix],
+        history: str
+    ) -> Tuple[object, str]:
+        """Pick the model and prompt, preferring the cached prefix when there is one."""
+        if prefix is not None:
+            model = GeminiContextCache().model_for(prefix, self._generation_config())
+            if model is not None:
+                return model, self.build_question(message, history)
+        return self._model, self.build_prompt(message, posts_context, history)
+    
+    @staticmethod
+    def _is_missing_cache(error: Exception) -> bool:
+        """Check for Gemini no longer having a cached prefix (expired or deleted)."""
+        from google.api_core import exceptions
         
-        # Configure generation parameters
-        generation_config = {
+        return isinstance(error, (exceptions.NotFound, exceptions.PermissionDenied))
+    
+    @staticmethod
+    def _record_usage(response, cached: bool, first_text: float, prompt: str) -> None:
+        """Record a call's input tokens, from Gemini's usage report when it has one."""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0)
+        cached_tokens = getattr(usage, "cached_content_token_count", 0)
+        if not prompt_tokens:
+            prompt_tokens = PromptBuilder.estimate_tokens(prompt)
+        GeminiContextCache().record_call(cached, first_text, prompt_tokens, cached_tokens)
+    
+    @staticmethod
+    def _generation_config() -> Dict:
+        """Build Gemini generation parameters from settings."""
+        return {
             "temperature": settings.GEMINI_TEMPERATURE,
             "top_p": settings.GEMINI_TOP_P,
             "top_k": settings.GEMINI_TOP_K,
             "max_output_tokens": settings.GEMINI_MAX_TOKENS,
         }
-        
-        # Generate response
-        response = self._model.generate_content(
-            full_prompt,
-            generation_config=generation_config
-        )
-        
-        # Extract and return text
-        return self._extract_response_text(response)
     
     @staticmethod
     def _extract_response_text(response) -> str:
@@ -0,0 +1,79 @@
+"""
+File-lock based leader election between worker processes.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """
+    Exclusive, non-blocking lock on a file shared by every worker.
+    
+    The worker holding the lock is the leader. The operating system
+    releases the lock when the holder exits or crashes, so another
+    worker's next try_acquire() takes over without any cleanup.
+    """
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+    
+    @property
+    def held(self) -> bool:
+        """Whether this process currently holds the lock."""
+        return self._fd is not None
+    
+    def try_acquire(self) -> bool:
+        """
+        Take the lock if no other process holds it.
+        
+        Returns:
+            True if this process now holds the lock
+        """
+        if self._fd is not None:
+            return True
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        
+        # Record the holder for anyone inspecting the lock file
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        self._fd = fd
+        logger.info(f"Acquired leader lock {self.path} (pid {os.getpid()})")
+        return True
+    
+    def release(self) -> None:
+        """Give up the lock (closing the file releases it)."""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        except OSError as e:
+            logger.warning(f"Could not unlock {self.path}: {e}")
+        finally:
+            os.close(self._fd)
+            self._fd = None
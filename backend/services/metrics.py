@@ -0,0 +1,134 @@
+"""
+Prometheus metrics for API requests and upstream calls.
+"""
+
+import threading
+from typing import Dict, Set
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+# Seconds; spans cached responses (a few ms) to slow Gemini answers
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upstream targets (voice IDs come from clients) beyond this are labelled "other"
+MAX_TARGETS_PER_UPSTREAM = 32
+
+REGISTRY = CollectorRegistry()
+
+HTTP_REQUEST_DURATION = Histogram(
+    "stillwater_http_request_duration_seconds",
+    "Time to serve an API request, until the last byte of the response.",
+    ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "stillwater_http_requests_in_flight",
+    "API requests currently being served.",
+    ("method", "route"),
+    registry=REGISTRY,
+)
+
+UPSTREAM_CALL_DURATION = Histogram(
+    "stillwater_upstream_call_duration_seconds",
+    "Duration of calls to rss.app, Gemini and ElevenLabs, excluding queueing.",
+    ("upstream", "target", "outcome"),
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+UPSTREAM_ERRORS = Counter(
+    "stillwater_upstream_errors_total",
+    "Failed upstream calls by kind (timeout, exception or HTTP status class).",
+    ("upstream", "target", "kind"),
+    registry=REGISTRY,
+)
+
+UPSTREAM_QUEUE_WAIT = Histogram(
+    "stillwater_upstream_queue_wait_seconds",
+    "Time calls waited for a free upstream slot.",
+    ("upstream",),
+    buckets=(0.001,) + LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+UPSTREAM_REJECTED = Counter(
+    "stillwater_upstream_rejected_total",
+    "Calls shed because the upstream queue was full or the wait deadline passed.",
+    ("upstream", "reason"),
+    registry=REGISTRY,
+)
+
+RATE_LIMITED = Counter(
+    "stillwater_rate_limited_total",
+    "Requests rejected by per-client rate limits.",
+    ("limit",),
+    registry=REGISTRY,
+)
+
+GEMINI_INPUT_TOKENS = Counter(
+    "stillwater_gemini_input_tokens_total",
+    "Gemini input tokens, split into cached-prefix and freshly sent tokens.",
+    ("context_cache", "kind"),
+    registry=REGISTRY,
+)
+
+GEMINI_FIRST_TEXT = Histogram(
+    "stillwater_gemini_first_text_seconds",
+    "Time from sending a Gemini request to its first text (whole answer when not streamed).",
+    ("context_cache",),
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+_targets: Dict[str, Set[str]] = {}
+_targets_lock = threading.Lock()
+
+
+def target_label(upstream: str, target: str) -> str:
+    """
+    Bound the number of distinct target labels per upstream.
+    
+    Args:
+        upstream: Upstream name ("rss", "gemini" or "tts")
+        target: Feed username, model name or voice ID
+    
+    Returns:
+        The target, or "other" once the upstream has too many
+    """
+    with _targets_lock:
+        seen = _targets.setdefault(upstream, set())
+        if target in seen:
+            return target
+        if len(seen) >= MAX_TARGETS_PER_UPSTREAM:
+            return "other"
+        seen.add(target)
+        return target
+
+
+def observe_upstream_call(upstream: str, target: str, outcome: str, seconds: float) -> None:
+    """
+    Record one upstream call.
+    
+    Args:
+        upstream: Upstream name
+        target: Feed username, model name or voice ID
+        outcome: "ok", "error", "timeout" or "cancelled"
+        seconds: Time from getting a slot to the call finishing
+    """
+    target = target_label(upstream, target)
+    UPSTREAM_CALL_DURATION.labels(upstream, target, outcome).observe(seconds)
+    if outcome in ("error", "timeout"):
+        UPSTREAM_ERRORS.labels(upstream, target, "exception" if outcome == "error" else outcome).inc()
+
+
+def record_upstream_error(upstream: str, target: str, kind: str) -> None:
+    """
+    Count an upstream failure that didn't raise, such as an HTTP error status.
+    
+    Args:
+        upstream: Upstream name
+        target: Feed username, model name or voice ID
+        kind: Error kind (e.g. "http_5xx")
+    """
+    UPSTREAM_ERRORS.labels(upstream, target_label(upstream, target), kind).inc()
@@ -0,0 +1,249 @@
+"""
+Live push of newly ingested posts to Server-Sent Event subscribers.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+from config.settings import settings
+from models.post import Post
+from utils.fast_json import dumps
+from utils.feed_cursor import encode_cursor
+from .post_store import PostStore
+from .rss_service import RSSService
+
+logger = logging.getLogger(__name__)
+
+_HEARTBEAT = b": ping\n\n"
+_RETRY = b"retry: 5000\n\n"
+
+
+class PostSubscription:
+    """
+    One /posts/stream client: a bounded queue of encoded events.
+    
+    Posts up to `until` (the broadcaster's position when the client
+    subscribed) are replayed from `since`; everything after arrives on
+    the queue. A None on the queue ends the stream.
+    """
+    
+    __slots__ = ("queue", "since", "until", "expires_at")
+    
+    def __init__(self, since: int, until: int):
+        self.queue: asyncio.Queue = asyncio.Queue(settings.POSTS_STREAM_CLIENT_BUFFER)
+        self.since = since
+        self.until = until
+        self.expires_at = time.monotonic() + settings.POSTS_STREAM_MAX_AGE
+
+
+class PostBroadcaster:
+    """
+    Fans newly ingested posts out to every /posts/stream subscriber.
+    
+    One background task per worker polls the post store for posts past
+    the last ingest sequence number it has seen, encodes them once as an
+    SSE event and hands the same bytes to every subscriber, so the cost
+    of a new post doesn't grow with the number of clients beyond one
+    queue put each. The same task sends the heartbeats, so idle
+    subscribers hold nothing but a small queue; the task only runs while
+    someone is subscribed.
+    
+    Recent events are kept in a ring buffer so reconnecting clients
+    (Last-Event-ID) are caught up from memory; older positions are read
+    back from the store. Clients whose buffer fills up are disconnected
+    rather than slowing the others down, and resume on reconnect.
+    Streams also end after POSTS_STREAM_MAX_AGE, since uvicorn waits for
+    open responses before shutting down; clients resume the same way.
+    """
+    
+    _instance: Optional['PostBroadcaster'] = None
+    _subscribers: Optional[Set[PostSubscription]] = None
+    
+    def __new__(cls):
+        """Singleton pattern to share one broadcast among all subscribers."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Initialize the subscriber set and replay buffer (only once)."""
+        if self._subscribers is None:
+            self._task: Optional[asyncio.Task] = None
+            self._seq = 0
+            # (first seq exclusive, last seq inclusive, encoded event)
+            self._ring: Deque[Tuple[int, int, bytes]] = deque(
+                maxlen=settings.POSTS_STREAM_REPLAY_EVENTS
+            )
+            self.published = 0
+            self.posts = 0
+            self.heartbeats = 0
+            self.dropped = 0
+            self.buffer_resumes = 0
+            self.store_resumes = 0
+            self._subscribers = set()
+    
+    @property
+    def full(self) -> bool:
+        """Whether the subscriber limit has been reached."""
+        return len(self._subscribers) >= settings.POSTS_STREAM_MAX_SUBSCRIBERS
+    
+    def subscribe(self, since: Optional[int] = None) -> PostSubscription:
+        """
+        Register a subscriber, starting the broadcast if it isn't running.
+        
+        Args:
+            since: Ingest sequence number the client has already seen,
+                or None for only posts ingested from now on
+        
+        Returns:
+            Subscription to pass to events()
+        """
+        if self._task is None:
+            # Events in the ring would no longer be contiguous with new ones
+            self._ring.clear()
+            self._seq = PostStore().latest_seq
+            self._task = asyncio.create_task(self._run())
+        
+        subscription = PostSubscription(self._seq if since is None else since, self._seq)
+        self._subscribers.add(subscription)
+        return subscription
+    
+    async def events(self, subscription: PostSubscription) -> AsyncIterator[bytes]:
+        """
+        Stream a subscriber's missed events, then live ones.
+        
+        Args:
+            subscription: Subscription from subscribe()
+        
+        Yields:
+            Encoded SSE events and heartbeat comments
+        """
+        try:
+            yield _RETRY
+            async for payload in self._replay(subscription.since, subscription.until):
+                yield payload
+            while True:
+                payload = await subscription.queue.get()
+                if payload is None:
+                    return
+                yield payload
+                if time.monotonic() >= subscription.expires_at:
+                    return
+        finally:
+            self._subscribers.discard(subscription)
+    
+    async def stop(self) -> None:
+        """Stop the broadcast task and end any streams still open."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscription in list(self._subscribers):
+            self._close(subscription)
+    
+    def stats(self) -> Dict:
+        """Get subscriber and broadcast counters."""
+        return {
+            "running": self._task is not None,
+            "subscribers": len(self._subscribers),
+            "seq": self._seq,
+            "buffered_events": len(self._ring),
+            "published": self.published,
+            "posts": self.posts,
+            "heartbeats": self.heartbeats,
+            "dropped": self.dropped,
+            "buffer_resumes": self.buffer_resumes,
+            "store_resumes": self.store_resumes,
+        }
+    
+    async def _run(self) -> None:
+        """Poll for new posts and heartbeat for as long as anyone is subscribed."""
+        last_sent = time.monotonic()
+        while self._subscribers:
+            try:
+                posts, seq = await RSSService.fetch_changes(self._seq)
+                if posts:
+                    self._publish(seq, posts)
+                    last_sent = time.monotonic()
+                    if len(posts) == settings.MAX_POSTS_HISTORY:
+                        continue
+            except Exception as e:
+                logger.warning(f"Post stream poll failed: {e}")
+            
+            if time.monotonic() - last_sent >= settings.POSTS_STREAM_HEARTBEAT:
+                self._broadcast(_HEARTBEAT)
+                self.heartbeats += 1
+                last_sent = time.monotonic()
+            await asyncio.sleep(settings.POSTS_STREAM_POLL_INTERVAL)
+        self._task = None
+    
+    def _publish(self, seq: int, posts: List[Post]) -> None:
+        """Encode new posts once, remember the event and send it to everyone."""
+        payload = self._encode(seq, posts)
+        self._ring.append((self._seq, seq, payload))
+        self._seq = seq
+        self.published += 1
+        self.posts += len(posts)
+        self._broadcast(payload)
+    
+    def _broadcast(self, payload: bytes) -> None:
+        """Queue an event for every subscriber, disconnecting those that fell behind."""
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                self._close(subscription)
+    
+    def _close(self, subscription: PostSubscription) -> None:
+        """End a subscriber's stream, discarding whatever it hadn't sent."""
+        self._subscribers.discard(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+    
+    async def _replay(self, since: int, until: int) -> AsyncIterator[bytes]:
+        """Yield the events between two positions, from the ring or the store."""
+        if since >= until:
+            return
+        
+        if self._ring and self._ring[0][0] <= since:
+            self.buffer_resumes += 1
+            for start, end, payload in list(self._ring):
+                if not since < end <= until:
+                    continue
+                if start < since:
+                    # The cursor falls inside this event (e.g. one from /posts/all):
+                    # send only the posts after it rather than the whole event
+                    posts, _ = await asyncio.to_thread(
+                        PostStore().changes_since, since, until=end
+                    )
+                    if posts:
+                        yield self._encode(end, posts)
+                    continue
+                yield payload
+            return
+        
+        # Older than the ring: read the missed posts back from the store page by
+        # page, stopping at until since later posts arrive on the queue
+        self.store_resumes += 1
+        store = PostStore()
+        while since < until:
+            posts, since = await asyncio.to_thread(store.changes_since, since, until=until)
+            if not posts:
+                return
+            yield self._encode(since, posts)
+    
+    @staticmethod
+    def _encode(seq: int, posts: List[Post]) -> bytes:
+        """Format posts as one SSE event whose id is the cursor after them."""
+        return (
+            f"id: {encode_cursor(seq)}\nevent: posts\ndata: ".encode("ascii")
+            + dumps(posts)
+            + b"\n\n"
+        )
@@ -0,0 +1,176 @@
+"""
+BM25 relevance ranking of posts against chat questions.
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from models.post import Post
+
+
+class PostRanker:
+    """
+    Incremental BM25 index over post titles and account names.
+    
+    Posts are indexed once by id; adding new posts only appends their
+    postings, and scoring a question touches just the posting lists of
+    its terms, computed as vectorized NumPy operations.
+    """
+    
+    K1 = 1.5
+    B = 0.75
+    
+    _TOKEN_RE = re.compile(r"[a-z0-9]+")
+    _STOPWORDS = frozenset(
+        "a about an and any are at be by can do does for from has have how i "
+        "in is it me my of on or that the there this to was what when where "
+        "which who why will with you your".split()
+    )
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._doc_index: Dict[str, int] = {}
+        self._doc_lengths: List[int] = []
+        self._postings: Dict[str, List[tuple]] = {}
+        self._arrays: Dict[str, tuple] = {}
+        self._lengths: Optional[np.ndarray] = None
+    
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """Split text into lowercase terms, dropping stopwords."""
+        return [
+            token for token in cls._TOKEN_RE.findall(text.lower())
+            if token not in cls._STOPWORDS
+        ]
+    
+    @staticmethod
+    def post_key(post: Post) -> str:
+        """Get the identifier a post is indexed under."""
+        return post.id or post.link or post.title
+    
+    @property
+    def size(self) -> int:
+        """Number of indexed posts."""
+        return len(self._doc_lengths)
+    
+    def add(self, posts: Sequence[Post]) -> int:
+        """
+        Index posts that aren't in the index yet.
+        
+        Args:
+            posts: Posts to index
+        
+        Returns:
+            Number of newly indexed posts
+        """
+        added = 0
+        with self._lock:
+            for post in posts:
+                key = self.post_key(post)
+                if key in self._doc_index:
+                    continue
+                
+                text = f"{post.title} {post.account}"
+                counts: Dict[str, int] = {}
+                for term in self.tokenize(text):
+                    counts[term] = counts.get(term, 0) + 1
+                
+                doc = len(self._doc_lengths)
+                self._doc_index[key] = doc
+                self._doc_lengths.append(sum(counts.values()))
+                for term, count in counts.items():
+                    self._postings.setdefault(term, []).append((doc, count))
+                    self._arrays.pop(term, None)
+                added += 1
+            
+            if added:
+                self._lengths = None
+        return added
+    
+    def doc_ids(self, posts: Sequence[Post]) -> np.ndarray:
+        """Map posts to their row in the index (-1 for unindexed posts)."""
+        return np.array(
+            [self._doc_index.get(self.post_key(post), -1) for post in posts],
+            dtype=np.int64
+        )
+    
+    def score(self, query: str, doc_ids: np.ndarray) -> np.ndarray:
+        """
+        Score indexed posts against a question with BM25.
+        
+        Args:
+            query: User's question
+            doc_ids: Index rows to score (from doc_ids)
+        
+        Returns:
+            Array of scores aligned with doc_ids (0 where nothing matches)
+        """
+        terms = set(self.tokenize(query))
+        with self._lock:
+            total = len(self._doc_lengths)
+            if not terms or total == 0:
+                return np.zeros(len(doc_ids))
+            
+            if self._lengths is None:
+                self._lengths = np.asarray(self._doc_lengths, dtype=np.float64)
+            lengths = self._lengths
+            norm = self.K1 * (1 - self.B + self.B * lengths / max(lengths.mean(), 1.0))
+            
+            scores = np.zeros(total)
+            for term in terms:
+                arrays = self._term_arrays(term)
+                if arrays is None:
+                    continue
+                docs, tf = arrays
+                idf = np.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+                scores[docs] += idf * tf * (self.K1 + 1) / (tf + norm[docs])
+        
+        result = np.zeros(len(doc_ids))
+        known = doc_ids >= 0
+        result[known] = scores[doc_ids[known]]
+        return result
+    
+    def select(self, query: str, posts: List[Post], top_k: int) -> List[Post]:
+        """
+        Pick the posts most relevant to a question.
+        
+        Matching posts come first, best score first (newer wins ties);
+        any remaining slots are filled with the most recent posts, so
+        general questions fall back to plain recency.
+        
+        Args:
+            query: User's question
+            posts: Candidate posts, newest first
+            top_k: Number of posts to return
+        
+        Returns:
+            Up to top_k posts
+        """
+        if len(posts) <= top_k:
+            return list(posts)
+        
+        scores = self.score(query, self.doc_ids(posts))
+        # Stable sort keeps recency order among equal scores
+        order = np.argsort(-scores, kind="stable")
+        relevant = [int(i) for i in order[:top_k] if scores[i] > 0]
+        
+        chosen = set(relevant)
+        for i in range(len(posts)):
+            if len(relevant) >= top_k:
+                break
+            if i not in chosen:
+                relevant.append(i)
+        return [posts[i] for i in relevant]
+    
+    def _term_arrays(self, term: str) -> Optional[tuple]:
+        """Get a term's postings as (doc rows, term counts) arrays."""
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            data = np.asarray(postings, dtype=np.int64)
+            arrays = (data[:, 0], data[:, 1].astype(np.float64))
+            self._arrays[term] = arrays
+        return arrays
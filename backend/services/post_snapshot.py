@@ -0,0 +1,251 @@
+"""
+Server-side snapshots of the posts used as chat context.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from config.settings import settings
+from models.post import Post
+from .chat_cache import ChatCache
+from .context_cache import CachedPrefix, GeminiContextCache
+from .gemini_service import GeminiService
+from .post_ranker import PostRanker
+from .post_store import PostStore
+from .profiler import profile_phase
+from .prompt_builder import PromptBuilder, PromptContext
+from .rss_service import RSSService
+
+
+class PostSnapshot:
+    """
+    Immutable set of candidate posts for chat context.
+    
+    The id is a fingerprint of the posts, so clients can refer to the
+    exact set they were shown and answers can be cached against it.
+    Each question gets the most relevant of these posts in its prompt.
+    """
+    
+    __slots__ = ("id", "fingerprint", "posts", "ranker", "_context", "_prefix_context")
+    
+    def __init__(self, posts: List[Post], ranker: Optional[PostRanker] = None):
+        self.posts = posts
+        self.fingerprint = ChatCache.posts_fingerprint(posts)
+        self.id = self.fingerprint[:16]
+        self.ranker = ranker or PostRanker()
+        self.ranker.add(posts)
+        self._context: Optional[str] = None
+        self._prefix_context: Optional[PromptContext] = None
+    
+    @property
+    def context(self) -> str:
+        """Recency-only, unbudgeted posts block (what every prompt used to send)."""
+        if self._context is None:
+            self._context = PromptBuilder().build(
+                self.posts[:settings.MAX_POSTS_FOR_CONTEXT], budget=0
+            ).text
+        return self._context
+    
+    @property
+    def prefix_context(self) -> PromptContext:
+        """Posts block uploaded once as a Gemini cached prefix (every candidate post that fits)."""
+        if self._prefix_context is None:
+            self._prefix_context = PromptBuilder().build(
+                self.posts, budget=settings.GEMINI_CONTEXT_CACHE_TOKEN_BUDGET
+            )
+        return self._prefix_context
+    
+    def select(self, message: str) -> List[Post]:
+        """
+        Pick the posts to put in the prompt for a question.
+        
+        Args:
+            message: User's question
+            
+        Returns:
+            Most relevant posts, topped up with the most recent ones
+        """
+        top_k = min(settings.CONTEXT_TOP_K, settings.MAX_POSTS_FOR_CONTEXT)
+        if top_k <= 0:
+            return self.posts[:settings.MAX_POSTS_FOR_CONTEXT]
+        return self.ranker.select(message, self.posts, top_k)
+
+
+class SnapshotService:
+    """
+    Service that keeps the current post snapshot and a few recent ones.
+    
+    A new snapshot is only built when the post store's version changes,
+    and all snapshots share one incrementally updated relevance index.
+    """
+    
+    _instance: Optional['SnapshotService'] = None
+    _recent: Optional['OrderedDict[str, PostSnapshot]'] = None
+    
+    def __new__(cls):
+        """Singleton pattern to share snapshots across requests."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Initialize snapshot tracking (only once)."""
+        if self._recent is None:
+            self._current: Optional[PostSnapshot] = None
+            self._version: Optional[int] = None
+            self.builds = 0
+            self.reuses = 0
+            self.pinned = 0
+            self.selections = 0
+            self.posts_selected = 0
+            self.baseline_chars = 0
+            self.prompt_chars = 0
+            self.prompt_tokens = 0
+            self.max_prompt_tokens = 0
+            self.posts_trimmed = 0
+            self.posts_dropped = 0
+            self.prefixed = 0
+            self._retain_pending = False
+            self._ranker = PostRanker()
+            self._recent = OrderedDict()
+    
+    def current(self) -> PostSnapshot:
+        """
+        Get the snapshot of the most recent stored posts.
+        
+        Returns:
+            Current PostSnapshot (rebuilt only if the store changed)
+        """
+        version = PostStore().version
+        if self._current is None or version != self._version:
+            # Start a fresh index once old posts dominate it
+            if self._ranker.size > 4 * settings.CONTEXT_CANDIDATE_POSTS:
+                self._ranker = PostRanker()
+            
+            posts = RSSService.recent_posts(settings.CONTEXT_CANDIDATE_POSTS)
+            snapshot = PostSnapshot(posts, self._ranker)
+            # Keep the existing object (and its formatted context) if nothing visible changed
+            previous = self._current
+            self._current = self._recent.get(snapshot.id) or snapshot
+            self._version = version
+            self._remember(self._current)
+            self.builds += 1
+            
+            # Answers are only worth keeping for the snapshots clients can still
+            # pin; resolve() drops the rest off the event loop
+            if previous is not None and self._current is not previous:
+                self._retain_pending = True
+        else:
+            self.reuses += 1
+        return self._current
+    
+    async def resolve(self, snapshot_id: Optional[str] = None) -> PostSnapshot:
+        """
+        Get the snapshot a chat request should use.
+        
+        A known snapshot id pins the request to the posts the client was
+        shown; unknown or missing ids get the current snapshot. On a cold
+        start with an empty store, the feeds are fetched first.
+        
+        Args:
+            snapshot_id: Snapshot id the client received (optional)
+            
+        Returns:
+            PostSnapshot to build the chat context from
+        """
+        pinned = self._recent.get(snapshot_id) if snapshot_id else None
+        if pinned is not None and pinned.posts:
+            self.pinned += 1
+            self._recent.move_to_end(snapshot_id)
+            return pinned
+        
+        snapshot = self.current()
+        if not snapshot.posts:
+            await RSSService.fetch_all_posts()
+            snapshot = self.current()
+        
+        if self._retain_pending:
+            self._retain_pending = False
+            fingerprints = {retained.fingerprint for retained in self._recent.values()}
+            await asyncio.to_thread(ChatCache().retain, fingerprints)
+        return snapshot
+    
+    def build_context(
+        self,
+        snapshot: PostSnapshot,
+        message: str,
+        history: str = ""
+    ) -> PromptContext:
+        """
+        Build the token-budgeted posts context for one question.
+        
+        For the current snapshot, the context also names the snapshot's
+        full posts block as a Gemini cached prefix, so only the question
+        is sent; the ranked block is the fallback if caching fails.
+        
+        Args:
+            snapshot: Snapshot to select posts from
+            message: User's question
+            history: Chat session history block (optional)
+            
+        Returns:
+            PromptContext with the posts that fit and the full prompt's size
+        """
+        with profile_phase("prompt_building"):
+            context = PromptBuilder().build(snapshot.select(message))
+            context.prompt_tokens = PromptBuilder.estimate_tokens(
+                GeminiService.build_prompt(message, context.text, history)
+            )
+            
+            if snapshot is self._current:
+                # Trade-off: the cached block is the same for every question, so
+                # it isn't ranked against this one; it's capped by its own token
+                # budget instead, and is paid for once rather than per chat
+                block = snapshot.prefix_context
+                if GeminiContextCache().usable(snapshot.fingerprint, block.tokens):
+                    context.prefix = CachedPrefix(snapshot.fingerprint, block.text)
+                    context.prompt_tokens = PromptBuilder.estimate_tokens(
+                        GeminiService.build_question(message, history)
+                    )
+                    self.prefixed += 1
+        
+        self.selections += 1
+        self.posts_selected += len(context.posts)
+        self.posts_trimmed += context.trimmed
+        self.posts_dropped += context.dropped
+        self.baseline_chars += len(snapshot.context)
+        self.prompt_chars += len(context.text)
+        self.prompt_tokens += context.prompt_tokens
+        self.max_prompt_tokens = max(self.max_prompt_tokens, context.prompt_tokens)
+        return context
+    
+    def stats(self) -> Dict:
+        """Get snapshot counters and the prompt-size reduction from ranking."""
+        selections = self.selections
+        return {
+            "current": self._current.id if self._current else None,
+            "retained": len(self._recent),
+            "builds": self.builds,
+            "reuses": self.reuses,
+            "pinned": self.pinned,
+            "indexed_posts": self._ranker.size,
+            "selections": selections,
+            "avg_posts_selected": self.posts_selected / selections if selections else 0.0,
+            "avg_context_chars": self.prompt_chars / selections if selections else 0.0,
+            "avg_baseline_chars": self.baseline_chars / selections if selections else 0.0,
+            "context_reduction": (
+                1 - self.prompt_chars / self.baseline_chars if self.baseline_chars else 0.0
+            ),
+            "avg_prompt_tokens": self.prompt_tokens / selections if selections else 0.0,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "posts_trimmed": self.posts_trimmed,
+            "posts_dropped": self.posts_dropped,
+            "cached_prefix_selections": self.prefixed,
+        }
+    
+    def _remember(self, snapshot: PostSnapshot) -> None:
+        """Keep a bounded number of recent snapshots for pinned requests."""
+        self._recent[snapshot.id] = snapshot
+        self._recent.move_to_end(snapshot.id)
+        while len(self._recent) > settings.MAX_RETAINED_SNAPSHOTS:
+            self._recent.popitem(last=False)
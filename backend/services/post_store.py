@@ -0,0 +1,290 @@
+"""
+Persistent SQLite store for ingested Instagram posts.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from config.settings import settings
+from models.post import Post
+from .profiler import profile_phase
+
+
+class PostStore:
+    """
+    Local SQLite-backed store of every post ingested from the RSS feeds.
+    
+    Posts are upserted by guid (or link when a feed has no guid), so
+    re-ingesting a feed only writes entries that are new or changed.
+    Reads are served from local disk and never touch the network.
+    The version changes whenever an ingest changes anything, including
+    ingests by other worker processes sharing the database.
+    
+    Every inserted or changed post is stamped with the next ingest
+    sequence number (seq), so clients can ask for just the posts that
+    arrived after a point they have already seen.
+    """
+    
+    _instance: Optional['PostStore'] = None
+    _conn: Optional[sqlite3.Connection] = None
+    
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS posts (
+            id TEXT PRIMARY KEY,
+            account TEXT NOT NULL,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL,
+            image TEXT NOT NULL,
+            published TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            ingested_at REAL NOT NULL,
+            seq INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_posts_account_timestamp
+            ON posts (account, timestamp DESC);
+        CREATE INDEX IF NOT EXISTS idx_posts_timestamp
+            ON posts (timestamp DESC);
+    """
+    
+    # Same order as the Post fields, so rows map straight onto records
+    _COLUMNS = "id, title, link, image, published, account, timestamp"
+    
+    def __new__(cls):
+        """Singleton pattern to reuse the database connection."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Open the database and create the schema (only once)."""
+        if self._conn is None:
+            path = Path(settings.POST_STORE_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            
+            conn = sqlite3.connect(str(path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self._SCHEMA)
+            self._migrate(conn)
+            
+            self._lock = threading.Lock()
+            self.inserted = 0
+            self.updated = 0
+            self.writes = 0
+            self._conn = conn
+    
+    def upsert_posts(self, posts: List[Post]) -> int:
+        """
+        Insert new posts and update changed ones.
+        
+        Args:
+            posts: List of posts from RSSService.parse_posts
+        
+        Returns:
+            Number of posts that were not in the store before
+        """
+        if not posts:
+            return 0
+        
+        ids = [post.id for post in posts]
+        now = time.time()
+        rows = [
+            (
+                post.id, post.account, post.title, post.link,
+                post.image, post.published, post.timestamp, now
+            )
+            for post in posts
+        ]
+        
+        with profile_phase("store"), self._lock, self._conn:
+            placeholders = ",".join("?" * len(ids))
+            existing = {
+                row[0] for row in self._conn.execute(
+                    f"SELECT id FROM posts WHERE id IN ({placeholders})", ids
+                )
+            }
+            changed = self._conn.executemany(
+                """
+                INSERT INTO posts
+                    (id, account, title, link, image, published, timestamp, ingested_at, seq)
+                VALUES (
+                    ?, ?, ?, ?, ?, ?, ?, ?,
+                    (SELECT COALESCE(MAX(seq), 0) + 1 FROM posts)
+                )
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title,
+                    link = excluded.link,
+                    image = excluded.image,
+                    published = excluded.published,
+                    timestamp = excluded.timestamp,
+                    seq = excluded.seq
+                WHERE posts.title IS NOT excluded.title
+                    OR posts.link IS NOT excluded.link
+                    OR posts.image IS NOT excluded.image
+                    OR posts.timestamp IS NOT excluded.timestamp
+                """,
+                rows
+            ).rowcount
+        
+        new = len(set(ids) - existing)
+        self.inserted += new
+        self.updated += max(changed - new, 0)
+        if changed:
+            self.writes += 1
+        return new
+    
+    @property
+    def version(self) -> int:
+        """
+        Counter that changes whenever the stored posts change.
+        
+        SQLite's data_version only moves for commits made through other
+        connections, so this process's own changing writes are added on top.
+        """
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return self.writes + data_version
+    
+    def recent_posts(
+        self,
+        account: Optional[str] = None,
+        limit: int = settings.MAX_POSTS_PER_ACCOUNT
+    ) -> List[Post]:
+        """
+        Get the most recently published posts.
+        
+        Args:
+            account: Only return posts from this account (optional)
+            limit: Maximum number of posts to return
+        
+        Returns:
+            List of posts, newest first
+        """
+        if account is None:
+            query = f"SELECT {self._COLUMNS} FROM posts ORDER BY timestamp DESC LIMIT ?"
+            params = (limit,)
+        else:
+            query = (
+                f"SELECT {self._COLUMNS} FROM posts WHERE account = ? "
+                f"ORDER BY timestamp DESC LIMIT ?"
+            )
+            params = (account, limit)
+        
+        with profile_phase("store"), self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [Post(*row) for row in rows]
+    
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the most recent insert or change (0 if empty)."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM posts").fetchone()[0]
+    
+    def changes_since(
+        self,
+        seq: int,
+        account: Optional[str] = None,
+        limit: int = settings.MAX_POSTS_HISTORY,
+        until: Optional[int] = None
+    ) -> Tuple[List[Post], int]:
+        """
+        Get posts inserted or changed after a sequence number, oldest first.
+        
+        Args:
+            seq: Sequence number the client has already seen
+            account: Only return posts from this account (optional)
+            limit: Maximum number of posts to return
+            until: Newest sequence number to include (optional)
+        
+        Returns:
+            Tuple of the posts and the sequence number to continue from
+            (seq itself when nothing changed)
+        """
+        return self._page("seq > ?", "ASC", seq, account, limit, until)
+    
+    def history_before(
+        self,
+        seq: int,
+        account: Optional[str] = None,
+        limit: int = settings.MAX_POSTS_HISTORY
+    ) -> Tuple[List[Post], int]:
+        """
+        Get posts ingested up to a sequence number, most recent first.
+        
+        Args:
+            seq: Newest sequence number to include
+            account: Only return posts from this account (optional)
+            limit: Maximum number of posts to return
+        
+        Returns:
+            Tuple of the posts and the sequence number to continue from
+            (just below the oldest post returned, or seq itself when there
+            are no posts left)
+        """
+        posts, last = self._page("seq <= ?", "DESC", seq, account, limit)
+        return posts, last - 1 if posts else seq
+    
+    def has_posts(self, account: str) -> bool:
+        """Check whether any posts have been stored for an account."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM posts WHERE account = ? LIMIT 1", (account,)
+            ).fetchone()
+        return row is not None
+    
+    def stats(self) -> Dict:
+        """Get store size and ingestion counters."""
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        return {
+            "path": settings.POST_STORE_PATH,
+            "posts": total,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "version": self.version,
+        }
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def _page(
+        self,
+        condition: str,
+        order: str,
+        seq: int,
+        account: Optional[str],
+        limit: int,
+        until: Optional[int] = None
+    ) -> Tuple[List[Post], int]:
+        """Read one page of posts in ingest order, returning the last seq seen."""
+        query = f"SELECT {self._COLUMNS}, seq FROM posts WHERE {condition}"
+        params = [seq]
+        if until is not None:
+            query += " AND seq <= ?"
+            params.append(until)
+        if account is not None:
+            query += " AND account = ?"
+            params.append(account)
+        query += f" ORDER BY seq {order} LIMIT ?"
+        params.append(limit)
+        
+        with profile_phase("store"), self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        if not rows:
+            return [], seq
+        return [Post(*row[:-1]) for row in rows], rows[-1][-1]
+    
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Add the ingest sequence to databases created before it existed."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(posts)")}
+        if "seq" not in columns:
+            with conn:
+                conn.execute("ALTER TABLE posts ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE posts SET seq = rowid")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_seq ON posts (seq)")
@@ -0,0 +1,230 @@
+"""
+Opt-in per-request profiling with a phase breakdown.
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional['RequestProfile']] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """
+    Timing record for one profiled request.
+    
+    Phases are summed over everything the request did, including work
+    running concurrently (e.g. the eight feed fetches behind /posts/all),
+    so their total can exceed the request's wall time.
+    """
+    
+    __slots__ = (
+        "id", "method", "path", "route", "started_at", "duration",
+        "status", "phases", "profile", "_lock"
+    )
+    
+    def __init__(self, method: str, path: str, route: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.route = route
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.status = 0
+        self.phases: Dict[str, float] = {}
+        self.profile: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+    
+    def add_phase(self, name: str, seconds: float) -> None:
+        """Add time spent in a phase (called from the event loop and worker threads)."""
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+    
+    def summary(self) -> Dict:
+        """Get a JSON-ready description of the request."""
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "phases": dict(sorted(self.phases.items(), key=lambda item: -item[1])),
+            "has_call_profile": self.profile is not None,
+        }
+
+
+@contextmanager
+def profile_phase(name: str) -> Iterator[None]:
+    """
+    Attribute the time spent in the block to a phase of the current request.
+    
+    Costs a single context variable lookup when the request isn't profiled.
+    
+    Args:
+        name: Phase name (e.g. "parsing", "serialization")
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_phase(name, time.perf_counter() - started)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Attribute an already measured duration to a phase of the current request."""
+    profile = _current.get()
+    if profile is not None:
+        profile.add_phase(name, seconds)
+
+
+class RequestProfiler:
+    """
+    Starts and stores request profiles.
+    
+    A request is profiled when it sends the X-Profile header with
+    PROFILE_TOKEN, or when it is picked at PROFILE_SAMPLE_RATE. Every
+    profiled request gets a phase breakdown; a cProfile call profile is
+    taken too unless another one is already running, since cProfile
+    hooks the whole event loop thread. Profiles are written to
+    PROFILE_DIR, which keeps only the newest PROFILE_MAX_FILES requests,
+    and the most recent summaries are kept in memory.
+    """
+    
+    _instance: Optional['RequestProfiler'] = None
+    _recent: Optional[Deque[Dict]] = None
+    
+    def __new__(cls):
+        """Singleton pattern to share recent profiles across requests."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Initialize the profile directory and history (only once)."""
+        if self._recent is None:
+            self.directory = Path(settings.PROFILE_DIR)
+            self.max_files = settings.PROFILE_MAX_FILES
+            self._call_profile_lock = threading.Lock()
+            self.profiled = 0
+            self.call_profiles = 0
+            self.write_errors = 0
+            self._recent = deque(maxlen=settings.PROFILE_RECENT_REQUESTS)
+    
+    def begin(self, method: str, path: str, route: str) -> RequestProfile:
+        """
+        Start profiling the current request.
+        
+        Must be called in the request's own task so the phase hooks
+        (and anything the request awaits or runs in upstream lanes) see it.
+        
+        Returns:
+            The new RequestProfile
+        """
+        profile = RequestProfile(method, path, route)
+        _current.set(profile)
+        self.profiled += 1
+        
+        if self._call_profile_lock.acquire(blocking=False):
+            profile.profile = cProfile.Profile()
+            profile.profile.enable()
+        return profile
+    
+    async def finish(self, profile: RequestProfile, duration: float, status: int) -> None:
+        """
+        Stop profiling a request and store its profile.
+        
+        Args:
+            profile: Profile returned by begin()
+            duration: Request wall time in seconds
+            status: Response status code
+        """
+        _current.set(None)
+        if profile.profile is not None:
+            profile.profile.disable()
+            self._call_profile_lock.release()
+            self.call_profiles += 1
+        
+        profile.duration = duration
+        profile.status = status
+        self._recent.append(profile.summary())
+        
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write, profile)
+    
+    def slowest(self, limit: int = 20) -> List[Dict]:
+        """Get the slowest recently profiled requests, slowest first."""
+        return sorted(self._recent, key=lambda summary: -summary["duration"])[:limit]
+    
+    def report(self, profile_id: str, limit: int = 40, sort: str = "cumulative") -> Optional[str]:
+        """
+        Render a stored call profile as text.
+        
+        Args:
+            profile_id: ID of a profiled request
+            limit: Number of functions to list
+            sort: pstats sort key ("cumulative", "tottime", ...)
+        
+        Returns:
+            pstats report, or None if there is no call profile with that ID
+        """
+        if not profile_id.isalnum():
+            return None
+        path = self.directory / f"{profile_id}.prof"
+        if not path.exists():
+            return None
+        
+        out = io.StringIO()
+        stats = pstats.Stats(str(path), stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+    
+    def stats(self) -> Dict:
+        """Get profiling counters."""
+        return {
+            "sample_rate": settings.PROFILE_SAMPLE_RATE,
+            "header_enabled": bool(settings.PROFILE_TOKEN),
+            "profiled": self.profiled,
+            "call_profiles": self.call_profiles,
+            "recent": len(self._recent),
+            "write_errors": self.write_errors,
+        }
+    
+    def _write(self, profile: RequestProfile) -> None:
+        """Write a profile's summary (and call profile) and rotate old ones out."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if profile.profile is not None:
+                profile.profile.dump_stats(str(self.directory / f"{profile.id}.prof"))
+            (self.directory / f"{profile.id}.json").write_text(json.dumps(profile.summary()))
+            self._rotate()
+        except OSError as e:
+            self.write_errors += 1
+            logger.warning(f"Could not write profile {profile.id}: {e}")
+    
+    def _rotate(self) -> None:
+        """Delete the oldest profiles beyond PROFILE_MAX_FILES requests."""
+        summaries = sorted(self.directory.glob("*.json"), key=os.path.getmtime)
+        for summary in summaries[:max(len(summaries) - self.max_files, 0)]:
+            summary.unlink(missing_ok=True)
+            summary.with_suffix(".prof").unlink(missing_ok=True)
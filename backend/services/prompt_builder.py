@@ -0,0 +1,180 @@
+"""
+Token-budgeted assembly of the posts context for Gemini prompts.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config.settings import settings
+from models.post import Post
+from .context_cache import CachedPrefix
+
+
+class PromptContext:
+    """
+    Posts block for one prompt, with its estimated size.
+    
+    prompt_tokens starts as the block's own size; callers that know the
+    rest of the prompt fill in the estimate for the whole thing. When
+    prefix is set, Gemini is sent that cached block instead of text.
+    """
+    
+    __slots__ = ("text", "posts", "tokens", "trimmed", "dropped", "prompt_tokens", "prefix")
+    
+    def __init__(self, text: str, posts: List[Post], tokens: int, trimmed: int, dropped: int):
+        self.text = text
+        self.posts = posts
+        self.tokens = tokens
+        self.trimmed = trimmed
+        self.dropped = dropped
+        self.prompt_tokens = tokens
+        self.prefix: Optional[CachedPrefix] = None
+
+
+class PromptBuilder:
+    """
+    Builds the posts context against an explicit token budget.
+    
+    Each post is formatted once into a fragment (full and with a trimmed
+    caption) that is cached by post id, so assembling a prompt is just a
+    join of cached strings. When the posts don't fit the budget, captions
+    are trimmed first, starting with the last (least relevant) posts,
+    then whole posts are dropped from the end. The budget is a hard
+    limit: if not even one trimmed post fits, the block is empty.
+    """
+    
+    _instance: Optional['PromptBuilder'] = None
+    _fragments: Optional['OrderedDict[str, Tuple]'] = None
+    
+    HEADER = "\n\nRecent Stillwater Instagram posts:\n"
+    
+    def __new__(cls):
+        """Singleton pattern to share the fragment cache across requests."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Initialize the fragment cache (only once)."""
+        if self._fragments is None:
+            self.max_fragments = settings.PROMPT_FRAGMENT_CACHE_SIZE
+            self._lock = threading.Lock()
+            self.hits = 0
+            self.misses = 0
+            self._fragments = OrderedDict()
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        Estimate the token count of a piece of text.
+        
+        Uses the usual ~4 characters per token rule of thumb for English,
+        which is close enough for budgeting without a network round trip.
+        """
+        return math.ceil(len(text) / 4)
+    
+    def build(self, posts: List[Post], budget: Optional[int] = None) -> PromptContext:
+        """
+        Assemble the posts block for a prompt.
+        
+        Args:
+            posts: Posts to include, most important first
+            budget: Token budget for the block (defaults to
+                PROMPT_CONTEXT_TOKEN_BUDGET; 0 means unlimited)
+        
+        Returns:
+            PromptContext with the text and what had to be cut
+        """
+        if not posts:
+            return PromptContext("", [], 0, 0, 0)
+        
+        budget = settings.PROMPT_CONTEXT_TOKEN_BUDGET if budget is None else budget
+        fragments = [self._fragment(post) for post in posts]
+        header_tokens = self.estimate_tokens(self.HEADER)
+        
+        # Each numbered line adds a "N. " prefix of about one token
+        full = [f[2] + 1 for f in fragments]
+        short = [f[3] + 1 for f in fragments]
+        use_short = [False] * len(fragments)
+        count = len(fragments)
+        total = header_tokens + sum(full)
+        
+        if budget > 0:
+            # Trim captions from the least relevant posts upwards
+            for i in reversed(range(count)):
+                if total <= budget:
+                    break
+                if short[i] < full[i]:
+                    use_short[i] = True
+                    total -= full[i] - short[i]
+            
+            # Then drop whole posts from the end
+            while total > budget and count > 0:
+                count -= 1
+                total -= short[count] if use_short[count] else full[count]
+        
+        if count == 0:
+            return PromptContext("", [], 0, 0, len(fragments))
+        
+        lines = [self.HEADER]
+        for i in range(count):
+            lines.append(f"{i + 1}. {fragments[i][1] if use_short[i] else fragments[i][0]}")
+        
+        return PromptContext(
+            text="".join(lines),
+            posts=posts[:count],
+            tokens=total,
+            trimmed=sum(use_short[:count]),
+            dropped=len(fragments) - count
+        )
+    
+    def stats(self) -> Dict:
+        """Get fragment cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "budget_tokens": settings.PROMPT_CONTEXT_TOKEN_BUDGET,
+            "fragments": len(self._fragments),
+            "fragment_hits": self.hits,
+            "fragment_misses": self.misses,
+            "fragment_hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+    
+    def _fragment(self, post: Post) -> Tuple[str, str, int, int]:
+        """
+        Get a post's formatted fragment, formatting it on first use.
+        
+        Returns:
+            Tuple of (full text, trimmed text, full tokens, trimmed tokens)
+        """
+        title = post.title or 'Untitled'
+        account = post.account or 'Unknown'
+        source = (account, title)
+        key = post.id or post.link or title
+        
+        with self._lock:
+            entry = self._fragments.get(key)
+            if entry is not None and entry[0] == source:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        # The title is the whole caption; feeds carry no separate description
+        limit = settings.PROMPT_TRIMMED_SNIPPET_CHARS
+        short_title = title if len(title) <= limit else title[:limit].rstrip() + "…"
+        full_text = f"From @{account}: {title}\n"
+        short_text = f"From @{account}: {short_title}\n"
+        fragment = (
+            full_text,
+            short_text,
+            self.estimate_tokens(full_text),
+            self.estimate_tokens(short_text),
+        )
+        
+        with self._lock:
+            self._fragments[key] = (source, fragment)
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.max_fragments:
+                self._fragments.popitem(last=False)
+        return fragment
@@ -0,0 +1,104 @@
+"""
+Per-client token-bucket rate limiting for expensive endpoints.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+from config.settings import settings
+from .metrics import RATE_LIMITED
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by client, for one kind of request.
+    
+    Each client may make `burst` requests at once and then one more
+    every 60 / `per_minute` seconds. Buckets are kept for the most
+    recently seen RATE_LIMIT_MAX_CLIENTS clients; an evicted client
+    simply starts again with a full bucket.
+    """
+    
+    def __init__(self, name: str, per_minute: float, burst: int):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = max(burst, 1)
+        self.max_clients = settings.RATE_LIMIT_MAX_CLIENTS
+        self._buckets: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether this limit is switched on."""
+        return self.rate > 0
+    
+    def acquire(self, client: str) -> float:
+        """
+        Take a token from a client's bucket.
+        
+        Args:
+            client: Client identifier (e.g. IP address)
+        
+        Returns:
+            0 if the request may proceed, otherwise seconds until it may
+        """
+        if not self.enabled:
+            return 0.0
+        
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.limited += 1
+            
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        
+        if wait:
+            RATE_LIMITED.labels(self.name).inc()
+        return wait
+    
+    def stats(self) -> Dict:
+        """Get limit settings and counters."""
+        return {
+            "per_minute": self.rate * 60,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """
+    Get the rate limiter for a kind of request, creating it on first use.
+    
+    Args:
+        name: Limit name ("chat" or "tts")
+    
+    Returns:
+        Shared RateLimiter instance
+    """
+    if name not in _limiters:
+        per_minute, burst = settings.RATE_LIMITS[name]
+        _limiters[name] = RateLimiter(name, per_minute, burst)
+    return _limiters[name]
+
+
+def rate_limit_stats() -> Dict[str, Dict]:
+    """Get stats for every rate limiter used so far."""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
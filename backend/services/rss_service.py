@@ -2,15 +2,295 @@
 Service for fetching and parsing RSS feeds.
 """
 
-import feedparser
-from datetime import datetime
-from typing import List, Dict
+import asyncio
+import calendar
+import heapq
+import logging
+import time
+import httpx
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
 from config.settings import INSTAGRAM_FEEDS, settings
+from models.post import Post
+from .feed_parser import StreamingFeedParser
+from .leader_lock import LeaderLock
+from .metrics import record_upstream_error
+from .post_store import PostStore
+from .profiler import profile_phase
+from .upstream import LOCAL_WORK, get_upstream
+
+logger = logging.getLogger(__name__)
+
+
+class FeedCache:
+    """
+    Per-account cache of parsed posts with stale-while-revalidate.
+    
+    Fresh entries are served directly. Entries older than the TTL but
+    inside the stale window are served as-is while a single background
+    refresh runs. Concurrent misses for the same key share one fetch.
+    """
+    
+    def __init__(self, ttl: float, stale_ttl: float):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[str, Tuple[float, List[Dict]]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.coalesced = 0
+        self.refresh_errors = 0
+    
+    async def get(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[List[Dict]]],
+        wait: bool = True
+    ) -> Optional[List[Dict]]:
+        """
+        Get cached posts for a key, fetching them if needed.
+        
+        Args:
+            key: Cache key (account username)
+            fetch: Coroutine factory that loads fresh posts
+            wait: If False, a miss starts a background fetch and returns
+                None instead of waiting for it
+            
+        Returns:
+            List of post dictionaries (shared, must not be mutated), or
+            None on a miss when not waiting
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, posts = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self.hits += 1
+                return posts
+            if age < self.ttl + self.stale_ttl:
+                self.stale += 1
+                self._refresh(key, fetch)
+                return posts
+        
+        self.misses += 1
+        if not wait:
+            self._refresh(key, fetch)
+            return None
+        
+        # Shield the shared fetch so one cancelled caller doesn't cancel it for all
+        return await asyncio.shield(self._refresh(key, fetch))
+    
+    def refresh(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[List[Dict]]]
+    ) -> Awaitable[List[Dict]]:
+        """
+        Fetch a key now regardless of its age, sharing any fetch in flight.
+        
+        Args:
+            key: Cache key (account username)
+            fetch: Coroutine factory that loads fresh posts
+        
+        Returns:
+            Awaitable of the fetched posts
+        """
+        return asyncio.shield(self._refresh(key, fetch))
+    
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one cached entry, or all of them if no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+    
+    def stats(self) -> Dict:
+        """Get cache counters."""
+        lookups = self.hits + self.stale + self.misses
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refresh_errors": self.refresh_errors,
+            "hit_ratio": (self.hits + self.stale) / lookups if lookups else 0.0,
+        }
+    
+    def _refresh(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[List[Dict]]]
+    ) -> asyncio.Task:
+        """Start a fetch for a key, or join the one already in flight."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._on_fetched(key, done))
+        return task
+    
+    def _on_fetched(self, key: str, task: asyncio.Task) -> None:
+        """Store a finished fetch, or record its failure."""
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.refresh_errors += 1
+            logger.warning(f"Feed refresh failed for {key}: {error}")
+            return
+        self._entries[key] = (time.monotonic(), task.result())
+
+
+class FeedState:
+    """
+    Conditional-request validators and transfer stats for one feed.
+    
+    Keeps the last parsed posts so a 304 Not Modified response can be
+    answered without downloading or parsing the document again.
+    """
+    
+    def __init__(self):
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.posts: Optional[List[Post]] = None
+        self.last_size = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+        self.parses = 0
+        self.parses_skipped = 0
+    
+    def request_headers(self) -> Dict[str, str]:
+        """Build conditional request headers from the stored validators."""
+        headers = {}
+        if self.posts is None:
+            return headers
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+    
+    def record_not_modified(self) -> None:
+        """Record a 304 response that reused the previous parse."""
+        self.requests += 1
+        self.not_modified += 1
+        self.bytes_saved += self.last_size
+        self.parses_skipped += 1
+    
+    def record_fetched(self, response: httpx.Response, posts: List[Post]) -> None:
+        """Record a full response and remember its validators and posts."""
+        self.requests += 1
+        self.parses += 1
+        self.last_size = response.num_bytes_downloaded or len(response.content)
+        self.bytes_downloaded += self.last_size
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.posts = posts
+    
+    def stats(self) -> Dict:
+        """Get transfer and parse counters for this feed."""
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes_saved": self.bytes_saved,
+            "parses": self.parses,
+            "parses_skipped": self.parses_skipped,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+        }
+
+
+class FeedPoller:
+    """
+    Background feed refresh run by a single worker process.
+    
+    Every worker starts a poller, but only the one holding the leader
+    lock refreshes the feeds; the others keep serving the shared post
+    store and retry the lock each interval, so they take over if the
+    leader exits. Upstream feed traffic stays the same however many
+    workers there are.
+    """
+    
+    def __init__(
+        self,
+        lock_path: str,
+        interval: float,
+        poll: Callable[[], Awaitable[int]]
+    ):
+        self.interval = interval
+        self._lock = LeaderLock(lock_path)
+        self._poll = poll
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.failed_feeds = 0
+        self.last_poll: Optional[float] = None
+    
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process is the one refreshing the feeds."""
+        return self._lock.held
+    
+    def start(self) -> None:
+        """Start competing for leadership and polling while leader."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop polling and hand leadership to another worker."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._lock.release()
+    
+    def stats(self) -> Dict:
+        """Get leadership and polling counters."""
+        return {
+            "running": self._task is not None,
+            "leader": self.is_leader,
+            "interval": self.interval,
+            "polls": self.polls,
+            "failed_feeds": self.failed_feeds,
+            "last_poll": self.last_poll,
+        }
+    
+    async def _run(self) -> None:
+        """Poll every interval for as long as this process holds the lock."""
+        while True:
+            try:
+                if self._lock.try_acquire():
+                    self.failed_feeds += await self._poll()
+                    self.polls += 1
+                    self.last_poll = time.time()
+            except Exception as e:
+                logger.warning(f"Feed poll failed: {e}")
+            await asyncio.sleep(self.interval)
 
 
 class RSSService:
     """Service for handling RSS feed operations."""
     
+    _client: Optional[httpx.AsyncClient] = None
+    _poller: Optional[FeedPoller] = None
+    _cache = FeedCache(
+        ttl=settings.FEED_CACHE_TTL,
+        stale_ttl=settings.FEED_CACHE_STALE_TTL
+    )
+    _feed_states: Dict[str, FeedState] = {}
+    
     @staticmethod
     def get_account_names() -> List[str]:
         """Get list of all available Instagram account names."""
@@ -23,23 +303,65 @@ class RSSService:
     
     @staticmethod
     def get_feed_url(username: str) -> str:
-        """Get RSS feed URL for a given username."""
-        return INSTAGRAM_FEEDS.get(username, "")
+        """
+        Get RSS feed URL for a given username.
+        
+        When RSS_FEED_BASE_URL is set, the feed's path is served from that
+        host instead of rss.app (e.g. a local stand-in for load tests).
+        """
+        url = INSTAGRAM_FEEDS.get(username, "")
+        if url and settings.RSS_FEED_BASE_URL:
+            path = httpx.URL(url).raw_path.decode("ascii")
+            return settings.RSS_FEED_BASE_URL.rstrip("/") + path
+        return url
+    
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use."""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                timeout=settings.RSS_FETCH_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=settings.RSS_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.RSS_MAX_CONNECTIONS,
+                ),
+            )
+        return cls._client
+    
+    @classmethod
+    async def close_client(cls) -> None:
+        """Close the shared HTTP client and its pooled connections."""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
     
     @staticmethod
-    def fetch_posts(username: str) -> List[Dict[str, str]]:
+    async def fetch_posts(
+        username: str,
+        limit: int = settings.MAX_POSTS_PER_ACCOUNT
+    ) -> List[Post]:
         """
         Fetch latest posts from a username's RSS feed.
         
+        Posts are read from the local post store. The upstream feed is
+        only awaited on a cold start, when nothing has been stored for the
+        account yet; otherwise stale feeds are refreshed in the background.
+        Workers that aren't the feed poller's leader leave fetching to it
+        and only fetch themselves if it stores nothing within the fetch
+        timeout.
+        
         Args:
             username: Instagram account username
+            limit: Maximum number of posts to return
             
         Returns:
-            List of post dictionaries with title, link, image, and published date
+            List of posts with id, title, link, image, published date,
+            account and timestamp, newest first
             
         Raises:
             ValueError: If username not found
-            Exception: If RSS feed fetch fails
+            Exception: If RSS feed fetch fails and nothing is stored
         """
         if not RSSService.validate_account(username):
             raise ValueError(
@@ -47,32 +369,295 @@ class RSSService:
                 f"Available accounts: {RSSService.get_account_names()}"
             )
         
+        await RSSService._ensure_fresh(username)
+        return PostStore().recent_posts(username, limit)
+    
+    @staticmethod
+    async def fetch_changes(
+        since: int,
+        username: Optional[str] = None,
+        limit: int = settings.MAX_POSTS_HISTORY
+    ) -> Tuple[List[Post], int]:
+        """
+        Fetch posts ingested after an ingest sequence number.
+        
+        Feeds are kept fresh exactly as for fetch_posts, so polling this
+        with the returned sequence number picks up new posts as they are
+        ingested while only reading the store.
+        
+        Args:
+            since: Sequence number the client has already seen
+            username: Only return posts from this account (optional)
+            limit: Maximum number of posts to return
+        
+        Returns:
+            Tuple of the posts (oldest ingested first) and the sequence
+            number to poll from next
+        
+        Raises:
+            ValueError: If username not found
+        """
+        if username is not None and not RSSService.validate_account(username):
+            raise ValueError(
+                f"Username '{username}' not found. "
+                f"Available accounts: {RSSService.get_account_names()}"
+            )
+        
+        usernames = [username] if username is not None else RSSService.get_account_names()
+        results = await asyncio.gather(
+            *(RSSService._ensure_fresh(name) for name in usernames),
+            return_exceptions=True
+        )
+        for name, result in zip(usernames, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Serving stored posts for {name}: {result}")
+        
+        return PostStore().changes_since(since, username, limit)
+    
+    @staticmethod
+    async def _ensure_fresh(username: str) -> None:
+        """
+        Make sure an account's posts are stored and refresh stale feeds.
+        
+        The upstream feed is only awaited on a cold start. Workers that
+        follow another worker's poller leave fetching to it unless it
+        stores nothing within the fetch timeout.
+        """
+        store = PostStore()
+        if RSSService.follows_poller() and (
+            store.has_posts(username) or await RSSService._wait_for_posts(username)
+        ):
+            return
+        
+        await RSSService._cache.get(
+            username,
+            lambda: RSSService._fetch_feed(username),
+            wait=not store.has_posts(username)
+        )
+    
+    @staticmethod
+    async def _fetch_feed(username: str) -> List[Post]:
+        """
+        Download and parse a username's RSS feed, bypassing the cache.
+        
+        Sends the feed's stored ETag / Last-Modified validators so an
+        unchanged feed comes back as a 304 and the previous parse is reused.
+        """
         rss_url = RSSService.get_feed_url(username)
+        state = RSSService._feed_states.setdefault(username, FeedState())
+        upstream = get_upstream("rss")
         
         try:
-            feed = feedparser.parse(rss_url)
-            posts = []
+            response = await upstream.call(
+                RSSService.get_client().get,
+                rss_url,
+                headers=state.request_headers(),
+                target=username
+            )
             
-            max_posts = settings.MAX_POSTS_PER_ACCOUNT
-            for entry in feed.entries[:max_posts]:
-                # Extract image from various possible fields
-                image = RSSService._extract_image(entry)
+            if response.status_code == 304 and state.posts is not None:
+                state.record_not_modified()
+                return state.posts
                 
-                # Extract published date
-                published = RSSService._extract_published_date(entry)
+            if response.is_error:
+                record_upstream_error("rss", username, f"http_{response.status_code // 100}xx")
+            response.raise_for_status()
                 
-                posts.append({
-                    "title": entry.get("title", ""),
-                    "link": entry.get("link", ""),
-                    "image": image,
-                    "published": published,
-                })
-            
+            # Parsing and the store write are blocking, keep them off the event loop
+            posts = await upstream.run(
+                RSSService._ingest, username, response.content, target=LOCAL_WORK
+            )
+            state.record_fetched(response, posts)
             return posts
             
         except Exception as e:
             raise Exception(f"Error fetching RSS feed for {username}: {str(e)}")
     
+    @staticmethod
+    async def fetch_all_posts() -> List[Post]:
+        """
+        Fetch posts from every account concurrently and merge them.
+        
+        Feeds that fail to load are logged and skipped so one bad feed
+        does not take down the whole page.
+        
+        Returns:
+            List of posts from all accounts, newest first
+        """
+        usernames = RSSService.get_account_names()
+        results = await asyncio.gather(
+            *(RSSService.fetch_posts(username) for username in usernames),
+            return_exceptions=True
+        )
+        
+        per_account = []
+        for username, result in zip(usernames, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Skipping feed for {username}: {result}")
+                continue
+            per_account.append(result)
+        
+        # Each list is already sorted newest first, so a k-way merge is enough
+        return list(heapq.merge(
+            *per_account,
+            key=lambda post: post.timestamp,
+            reverse=True
+        ))
+    
+    @staticmethod
+    async def refresh_all_feeds() -> int:
+        """
+        Download every feed now, sharing fetches already in flight.
+        
+        Returns:
+            Number of feeds that failed to refresh
+        """
+        usernames = RSSService.get_account_names()
+        results = await asyncio.gather(
+            *(
+                RSSService._cache.refresh(
+                    username, lambda username=username: RSSService._fetch_feed(username)
+                )
+                for username in usernames
+            ),
+            return_exceptions=True
+        )
+        return sum(isinstance(result, Exception) for result in results)
+    
+    @classmethod
+    def start_poller(cls) -> None:
+        """Start the feed poller (call once per worker, from the event loop)."""
+        if cls._poller is None:
+            cls._poller = FeedPoller(
+                settings.FEED_POLLER_LOCK_PATH,
+                settings.FEED_POLL_INTERVAL,
+                cls.refresh_all_feeds
+            )
+        cls._poller.start()
+    
+    @classmethod
+    async def stop_poller(cls) -> None:
+        """Stop the feed poller, releasing leadership if this worker held it."""
+        if cls._poller is not None:
+            await cls._poller.stop()
+            cls._poller = None
+    
+    @classmethod
+    def follows_poller(cls) -> bool:
+        """Whether another worker's poller is responsible for fetching feeds."""
+        return cls._poller is not None and not cls._poller.is_leader
+    
+    @classmethod
+    def poller_stats(cls) -> Optional[Dict]:
+        """Get feed poller counters, or None if it isn't running."""
+        return cls._poller.stats() if cls._poller is not None else None
+    
+    @staticmethod
+    async def _wait_for_posts(username: str) -> bool:
+        """Wait up to the fetch timeout for the leader to store an account's posts."""
+        store = PostStore()
+        deadline = time.monotonic() + settings.RSS_FETCH_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.25)
+            if store.has_posts(username):
+                return True
+        return False
+    
+    @staticmethod
+    def cache_stats() -> Dict:
+        """Get feed cache hit/miss/stale counters."""
+        return RSSService._cache.stats()
+    
+    @staticmethod
+    def recent_posts(limit: int = settings.MAX_POSTS_FOR_CONTEXT) -> List[Post]:
+        """
+        Get the most recent stored posts across all accounts.
+        
+        Never touches the network, so it is safe to call on every chat.
+        
+        Args:
+            limit: Maximum number of posts to return
+            
+        Returns:
+            List of posts, newest first
+        """
+        return PostStore().recent_posts(limit=limit)
+    
+    @staticmethod
+    def parser_stats() -> Dict:
+        """Get counts of streamed feed parses and feedparser fallbacks."""
+        return StreamingFeedParser.stats()
+    
+    @staticmethod
+    def feed_stats() -> Dict[str, Dict]:
+        """Get conditional-fetch counters for every feed fetched so far."""
+        return {
+            username: state.stats()
+            for username, state in RSSService._feed_states.items()
+        }
+    
+    @staticmethod
+    def _ingest(username: str, content: bytes) -> List[Post]:
+        """Parse a downloaded feed and upsert its posts into the store."""
+        posts = RSSService.parse_posts(username, content)
+        PostStore().upsert_posts(posts)
+        return posts
+    
+    @staticmethod
+    def parse_posts(username: str, content: bytes) -> List[Post]:
+        """
+        Parse raw RSS content into posts.
+        
+        RSS 2.0 feeds are pull-parsed and parsing stops after
+        FEED_INGEST_LIMIT entries; other formats go through feedparser.
+        
+        Args:
+            username: Instagram account username the feed belongs to
+            content: Raw RSS document
+        
+        Returns:
+            List of posts, newest first
+        """
+        max_posts = settings.FEED_INGEST_LIMIT
+        with profile_phase("parsing"):
+            posts = StreamingFeedParser.parse(username, content, max_posts)
+            if posts is None:
+                posts = RSSService._parse_with_feedparser(username, content, max_posts)
+            
+            posts.sort(key=lambda post: post.timestamp, reverse=True)
+        return posts
+    
+    @staticmethod
+    def _parse_with_feedparser(username: str, content: bytes, max_posts: int) -> List[Post]:
+        """Parse any feed format feedparser understands, in feed order."""
+        # Only needed for feeds the streaming parser can't handle
+        import feedparser
+        
+        feed = feedparser.parse(content)
+        posts = []
+        
+        for entry in feed.entries[:max_posts]:
+            # Extract image from various possible fields
+            image = RSSService._extract_image(entry)
+            
+            # Extract published date
+            timestamp = RSSService._extract_timestamp(entry)
+            published = RSSService._extract_published_date(entry, timestamp)
+            
+            link = entry.get("link", "")
+            
+            posts.append(Post(
+                id=entry.get("id") or link,
+                title=entry.get("title", ""),
+                link=link,
+                image=image,
+                published=published,
+                account=username,
+                timestamp=timestamp,
+            ))
+        
+        return posts
+    
     @staticmethod
     def _extract_image(entry) -> str:
         """Extract image URL from feed entry."""
@@ -85,10 +670,17 @@ class RSSService:
         return ""
     
     @staticmethod
-    def _extract_published_date(entry) -> str:
-        """Extract published date from feed entry."""
-        if hasattr(entry, "published"):
+    def _extract_timestamp(entry) -> float:
+        """Extract published time from feed entry as a UTC epoch timestamp."""
+        if hasattr(entry, "published_parsed") and entry.published_parsed:
+            return float(calendar.timegm(entry.published_parsed))
+        return 0.0
+    
+    @staticmethod
+    def _extract_published_date(entry, timestamp: float = 0.0) -> str:
+        """Extract published date from feed entry as an ISO 8601 string."""
+        if timestamp:
+            return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+        elif hasattr(entry, "published"):
             return entry.published
-        elif hasattr(entry, "published_parsed") and entry.published_parsed:
-            return datetime(*entry.published_parsed[:6]).isoformat()
-        return ""
\ No newline at end of file
+        return ""
@@ -0,0 +1,208 @@
+"""
+SQLite key/value cache shared by every worker process.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from config.settings import settings
+
+
+class SharedCache:
+    """
+    Small expiring key/value store in a local SQLite file.
+    
+    Every uvicorn worker opens the same file, so something computed by
+    one worker (e.g. a chat answer) is reused by all of them instead of
+    being held and recomputed once per process. Entries live in
+    namespaces and carry an optional tag, so a group of entries (e.g.
+    answers for an outdated posts fingerprint) can be dropped at once.
+    Expiry uses wall-clock time, which all processes agree on.
+    """
+    
+    _instance: Optional['SharedCache'] = None
+    _conn: Optional[sqlite3.Connection] = None
+    
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            value BLOB NOT NULL,
+            stored_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_namespace_stored
+            ON entries (namespace, stored_at);
+    """
+    
+    # Expired and surplus entries are pruned once every this many puts
+    _PRUNE_EVERY = 50
+    
+    def __new__(cls):
+        """Singleton pattern to reuse the database connection."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        """Open the database and create the schema (only once)."""
+        if self._conn is None:
+            path = Path(settings.SHARED_CACHE_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            
+            conn = sqlite3.connect(
+                str(path), check_same_thread=False, timeout=settings.SHARED_CACHE_BUSY_TIMEOUT
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self._SCHEMA)
+            
+            self._lock = threading.Lock()
+            self._puts_since_prune = 0
+            self.hits = 0
+            self.misses = 0
+            self.writes = 0
+            self.errors = 0
+            self._conn = conn
+    
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """
+        Look up an unexpired entry.
+        
+        Args:
+            namespace: Entry namespace (e.g. "chat")
+            key: Entry key within the namespace
+        
+        Returns:
+            Stored value, or None if missing, expired or unreadable
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value FROM entries "
+                    "WHERE namespace = ? AND key = ? AND expires_at > ?",
+                    (namespace, key, time.time())
+                ).fetchone()
+        except sqlite3.Error:
+            self.errors += 1
+            return None
+        
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+    
+    def put(
+        self,
+        namespace: str,
+        key: str,
+        value: bytes,
+        ttl: float,
+        tag: str = "",
+        max_entries: int = 0
+    ) -> bool:
+        """
+        Store an entry, replacing any previous value for the key.
+        
+        Args:
+            namespace: Entry namespace
+            key: Entry key within the namespace
+            value: Value to store
+            ttl: Seconds until the entry expires
+            tag: Group label for invalidate_except()
+            max_entries: Oldest entries beyond this many are pruned (0 keeps all)
+        
+        Returns:
+            True if stored; a busy or failing database only skips the write
+        """
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(namespace, key, tag, value, stored_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (namespace, key, tag, value, now, now + ttl)
+                )
+                self._puts_since_prune += 1
+                if self._puts_since_prune >= self._PRUNE_EVERY:
+                    self._puts_since_prune = 0
+                    self._prune(namespace, now, max_entries)
+        except sqlite3.Error:
+            self.errors += 1
+            return False
+        
+        self.writes += 1
+        return True
+    
+    def delete(self, namespace: str, key: str) -> None:
+        """Drop one entry, if present."""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+                )
+        except sqlite3.Error:
+            self.errors += 1
+    
+    def invalidate_except(self, namespace: str, *tags: str) -> int:
+        """
+        Drop every entry in a namespace whose tag isn't one of the given ones.
+        
+        Args:
+            namespace: Entry namespace
+            tags: Tags of the entries to keep
+        
+        Returns:
+            Number of entries dropped
+        """
+        placeholders = ",".join("?" * len(tags))
+        condition = f" AND tag NOT IN ({placeholders})" if tags else ""
+        try:
+            with self._lock, self._conn:
+                return self._conn.execute(
+                    f"DELETE FROM entries WHERE namespace = ?{condition}",
+                    (namespace, *tags)
+                ).rowcount
+        except sqlite3.Error:
+            self.errors += 1
+            return 0
+    
+    def stats(self) -> Dict:
+        """Get entry counts and hit/miss counters for this process."""
+        with self._lock:
+            namespaces = dict(self._conn.execute(
+                "SELECT namespace, COUNT(*) FROM entries GROUP BY namespace"
+            ).fetchall())
+        lookups = self.hits + self.misses
+        return {
+            "path": settings.SHARED_CACHE_PATH,
+            "entries": namespaces,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def _prune(self, namespace: str, now: float, max_entries: int) -> None:
+        """Delete expired entries, then the oldest ones beyond max_entries."""
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        if max_entries > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM entries WHERE namespace = ? "
+                "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (namespace, namespace, max_entries)
+            )
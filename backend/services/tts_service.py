@@ -2,11 +2,17 @@
 Service for text-to-speech using ElevenLabs.
 """
 
+import asyncio
 import re
 import io
-from elevenlabs import ElevenLabs
-from typing import Optional, List, Dict, BinaryIO
+from collections import deque
+from typing import AsyncIterator, Optional, List, Dict, BinaryIO, Iterator
 from config.settings import settings
+from .upstream import get_upstream
+
+
+# Marks the end of one sentence's audio in its pipeline queue
+_SEGMENT_DONE = object()
 
 
 class TTSService:
@@ -25,7 +31,16 @@ class TTSService:
         """Initialize ElevenLabs client (only once)."""
         if self._client is None:
             settings.validate()
-            self._client = ElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
+            # Imported on first use, like the Gemini SDK, to keep cold starts fast
+            from elevenlabs import ElevenLabs
+            
+            if settings.ELEVENLABS_BASE_URL:
+                self._client = ElevenLabs(
+                    api_key=settings.ELEVENLABS_API_KEY,
+                    base_url=settings.ELEVENLABS_BASE_URL
+                )
+            else:
+                self._client = ElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
     
     @staticmethod
     def strip_markdown(text: str) -> str:
@@ -99,6 +114,161 @@ class TTSService:
         except Exception as e:
             raise Exception(f"Error generating speech: {str(e)}")
     
+    @staticmethod
+    def split_sentences(text: str) -> List[str]:
+        """
+        Split text into sentence-sized segments for pipelined synthesis.
+        
+        Very short sentences are merged into the next one so each
+        upstream request carries a useful amount of text.
+        
+        Args:
+            text: Clean text (markdown already stripped)
+            
+        Returns:
+            List of non-empty text segments in order
+        """
+        pieces = re.split(r'(?<=[.!?])\s+|\n+', text)
+        
+        segments = []
+        current = ""
+        for piece in pieces:
+            piece = piece.strip()
+            if not piece:
+                continue
+            current = f"{current} {piece}" if current else piece
+            if len(current) >= settings.TTS_MIN_SEGMENT_CHARS:
+                segments.append(current)
+                current = ""
+        
+        if current:
+            if segments:
+                segments[-1] = f"{segments[-1]} {current}"
+            else:
+                segments.append(current)
+        
+        return segments
+    
+    def stream_segment(
+        self,
+        text: str,
+        voice_id: str,
+        previous_text: Optional[str] = None,
+        next_text: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """
+        Stream audio for one segment of text as ElevenLabs produces it.
+        
+        Args:
+            text: Segment text to convert
+            voice_id: ElevenLabs voice ID
+            previous_text: Preceding segment, for natural prosody across joins
+            next_text: Following segment, for natural prosody across joins
+            
+        Yields:
+            MP3 audio chunks
+        """
+        audio_generator = self._client.text_to_speech.convert_as_stream(
+            voice_id=voice_id,
+            text=text,
+            model_id=settings.TTS_MODEL,
+            output_format=settings.TTS_OUTPUT_FORMAT,
+            previous_text=previous_text,
+            next_text=next_text
+        )
+        
+        for chunk in audio_generator:
+            if chunk:
+                yield chunk
+    
+    async def stream_speech(
+        self,
+        text: str,
+        voice_id: str = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream speech audio sentence by sentence without blocking the event loop.
+        
+        The text is split into sentences, and up to TTS_PIPELINE_DEPTH
+        sentences are synthesized at once so the next sentence is ready
+        when the current one finishes. Each sentence in flight buffers at
+        most TTS_SEGMENT_BUFFER_CHUNKS chunks, so memory per request stays
+        bounded however long the text is.
+        
+        Args:
+            text: Text to convert
+            voice_id: ElevenLabs voice ID (optional)
+            
+        Yields:
+            MP3 audio chunks in playback order
+            
+        Raises:
+            UpstreamTimeoutError: If ElevenLabs stalls
+            Exception: If TTS generation fails
+        """
+        if voice_id is None:
+            voice_id = settings.DEFAULT_VOICE_ID
+        
+        segments = self.split_sentences(self.strip_markdown(text))
+        pending = deque()
+        next_index = 0
+        
+        def start_next_segment():
+            nonlocal next_index
+            if next_index >= len(segments):
+                return
+            i = next_index
+            next_index += 1
+            queue = asyncio.Queue(maxsize=settings.TTS_SEGMENT_BUFFER_CHUNKS)
+            task = asyncio.ensure_future(self._produce_segment(
+                queue,
+                segments[i],
+                voice_id,
+                segments[i - 1] if i > 0 else None,
+                segments[i + 1] if i + 1 < len(segments) else None
+            ))
+            pending.append((task, queue))
+        
+        for _ in range(settings.TTS_PIPELINE_DEPTH):
+            start_next_segment()
+        
+        try:
+            while pending:
+                _, queue = pending[0]
+                while True:
+                    item = await queue.get()
+                    if item is _SEGMENT_DONE:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+                pending.popleft()
+                start_next_segment()
+        
+        finally:
+            for task, _ in pending:
+                task.cancel()
+    
+    async def _produce_segment(
+        self,
+        queue: asyncio.Queue,
+        text: str,
+        voice_id: str,
+        previous_text: Optional[str],
+        next_text: Optional[str]
+    ) -> None:
+        """Synthesize one segment into its bounded queue, ending with a marker or error."""
+        try:
+            async for chunk in get_upstream("tts").iterate(
+                self.stream_segment, text, voice_id, previous_text, next_text,
+                target=voice_id
+            ):
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_SEGMENT_DONE)
+    
     def get_available_voices(self) -> List[Dict[str, str]]:
         """
         Get list of available ElevenLabs voices.
@@ -122,4 +292,17 @@ class TTSService:
             ]
             
         except Exception as e:
-            raise Exception(f"Error fetching voices: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error fetching voices: {str(e)}")
+    
+    async def get_available_voices_async(self) -> List[Dict[str, str]]:
+        """
+        Get available ElevenLabs voices without blocking the event loop.
+        
+        Returns:
+            List of voice dictionaries with id, name, and category
+            
+        Raises:
+            UpstreamTimeoutError: If ElevenLabs doesn't answer in time
+            Exception: If fetching voices fails
+        """
+        return await get_upstream("tts").run(self.get_available_voices, target="voices")
\ No newline at end of file
@@ -0,0 +1,381 @@
+"""
+Bounded, non-blocking execution lanes for calls to upstream services.
+"""
+
+import asyncio
+import contextvars
+import functools
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from config.settings import settings
+from .metrics import UPSTREAM_QUEUE_WAIT, UPSTREAM_REJECTED, observe_upstream_call
+from .profiler import record_phase
+
+
+# Target for CPU work run in a lane (e.g. feed parsing) rather than a remote call
+LOCAL_WORK = "local"
+
+
+class UpstreamTimeoutError(Exception):
+    """Raised when an upstream call exceeds its timeout."""
+
+
+class UpstreamOverloadedError(Exception):
+    """
+    Raised when an upstream's wait queue is full or a call waited too long for a slot.
+    
+    Attributes:
+        retry_after: Suggested seconds before trying again
+    """
+    
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Upstream:
+    """
+    Execution lane for one upstream service (rss.app, Gemini, ElevenLabs).
+    
+    Each lane has its own concurrency limit and thread pool, so blocking
+    SDK calls run off the event loop and a slow upstream can't starve
+    the others. Calls beyond the limit wait in a queue; when the lane has
+    a max_queue, calls that find the queue full are rejected at once, and
+    calls that can't get a slot within max_queue_wait seconds give up, so
+    a burst sheds load quickly instead of piling up behind slow calls.
+    """
+    
+    # Weight of the newest call in the running average call duration
+    _DURATION_SMOOTHING = 0.2
+    
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        timeout: float,
+        max_queue: int = 0,
+        max_queue_wait: float = 0.0
+    ):
+        self.name = name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix=f"upstream-{name}"
+        )
+        self.waiting = 0
+        self.max_waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.rejected_full = 0
+        self.rejected_deadline = 0
+        self.avg_duration = 0.0
+    
+    async def run(
+        self,
+        func: Callable,
+        *args,
+        timeout: Optional[float] = None,
+        target: str = "",
+        **kwargs
+    ) -> Any:
+        """
+        Run a blocking call in this upstream's thread pool.
+        
+        The concurrency slot is held until the thread actually finishes,
+        even if the caller gives up after a timeout, so a hung SDK call
+        can never push the lane past its limit.
+        
+        Args:
+            func: Blocking callable to run
+            timeout: Seconds to wait for the result (defaults to the lane's)
+            target: Feed, model or voice the call is for (metrics label)
+        
+        Returns:
+            Whatever func returns
+        
+        Raises:
+            UpstreamTimeoutError: If the call takes longer than the timeout
+        """
+        await self._acquire()
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context into the thread (for request profiling)
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(
+            self._executor,
+            functools.partial(context.run, func, *args, **kwargs)
+        )
+        future.add_done_callback(self._release_future)
+        with self._observe(target):
+            return await self._wait(asyncio.shield(future), timeout)
+    
+    async def call(
+        self,
+        func: Callable[..., Awaitable],
+        *args,
+        timeout: Optional[float] = None,
+        target: str = "",
+        **kwargs
+    ) -> Any:
+        """
+        Await a native async call under this upstream's concurrency limit.
+        
+        Args:
+            func: Async callable to await
+            timeout: Seconds to wait for the result (defaults to the lane's)
+            target: Feed, model or voice the call is for (metrics label)
+        
+        Returns:
+            Whatever func returns
+        
+        Raises:
+            UpstreamTimeoutError: If the call takes longer than the timeout
+        """
+        async with self.slot():
+            with self._observe(target):
+                return await self._wait(func(*args, **kwargs), timeout)
+    
+    async def iterate(
+        self,
+        func: Callable,
+        *args,
+        timeout: Optional[float] = None,
+        target: str = "",
+        **kwargs
+    ) -> AsyncIterator:
+        """
+        Consume a blocking iterator in this upstream's thread pool.
+        
+        One slot is held for the whole stream and every item is fetched
+        with its own timeout, so a stalled stream fails instead of hanging.
+        A timed-out fetch keeps its slot until the thread blocked in it
+        returns, so the lane never runs more calls than its limit.
+        
+        Args:
+            func: Callable returning a blocking iterator (e.g. a generator)
+            timeout: Seconds to wait for each item (defaults to the lane's)
+            target: Feed, model or voice the call is for (metrics label)
+            
+        Yields:
+            Items produced by the iterator
+            
+        Raises:
+            UpstreamTimeoutError: If any item takes longer than the timeout
+        """
+        loop = asyncio.get_running_loop()
+        done = object()
+        pending: Optional[asyncio.Future] = None
+        failed = True
+        
+        await self._acquire()
+        try:
+            with self._observe(target):
+                iterator = iter(func(*args, **kwargs))
+                while True:
+                    pending = loop.run_in_executor(self._executor, next, iterator, done)
+                    item = await self._wait(asyncio.shield(pending), timeout)
+                    if item is done:
+                        break
+                    yield item
+            failed = False
+        except GeneratorExit:
+            # The consumer stopped early (e.g. a client disconnected)
+            failed = False
+            raise
+        finally:
+            if pending is not None and not pending.done():
+                # A thread is still blocked in next(): free the slot when it returns
+                pending.add_done_callback(functools.partial(self._release_abandoned, failed))
+            else:
+                self._release(failed)
+    
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of the block."""
+        await self._acquire()
+        try:
+            yield
+        except GeneratorExit:
+            # The consumer stopped early (e.g. a client disconnected)
+            self._release(failed=False)
+            raise
+        except BaseException:
+            self._release(failed=True)
+            raise
+        else:
+            self._release(failed=False)
+    
+    def admit(self) -> None:
+        """
+        Check that a new call would be queued rather than rejected.
+        
+        Lets streaming endpoints answer 503 before they start a response.
+        
+        Raises:
+            UpstreamOverloadedError: If all slots are busy and the queue is full
+        """
+        if self.max_queue and self.waiting >= self.max_queue and self._semaphore.locked():
+            self.rejected_full += 1
+            UPSTREAM_REJECTED.labels(self.name, "queue_full").inc()
+            raise UpstreamOverloadedError(
+                f"{self.name} is at capacity ({self.waiting} calls queued)",
+                self.retry_after()
+            )
+    
+    def retry_after(self) -> int:
+        """Estimate how many seconds the current queue needs to drain."""
+        estimate = self.avg_duration * (self.waiting + 1) / self.concurrency
+        return min(max(math.ceil(estimate), 1), 60)
+    
+    def stats(self) -> Dict:
+        """Get queue depth and call counters for this lane."""
+        started = self.completed + self.failed + self.in_flight
+        return {
+            "concurrency": self.concurrency,
+            "timeout": self.timeout,
+            "max_queue": self.max_queue,
+            "max_queue_wait": self.max_queue_wait,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "avg_wait": self.total_wait / started if started else 0.0,
+            "avg_duration": self.avg_duration,
+            "rejected_full": self.rejected_full,
+            "rejected_deadline": self.rejected_deadline,
+        }
+    
+    def shutdown(self) -> None:
+        """Stop the thread pool without waiting for running calls."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    @contextmanager
+    def _observe(self, target: str):
+        """Record the duration and outcome of the call made inside the block."""
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except UpstreamTimeoutError:
+            outcome = "timeout"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        except BaseException:
+            # Cancelled, or a stream consumer that stopped early
+            outcome = "cancelled"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            observe_upstream_call(self.name, target, outcome, elapsed)
+            if outcome == "ok" and target != LOCAL_WORK:
+                self.avg_duration += self._DURATION_SMOOTHING * (elapsed - self.avg_duration)
+            if target != LOCAL_WORK:
+                # Local work is attributed to its own phases (parsing, store)
+                record_phase("upstream_call", elapsed)
+    
+    async def _acquire(self) -> None:
+        """
+        Wait for a free slot, tracking queue depth and wait time.
+        
+        Raises:
+            UpstreamOverloadedError: If the queue is full or the wait deadline passes
+        """
+        self.admit()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        started = time.perf_counter()
+        try:
+            if self.max_queue_wait > 0 and self._semaphore.locked():
+                await asyncio.wait_for(self._semaphore.acquire(), self.max_queue_wait)
+            else:
+                await self._semaphore.acquire()
+        except asyncio.TimeoutError:
+            self.rejected_deadline += 1
+            UPSTREAM_REJECTED.labels(self.name, "deadline").inc()
+            UPSTREAM_QUEUE_WAIT.labels(self.name).observe(time.perf_counter() - started)
+            raise UpstreamOverloadedError(
+                f"{self.name} had no free slot within {self.max_queue_wait:g}s",
+                self.retry_after()
+            )
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.total_wait += waited
+        UPSTREAM_QUEUE_WAIT.labels(self.name).observe(waited)
+        record_phase("upstream_queue", waited)
+        self.in_flight += 1
+    
+    def _release(self, failed: bool) -> None:
+        """Give back a slot and count the call's outcome."""
+        self.in_flight -= 1
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self._semaphore.release()
+    
+    def _release_future(self, future: asyncio.Future) -> None:
+        """Release the slot held by a finished thread pool call."""
+        self._release(failed=future.cancelled() or future.exception() is not None)
+    
+    def _release_abandoned(self, failed: bool, future: asyncio.Future) -> None:
+        """Release the slot held by a thread pool call nobody waits for any more."""
+        if not future.cancelled():
+            # Retrieve the result so a late exception isn't logged as unhandled
+            future.exception()
+        self._release(failed)
+    
+    async def _wait(self, awaitable: Awaitable, timeout: Optional[float]) -> Any:
+        """Await a call, converting a timeout into UpstreamTimeoutError."""
+        timeout = timeout if timeout is not None else self.timeout
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise UpstreamTimeoutError(
+                f"{self.name} call timed out after {timeout:g}s"
+            )
+
+
+_upstreams: Dict[str, Upstream] = {}
+
+
+def get_upstream(name: str) -> Upstream:
+    """
+    Get the execution lane for an upstream, creating it on first use.
+    
+    Args:
+        name: Upstream name ("rss", "gemini" or "tts")
+    
+    Returns:
+        Shared Upstream instance
+    """
+    if name not in _upstreams:
+        concurrency, timeout = settings.UPSTREAM_LIMITS[name]
+        max_queue, max_queue_wait = settings.UPSTREAM_QUEUES[name]
+        _upstreams[name] = Upstream(name, concurrency, timeout, max_queue, max_queue_wait)
+    return _upstreams[name]
+
+
+def upstream_stats() -> Dict[str, Dict]:
+    """Get stats for every upstream lane used so far."""
+    return {name: upstream.stats() for name, upstream in _upstreams.items()}
+
+
+def shutdown_upstreams() -> None:
+    """Shut down every upstream lane's thread pool."""
+    for upstream in _upstreams.values():
+        upstream.shutdown()
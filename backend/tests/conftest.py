@@ -0,0 +1,19 @@
+"""
+Shared test setup: point every on-disk store at a temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are read at import time, so this has to run before any app module loads
+_DATA_DIR = tempfile.mkdtemp(prefix="stillwater-tests-")
+os.environ.setdefault("POST_STORE_PATH", os.path.join(_DATA_DIR, "posts.db"))
+os.environ.setdefault("SHARED_CACHE_PATH", os.path.join(_DATA_DIR, "shared_cache.db"))
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(_DATA_DIR, "tts_cache"))
+os.environ.setdefault("PROFILE_DIR", os.path.join(_DATA_DIR, "profiles"))
+os.environ.setdefault("FEED_POLLER", "false")
+os.environ.setdefault("FEED_POLLER_LOCK_PATH", os.path.join(_DATA_DIR, "feed_poller.lock"))
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,62 @@
+"""
+Tests for per-client rate limiting behind proxies.
+"""
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from config.settings import settings
+from services.rate_limiter import RateLimiter
+from utils import admission
+from utils.admission import client_id, enforce_rate_limit
+
+
+def _request(forwarded_for: str = None, peer: str = "10.0.0.1") -> Request:
+    headers = []
+    if forwarded_for is not None:
+        headers.append((b"x-forwarded-for", forwarded_for.encode("ascii")))
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/chat",
+        "headers": headers,
+        "client": (peer, 12345),
+    })
+
+
+@pytest.fixture
+def behind_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "TRUST_FORWARDED_FOR", True)
+    monkeypatch.setattr(settings, "FORWARDED_PROXY_HOPS", 1)
+
+
+def test_client_id_uses_address_seen_by_trusted_proxy(behind_proxy):
+    assert client_id(_request("1.2.3.4, 203.0.113.7")) == "203.0.113.7"
+
+
+def test_client_id_counts_trusted_hops(behind_proxy, monkeypatch):
+    monkeypatch.setattr(settings, "FORWARDED_PROXY_HOPS", 2)
+    assert client_id(_request("6.6.6.6, 203.0.113.7, 10.1.1.1")) == "203.0.113.7"
+    # Too few entries means the request didn't come through every proxy
+    assert client_id(_request("203.0.113.7")) == "10.0.0.1"
+
+
+def test_client_id_ignores_header_unless_trusted():
+    assert client_id(_request("1.2.3.4")) == "10.0.0.1"
+
+
+def test_spoofed_forwarded_for_cannot_bypass_limit(behind_proxy, monkeypatch):
+    limiter = RateLimiter("chat", per_minute=1, burst=2)
+    monkeypatch.setattr(admission, "get_rate_limiter", lambda name: limiter)
+    
+    statuses = []
+    for i in range(6):
+        # The client invents a new first hop every time; the proxy appends its real address
+        request = _request(f"198.51.100.{i}, 203.0.113.7")
+        try:
+            enforce_rate_limit(request, "chat")
+            statuses.append(200)
+        except HTTPException as e:
+            statuses.append(e.status_code)
+    
+    assert statuses == [200, 200, 429, 429, 429, 429]
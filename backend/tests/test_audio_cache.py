@@ -0,0 +1,44 @@
+"""
+Tests that the TTS audio cache's size cap covers the shared directory.
+"""
+
+import os
+import time
+import pytest
+from config.settings import settings
+from services.audio_cache import AudioCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "TTS_CACHE_MAX_BYTES", 250)
+    AudioCache._instance = None
+    AudioCache._index = None
+    yield AudioCache()
+    AudioCache._instance = None
+    AudioCache._index = None
+
+
+def store(cache: AudioCache, key: str, size: int) -> None:
+    writer = cache.writer(key)
+    writer.write(b"\0" * size)
+    writer.commit()
+
+
+def test_cap_counts_files_written_by_other_workers(cache):
+    store(cache, "a" * 64, 100)
+    
+    # Another worker sharing the directory adds two files this one never saw
+    for index, key in enumerate(("b" * 64, "c" * 64)):
+        cache.path(key).write_bytes(b"\0" * 100)
+        os.utime(cache.path(key), (time.time() - 10 + index, time.time() - 10 + index))
+    os.utime(cache.path("a" * 64), (time.time() - 20, time.time() - 20))
+    
+    store(cache, "d" * 64, 100)
+    
+    on_disk = sum(path.stat().st_size for path in cache.directory.glob("*.mp3"))
+    assert on_disk <= settings.TTS_CACHE_MAX_BYTES
+    assert not cache.path("a" * 64).exists()
+    assert cache.path("d" * 64).exists()
+    assert cache.stats()["bytes"] == on_disk
@@ -0,0 +1,36 @@
+"""
+Tests for the chat answer cache's invalidation policy.
+"""
+
+import pytest
+from services.chat_cache import ChatCache
+
+
+@pytest.fixture
+def cache():
+    ChatCache._instance = None
+    yield ChatCache()
+    ChatCache._instance = None
+
+
+def test_answer_survives_other_fingerprint(cache):
+    cache.put("What's on tonight?", "current", "Live music downtown.")
+    # A pinned snapshot or legacy upload stores under its own fingerprint
+    cache.put("Anything else?", "uploaded-by-old-client", "Not much.")
+    
+    assert cache.get("what's on TONIGHT", "current") == "Live music downtown."
+    assert cache.get("anything else", "uploaded-by-old-client") == "Not much."
+    assert cache.stats()["invalidations"] == 0
+
+
+def test_retain_drops_only_unused_post_sets(cache):
+    cache.put("Game day plans?", "old", "Tailgate at noon.")
+    cache.put("Game day plans?", "pinned", "Tailgate at one.")
+    cache.put("Game day plans?", "new", "Tailgate at two.")
+    
+    cache.retain({"pinned", "new"})
+    
+    assert cache.get("Game day plans?", "old") is None
+    assert cache.get("Game day plans?", "pinned") == "Tailgate at one."
+    assert cache.get("Game day plans?", "new") == "Tailgate at two."
+    assert cache.stats()["invalidations"] == 1
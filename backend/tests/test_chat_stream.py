@@ -0,0 +1,50 @@
+"""
+Tests for how /chat/stream reports failures.
+"""
+
+import asyncio
+from fastapi.testclient import TestClient
+from routers import chat
+
+
+def test_error_before_stream_starts_is_a_500(monkeypatch):
+    import main
+    
+    async def broken_snapshot(request):
+        raise RuntimeError("post store unavailable")
+    
+    monkeypatch.setattr(chat, "GeminiService", lambda: object())
+    monkeypatch.setattr(chat, "_resolve_snapshot", broken_snapshot)
+    
+    response = TestClient(main.app, raise_server_exceptions=False).post(
+        "/chat/stream", json={"message": "hi"}
+    )
+    assert response.status_code == 500
+    assert "post store unavailable" in response.json()["detail"]
+
+
+def test_empty_answer_is_an_error_and_not_cached(monkeypatch):
+    from services.chat_cache import ChatCache
+    
+    class SilentGemini:
+        async def stream_response_async(self, **kwargs):
+            return
+            yield
+    
+    class RecordingSessions:
+        turns = []
+        
+        def add_turn(self, session, message, answer):
+            self.turns.append(answer)
+    
+    monkeypatch.setattr(chat, "ChatSessionStore", RecordingSessions)
+    context = chat.PromptContext("", [], 0, 0, 0)
+    
+    async def collect():
+        events = chat._stream_events(SilentGemini(), "blocked?", context, "fp-empty", None, "")
+        return [event async for event in events]
+    
+    events = asyncio.run(collect())
+    assert events[-1].startswith("event: error\n")
+    assert RecordingSessions.turns == []
+    assert ChatCache().get("blocked?", "fp-empty") is None
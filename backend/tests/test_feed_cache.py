@@ -0,0 +1,22 @@
+"""
+Tests for the per-account feed cache counters.
+"""
+
+import asyncio
+from services.rss_service import FeedCache
+
+
+def test_background_miss_counts_as_miss():
+    async def fetch():
+        return [{"id": "1"}]
+    
+    async def scenario():
+        cache = FeedCache(ttl=60, stale_ttl=60)
+        assert await cache.get("stillwater", fetch, wait=False) is None
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert await cache.get("stillwater", fetch, wait=False) == [{"id": "1"}]
+        return cache
+    
+    cache = asyncio.run(scenario())
+    assert (cache.hits, cache.misses, cache.stale) == (1, 1, 0)
@@ -0,0 +1,63 @@
+"""
+Tests for catching /posts/stream clients up on missed posts.
+"""
+
+import asyncio
+from typing import List
+import pytest
+from models.post import Post
+from services.post_broadcaster import PostBroadcaster
+from services.post_store import PostStore
+from utils.feed_cursor import encode_cursor
+
+
+@pytest.fixture
+def broadcaster():
+    PostBroadcaster._instance = None
+    PostBroadcaster._subscribers = None
+    yield PostBroadcaster()
+    PostBroadcaster._instance = None
+    PostBroadcaster._subscribers = None
+
+
+def add_posts(prefix: str, count: int) -> List[Post]:
+    posts = [
+        Post(f"{prefix}-{index}", f"Post {index}", "", "", "", "stillwater", 0.0)
+        for index in range(count)
+    ]
+    for post in posts:
+        PostStore().upsert_posts([post])
+    return posts
+
+
+def replay(broadcaster: PostBroadcaster, since: int, until: int) -> bytes:
+    async def collect():
+        return [payload async for payload in broadcaster._replay(since, until)]
+    
+    return b"".join(asyncio.run(collect()))
+
+
+def test_store_replay_stops_at_until(broadcaster):
+    since = PostStore().latest_seq
+    add_posts("replay", 3)
+    until = since + 2
+    
+    body = replay(broadcaster, since, until)
+    assert f"id: {encode_cursor(until)}\n".encode("ascii") in body
+    assert encode_cursor(until + 1).encode("ascii") not in body
+    assert b"replay-1" in body and b"replay-2" not in body
+
+
+def test_ring_replay_skips_posts_before_cursor_inside_event(broadcaster):
+    start = PostStore().latest_seq
+    posts = add_posts("ring", 3)
+    end = start + 3
+    # One broadcast event covering all three posts
+    broadcaster._ring.append((start, end, broadcaster._encode(end, posts)))
+    
+    # A cursor from /posts/all taken after the first post was ingested
+    body = replay(broadcaster, start + 1, end)
+    assert b"ring-0" not in body
+    assert b"ring-1" in body and b"ring-2" in body
+    assert f"id: {encode_cursor(end)}\n".encode("ascii") in body
+    assert broadcaster.stats()["buffer_resumes"] == 1
@@ -0,0 +1,32 @@
+"""
+Tests that reading request profiles requires the profile token.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from config.settings import settings
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import main
+    
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "secret")
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("path", ["/profiles/slowest", "/profiles/abc123"])
+@pytest.mark.parametrize("headers", [{}, {"X-Profile": "wrong"}])
+def test_profiles_require_token(client, path, headers):
+    assert client.get(path, headers=headers).status_code == 403
+
+
+def test_profiles_readable_with_token(client):
+    headers = {"X-Profile": "secret"}
+    assert client.get("/profiles/slowest", headers=headers).status_code == 200
+    assert client.get("/profiles/abc123", headers=headers).status_code == 404
+
+
+def test_profiles_closed_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "")
+    assert client.get("/profiles/slowest", headers={"X-Profile": ""}).status_code == 403
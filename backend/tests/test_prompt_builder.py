@@ -0,0 +1,37 @@
+"""
+Tests for the token-budgeted posts context.
+"""
+
+import pytest
+from models.post import Post
+from services.prompt_builder import PromptBuilder
+
+
+def make_post(index: int, caption: str) -> Post:
+    return Post(f"p{index}", caption, "", "", "", "stillwater", float(index))
+
+
+@pytest.fixture
+def builder():
+    PromptBuilder._instance = None
+    PromptBuilder._fragments = None
+    yield PromptBuilder()
+    PromptBuilder._instance = None
+    PromptBuilder._fragments = None
+
+
+def test_caption_appears_once(builder):
+    context = builder.build([make_post(1, "Morning swim at the lake")], budget=0)
+    assert context.text.count("Morning swim at the lake") == 1
+
+
+def test_budget_is_never_exceeded(builder):
+    posts = [make_post(i, "word " * 200) for i in range(3)]
+    for budget in (5, 40, 120):
+        context = builder.build(posts, budget=budget)
+        assert context.tokens <= budget
+
+
+def test_nothing_fits_gives_empty_block(builder):
+    context = builder.build([make_post(1, "word " * 200)], budget=5)
+    assert (context.text, context.posts, context.dropped) == ("", [], 1)
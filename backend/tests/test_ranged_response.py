@@ -0,0 +1,23 @@
+"""
+Tests for Range header parsing on cached audio responses.
+"""
+
+import pytest
+from utils.ranged_response import _parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=5-", (5, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=90-500", (90, 99)),
+    ("bytes=5-3", (0, 99)),
+    ("bytes=0-0,5-9", (0, 99)),
+])
+def test_satisfiable_or_ignored_ranges(header, expected):
+    assert _parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-200", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    assert _parse_range(header, 100) is None
@@ -0,0 +1,34 @@
+"""
+Tests for request validation of posts uploaded by older clients.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from models.post import Post
+from models.schemas import ChatRequest
+
+
+@pytest.mark.parametrize("timestamp", ["abc", [1], {"at": 1}, "nan"])
+def test_bad_uploaded_timestamp_is_rejected(timestamp):
+    with pytest.raises(ValidationError, match="timestamp must be a number"):
+        ChatRequest(message="hi", posts=[{"link": "https://x", "timestamp": timestamp}])
+
+
+def test_numeric_uploaded_timestamps_are_accepted():
+    request = ChatRequest(
+        message="hi",
+        posts=[{"link": "https://a", "timestamp": "1700000000.5"}, {"link": "https://b"}]
+    )
+    assert [Post.from_dict(post).timestamp for post in request.posts] == [1700000000.5, 0.0]
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+def test_bad_uploaded_timestamp_is_a_client_error(path):
+    import main
+    
+    # No lifespan, so nothing polls the real feeds
+    response = TestClient(main.app).post(
+        path, json={"message": "hi", "posts": [{"link": "https://x", "timestamp": "abc"}]}
+    )
+    assert response.status_code == 422
@@ -0,0 +1,49 @@
+"""
+Tests for the upstream execution lanes.
+"""
+
+import asyncio
+import threading
+import pytest
+from services.upstream import Upstream, UpstreamTimeoutError
+
+
+def test_timed_out_stream_keeps_slot_until_thread_returns():
+    release = threading.Event()
+    
+    def stalled():
+        yield "first"
+        release.wait(5)
+        yield "late"
+    
+    async def scenario():
+        lane = Upstream("test", concurrency=1, timeout=0.05)
+        items = []
+        with pytest.raises(UpstreamTimeoutError):
+            async for item in lane.iterate(stalled):
+                items.append(item)
+        assert items == ["first"]
+        # The executor thread is still inside next(), so the slot is too
+        assert lane.in_flight == 1
+        
+        release.set()
+        for _ in range(100):
+            if lane.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert lane.in_flight == 0
+        assert lane.failed == 1
+        lane.shutdown()
+    
+    asyncio.run(scenario())
+
+
+def test_finished_stream_releases_slot():
+    async def scenario():
+        lane = Upstream("test", concurrency=1, timeout=1)
+        items = [item async for item in lane.iterate(lambda: iter([1, 2, 3]))]
+        assert items == [1, 2, 3]
+        assert (lane.in_flight, lane.completed) == (0, 1)
+        lane.shutdown()
+    
+    asyncio.run(scenario())
@@ -1,5 +1,10 @@
 """Utility functions and helpers."""
 
 from .cgi_fix import apply_cgi_fix
+from .cached_response import cached_json_response
+from .fast_json import dumps
+from .metrics_middleware import MetricsMiddleware
+from .profiling_middleware import ProfilingMiddleware
+from .ranged_response import ranged_file_response
 
-__all__ = ['apply_cgi_fix']
\ No newline at end of file
+__all__ = ['apply_cgi_fix', 'cached_json_response', 'dumps', 'MetricsMiddleware', 'ProfilingMiddleware', 'ranged_file_response']
\ No newline at end of file
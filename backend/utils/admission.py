@@ -0,0 +1,68 @@
+"""
+Fast 429 / 503 responses for rate-limited and shed requests.
+"""
+
+import math
+from fastapi import HTTPException, Request
+from config.settings import settings
+from services.rate_limiter import get_rate_limiter
+from services.upstream import UpstreamOverloadedError
+
+
+def client_id(request: Request) -> str:
+    """
+    Identify the client a request comes from, for rate limiting.
+    
+    With TRUST_FORWARDED_FOR set (behind proxies that append to
+    X-Forwarded-For), uses the address the outermost of the
+    FORWARDED_PROXY_HOPS trusted proxies saw. Entries to the left of it
+    were written by the client and can't be trusted. Otherwise, or if
+    the header has fewer entries than trusted hops, uses the peer address.
+    """
+    if settings.TRUST_FORWARDED_FOR:
+        forwarded = [
+            address.strip()
+            for address in request.headers.get("x-forwarded-for", "").split(",")
+            if address.strip()
+        ]
+        hops = settings.FORWARDED_PROXY_HOPS
+        if hops > 0 and len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+def enforce_rate_limit(request: Request, name: str) -> None:
+    """
+    Charge a request against its client's rate limit.
+    
+    Args:
+        request: Incoming request
+        name: Limit name ("chat" or "tts")
+    
+    Raises:
+        HTTPException: 429 with Retry-After if the client is over its limit
+    """
+    wait = get_rate_limiter(name).acquire(client_id(request))
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please slow down",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+
+def overloaded(error: UpstreamOverloadedError) -> HTTPException:
+    """
+    Build the 503 response for a call shed by an upstream lane.
+    
+    Args:
+        error: The lane's rejection
+    
+    Returns:
+        HTTPException with Retry-After, ready to raise
+    """
+    return HTTPException(
+        status_code=503,
+        detail=f"Service busy: {error}",
+        headers={"Retry-After": str(error.retry_after)}
+    )
\ No newline at end of file
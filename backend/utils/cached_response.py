@@ -0,0 +1,118 @@
+"""
+JSON responses with strong ETags, Cache-Control and content compression.
+"""
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+from config.settings import settings
+from services.profiler import profile_phase
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+_ENCODING_SUFFIXES = ("-br", "-gzip")
+_MAX_COMPRESSED_ENTRIES = 32
+_compressed: 'OrderedDict[Tuple[str, str], bytes]' = OrderedDict()
+
+
+def cached_json_response(
+    request: Request,
+    body: bytes,
+    cache_control: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serve a JSON body with validators, honoring If-None-Match.
+    
+    The ETag is a hash of the body, so it changes exactly when the data
+    does. Bodies over HTTP_COMPRESS_MIN_BYTES are sent brotli or gzip
+    compressed (whichever the client accepts, brotli first), and each
+    encoding gets its own strong ETag as RFC 9110 requires. Compressed
+    bodies are kept for reuse until the data changes.
+    
+    Args:
+        request: Incoming request
+        body: Serialized JSON
+        cache_control: Cache-Control header value
+        headers: Extra response headers (sent on 304s too)
+    
+    Returns:
+        200 response with the body, or 304 if the client's copy is current
+    """
+    tag = hashlib.sha256(body).hexdigest()[:32]
+    encoding = _choose_encoding(request, len(body))
+    suffix = f"-{encoding}" if encoding else ""
+    
+    base_headers = {
+        "ETag": f'"{tag}{suffix}"',
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+        **(headers or {})
+    }
+    
+    if _matches(request.headers.get("if-none-match", ""), tag):
+        return Response(status_code=304, headers=base_headers)
+    
+    if encoding:
+        body = _compress(tag, encoding, body)
+        base_headers["Content-Encoding"] = encoding
+    
+    return Response(content=body, media_type="application/json", headers=base_headers)
+
+
+def _choose_encoding(request: Request, size: int) -> Optional[str]:
+    """Pick the best content encoding the client accepts, if worth compressing."""
+    if size < settings.HTTP_COMPRESS_MIN_BYTES:
+        return None
+    
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("accept-encoding", "").split(",")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(tag: str, encoding: str, body: bytes) -> bytes:
+    """Compress a body, reusing the result for identical data."""
+    key = (tag, encoding)
+    data = _compressed.get(key)
+    if data is None:
+        with profile_phase("compression"):
+            if encoding == "br":
+                data = brotli.compress(body, quality=5)
+            else:
+                data = gzip.compress(body, compresslevel=6)
+        _compressed[key] = data
+        while len(_compressed) > _MAX_COMPRESSED_ENTRIES:
+            _compressed.popitem(last=False)
+    else:
+        _compressed.move_to_end(key)
+    return data
+
+
+def _matches(header: str, tag: str) -> bool:
+    """Check If-None-Match against a body hash, for any of its encodings."""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        for suffix in _ENCODING_SUFFIXES:
+            if candidate.endswith(suffix):
+                candidate = candidate[:-len(suffix)]
+                break
+        if candidate == tag:
+            return True
+    return False
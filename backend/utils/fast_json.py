@@ -0,0 +1,44 @@
+"""
+Fast JSON encoding for API payloads, with a standard library fallback.
+"""
+
+import json
+from typing import Any
+from services.profiler import profile_phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def dumps(payload: Any) -> bytes:
+    """
+    Serialize a payload to compact UTF-8 JSON.
+    
+    Uses orjson when it is installed, which encodes dataclasses such as
+    Post natively; otherwise falls back to the json module, converting
+    objects through their to_dict() method.
+    
+    Args:
+        payload: Data to serialize (lists, dicts, Post records, ...)
+    
+    Returns:
+        Encoded JSON bytes
+    """
+    with profile_phase("serialization"):
+        if orjson is not None:
+            return orjson.dumps(payload)
+        return json.dumps(
+            payload,
+            default=_to_dict,
+            ensure_ascii=False,
+            separators=(",", ":")
+        ).encode("utf-8")
+
+
+def _to_dict(obj: Any) -> Any:
+    """Convert objects the json module can't encode on its own."""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
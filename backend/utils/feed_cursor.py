@@ -0,0 +1,42 @@
+"""
+Opaque cursors into the post store's ingest sequence.
+"""
+
+import base64
+import binascii
+
+_PREFIX = "p1:"
+
+
+def encode_cursor(seq: int) -> str:
+    """
+    Wrap an ingest sequence number in an opaque, URL-safe cursor.
+    
+    Clients only pass cursors back, so the format can change later;
+    the prefix versions it.
+    """
+    raw = f"{_PREFIX}{seq}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Get the ingest sequence number back out of a cursor.
+    
+    Args:
+        cursor: Value from an X-Posts-Cursor header
+    
+    Returns:
+        Sequence number
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    
+    if not raw.startswith(_PREFIX) or not raw[len(_PREFIX):].isdigit():
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return int(raw[len(_PREFIX):])
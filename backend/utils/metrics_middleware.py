@@ -0,0 +1,68 @@
+"""
+ASGI middleware recording request latency and in-flight counts.
+"""
+
+import time
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+from services.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request per route template and status.
+    
+    Written as plain ASGI rather than BaseHTTPMiddleware so streaming
+    responses pass through untouched, and so the duration covers the
+    whole body (the last SSE event or audio chunk), not just the headers.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        route = route_template(scope)
+        status = 500
+        
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(
+                time.perf_counter() - started
+            )
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Find the path template of the route serving a request.
+    
+    Args:
+        scope: ASGI scope of an HTTP request to the app
+    
+    Returns:
+        The route's path (e.g. "/tts/audio/{key}"), or "unmatched"
+    """
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    # Unknown paths share one label so scanners can't blow up cardinality
+    return partial or "unmatched"
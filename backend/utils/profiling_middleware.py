@@ -0,0 +1,67 @@
+"""
+ASGI middleware that profiles requests on demand or by sampling.
+"""
+
+import hmac
+import random
+import time
+from starlette.types import ASGIApp, Receive, Scope, Send
+from config.settings import settings
+from services.profiler import RequestProfiler
+from utils.metrics_middleware import route_template
+
+# Introspection endpoints are never profiled (reading /profiles sends X-Profile too)
+_UNPROFILED_PREFIXES = ("/metrics", "/stats", "/profiles")
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that ask for it or are picked by sampling.
+    
+    A request asks for a profile by sending X-Profile with the configured
+    PROFILE_TOKEN; without a token the header is ignored, so profiling
+    can't be triggered by arbitrary clients. Profiled responses carry an
+    X-Profile-Id header naming the stored profile.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        profiler = RequestProfiler()
+        profile = profiler.begin(scope["method"], scope["path"], route_template(scope))
+        status = 500
+        
+        async def send_with_profile_id(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile.id.encode("latin-1")),
+                ]
+            await send(message)
+        
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await profiler.finish(profile, time.perf_counter() - started, status)
+    
+    @staticmethod
+    def _wanted(scope: Scope) -> bool:
+        """Decide whether to profile a request."""
+        if scope["path"].startswith(_UNPROFILED_PREFIXES):
+            return False
+        
+        if settings.PROFILE_TOKEN:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return hmac.compare_digest(value, settings.PROFILE_TOKEN.encode("latin-1"))
+        
+        rate = settings.PROFILE_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
@@ -0,0 +1,118 @@
+"""
+File responses with ETag revalidation and HTTP Range support.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CHUNK_SIZE = 64 * 1024
+
+
+def ranged_file_response(
+    request: Request,
+    path: Path,
+    media_type: str,
+    etag: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serve a file honoring If-None-Match, Range and If-Range.
+    
+    Only single byte ranges are supported; multi-range requests get the
+    whole file, which is allowed by RFC 9110.
+    
+    Args:
+        request: Incoming request
+        path: File to serve
+        media_type: Content type of the file
+        etag: Strong entity tag (including quotes) for the file
+        headers: Extra response headers
+    
+    Returns:
+        200, 206, 304 or 416 response
+    """
+    base_headers = {"ETag": etag, "Accept-Ranges": "bytes", **(headers or {})}
+    
+    if etag in _parse_etags(request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=base_headers)
+    
+    size = path.stat().st_size
+    start, end = 0, size - 1
+    status_code = 200
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return Response(
+                status_code=416,
+                headers={**base_headers, "Content-Range": f"bytes */{size}"}
+            )
+        if byte_range != (start, end):
+            start, end = byte_range
+            status_code = 206
+            base_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    
+    base_headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _read_range(path, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=base_headers
+    )
+
+
+def _parse_etags(header: str) -> set:
+    """Split an If-None-Match header into its entity tags."""
+    return {tag.strip() for tag in header.split(",") if tag.strip()}
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple]:
+    """
+    Parse a single-range Range header into inclusive byte offsets.
+    
+    Returns:
+        (start, end) tuple, the whole file for unsupported or invalid
+        forms, or None if the range starts past the end of the file
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return (0, size - 1)
+    
+    first, last = match.groups()
+    if not first and not last:
+        return (0, size - 1)
+    
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return None
+        return (max(size - length, 0), size - 1)
+    
+    start = int(first)
+    if start >= size:
+        return None
+    if last and int(last) < start:
+        # Invalid range-spec (e.g. bytes=5-3): ignore the header, per RFC 9110
+        return (0, size - 1)
+    end = min(int(last), size - 1) if last else size - 1
+    return (start, end)
+
+
+def _read_range(path: Path, start: int, end: int) -> Iterator[bytes]:
+    """Read a byte range from a file in chunks."""
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -1,7 +1,13 @@
 'use client';
 
-import { useState, useEffect } from 'react';
-import { fetchPostsFromAllAccounts, getAccountNames } from '@/lib/rss';
+import { useState, useEffect, useRef } from 'react';
+import {
+  fetchNewPosts,
+  fetchPostsFromAllAccounts,
+  getAccountNames,
+  mergePosts,
+  subscribeToNewPosts,
+} from '@/lib/rss';
 import { useInstagramEmbed } from '@/hooks/useInstagramEmbed';
 import Header from '@/components/Header';
 import Footer from '@/components/Footer';
@@ -12,12 +18,18 @@ import LoadingState from '@/components/LoadingState';
 import ErrorState from '@/components/ErrorState';
 import type { Post } from '@/lib/rss';
 
+const POLL_INTERVAL_MS = 60_000;
+
 export default function Home() {
   const [posts, setPosts] = useState<Post[]>([]);
+  const [snapshotId, setSnapshotId] = useState<string | null>(null);
   const [accounts, setAccounts] = useState<string[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [selectedAccounts, setSelectedAccounts] = useState<string[]>([]);
+  const [loaded, setLoaded] = useState(false);
+  // Position in the backend's ingest order, for fetching only new posts
+  const cursorRef = useRef<string | null>(null);
 
   // Use Instagram embed hook
   useInstagramEmbed([posts]);
@@ -27,10 +39,13 @@ export default function Home() {
     const loadData = async () => {
       try {
         setLoading(true);
-        const fetchedPosts = await fetchPostsFromAllAccounts();
+        const { posts: fetchedPosts, snapshotId, cursor } = await fetchPostsFromAllAccounts();
         const fetchedAccounts = getAccountNames();
         setPosts(fetchedPosts);
+        setSnapshotId(snapshotId);
+        cursorRef.current = cursor;
         setAccounts(fetchedAccounts);
+        setLoaded(true);
       } catch (err) {
         setError('Failed to load Instagram posts.');
       } finally {
@@ -40,6 +55,43 @@ export default function Home() {
     loadData();
   }, []);
 
+  // Add newly ingested posts to the grid in place: pushed over the live stream,
+  // or polled if the stream isn't available
+  useEffect(() => {
+    if (!loaded || !cursorRef.current) return;
+
+    let timer: ReturnType<typeof setInterval> | null = null;
+    const poll = () => {
+      timer = setInterval(async () => {
+        if (!cursorRef.current) return;
+        try {
+          const { posts: newPosts, cursor } = await fetchNewPosts(cursorRef.current);
+          cursorRef.current = cursor;
+          if (newPosts.length > 0) {
+            setPosts((prev) => mergePosts(prev, newPosts));
+          }
+        } catch {
+          // Keep the posts already shown; the next poll retries from the same cursor
+        }
+      }, POLL_INTERVAL_MS);
+    };
+
+    const source = subscribeToNewPosts(
+      cursorRef.current,
+      (newPosts, cursor) => {
+        cursorRef.current = cursor;
+        setPosts((prev) => mergePosts(prev, newPosts));
+      },
+      poll
+    );
+    if (!source) poll();
+
+    return () => {
+      source?.close();
+      if (timer) clearInterval(timer);
+    };
+  }, [loaded]);
+
   // Filter posts based on selected accounts
   const filteredPosts = selectedAccounts.length > 0
     ? posts.filter(post => selectedAccounts.includes(post.account))
@@ -90,7 +142,7 @@ export default function Home() {
       <Footer />
 
       {/* Chat Window - Floating on right side */}
-      <ChatWindow posts={posts} />
+      <ChatWindow snapshotId={snapshotId} />
     </div>
   );
 }
\ No newline at end of file
@@ -11,7 +11,6 @@ import {
   Loader2,
   Mic,
 } from "lucide-react";
-import type { Post } from "@/lib/rss";
 
 interface Message {
   id: string;
@@ -21,7 +20,7 @@ interface Message {
 }
 
 interface ChatWindowProps {
-  posts?: Post[];
+  snapshotId?: string | null;
 }
 
 interface Voice {
@@ -111,7 +110,81 @@ function renderMarkdown(text: string): JSX.Element {
   );
 }
 
-export default function ChatWindow({ posts = [] }: ChatWindowProps) {
+/**
+ * Raised when the backend sheds a request (429 rate limited / 503 busy)
+ */
+class BusyError extends Error {
+  constructor(public retryAfter: number) {
+    super(`Busy, try again in ${retryAfter}s`);
+  }
+}
+
+/**
+ * Turn a 429/503 response into a BusyError carrying its Retry-After delay
+ */
+function busyError(response: Response): BusyError | null {
+  if (response.status !== 429 && response.status !== 503) return null;
+  const retryAfter = parseInt(response.headers.get("Retry-After") || "", 10);
+  return new BusyError(Number.isFinite(retryAfter) ? retryAfter : 10);
+}
+
+/**
+ * Message shown to the user when a request is shed
+ */
+function busyMessage(error: BusyError): string {
+  return `The assistant is busy right now. Please try again in ${error.retryAfter} seconds.`;
+}
+
+/**
+ * Whether the browser can play MP3 audio while it is still downloading
+ */
+function canStreamAudio(): boolean {
+  return (
+    typeof window !== "undefined" &&
+    "MediaSource" in window &&
+    MediaSource.isTypeSupported("audio/mpeg")
+  );
+}
+
+/**
+ * Feed a streamed MP3 response into a MediaSource so playback can start
+ * after the first sentence instead of after the whole answer
+ */
+function streamAudioUrl(body: ReadableStream<Uint8Array>): string {
+  const mediaSource = new MediaSource();
+
+  mediaSource.addEventListener(
+    "sourceopen",
+    async () => {
+      const sourceBuffer = mediaSource.addSourceBuffer("audio/mpeg");
+      const reader = body.getReader();
+
+      const append = (chunk: Uint8Array) =>
+        new Promise<void>((resolve) => {
+          sourceBuffer.addEventListener("updateend", () => resolve(), {
+            once: true,
+          });
+          sourceBuffer.appendBuffer(chunk);
+        });
+
+      try {
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          await append(value);
+        }
+        mediaSource.endOfStream();
+      } catch (error) {
+        // Playback was stopped or the stream failed - nothing left to append
+      }
+    },
+    { once: true }
+  );
+
+  return URL.createObjectURL(mediaSource);
+}
+
+export default function ChatWindow({ snapshotId = null }: ChatWindowProps) {
   const [isOpen, setIsOpen] = useState(false);
   const [messages, setMessages] = useState<Message[]>([]);
   const [input, setInput] = useState("");
@@ -130,6 +203,10 @@ export default function ChatWindow({ posts = [] }: ChatWindowProps) {
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const inputRef = useRef<HTMLTextAreaElement>(null);
   const audioRef = useRef<HTMLAudioElement | null>(null);
+  // Cached audio URLs by message and voice, so replays can seek without re-synthesizing
+  const audioUrlsRef = useRef<Record<string, string>>({});
+  // Server-side chat session, so follow-up questions keep the conversation's context
+  const sessionIdRef = useRef<string | null>(null);
 
   const suggestedPrompts = [
     "What events are happening this week?",
@@ -221,37 +298,88 @@ export default function ChatWindow({ posts = [] }: ChatWindowProps) {
     setInput("");
     setIsLoading(true);
 
+    const assistantId = (Date.now() + 1).toString();
+    let started = false;
+
+    // Append streamed text to the assistant message, creating it on the first chunk
+    const appendToAssistant = (text: string) => {
+      if (!started) {
+        started = true;
+        setIsLoading(false);
+        setMessages((prev) => [
+          ...prev,
+          { id: assistantId, role: "assistant", content: text, timestamp: new Date() },
+        ]);
+        return;
+      }
+      setMessages((prev) =>
+        prev.map((m) =>
+          m.id === assistantId ? { ...m, content: m.content + text } : m
+        )
+      );
+    };
+
     try {
       const API_URL = getApiUrl();
-      const response = await fetch(`${API_URL}/chat`, {
+      const response = await fetch(`${API_URL}/chat/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           message: userMessage.content,
-          posts: posts,
+          snapshot_id: snapshotId,
+          session_id: sessionIdRef.current,
         }),
       });
 
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
+      if (!response.ok || !response.body) {
+        throw busyError(response) || new Error(`HTTP error! status: ${response.status}`);
       }
+      sessionIdRef.current = response.headers.get("X-Chat-Session") || sessionIdRef.current;
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      // Parse Server-Sent Events: blocks separated by a blank line
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop() || "";
+
+        for (const block of events) {
+          let event = "message";
+          let data = "";
+          for (const line of block.split("\n")) {
+            if (line.startsWith("event: ")) event = line.slice(7);
+            else if (line.startsWith("data: ")) data += line.slice(6);
+          }
 
-      const data = await response.json();
-
-      const assistantMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        role: "assistant",
-        content: data.response,
-        timestamp: new Date(),
-      };
+          if (event === "error") {
+            const detail = JSON.parse(data);
+            throw detail.retry_after
+              ? new BusyError(detail.retry_after)
+              : new Error(detail.detail);
+          }
+          if (event === "message" && data) {
+            appendToAssistant(JSON.parse(data).text);
+          }
+        }
+      }
 
-      setMessages((prev) => [...prev, assistantMessage]);
+      if (!started) {
+        throw new Error("Empty response");
+      }
     } catch (error) {
       const errorMessage: Message = {
-        id: (Date.now() + 1).toString(),
+        id: (Date.now() + 2).toString(),
         role: "assistant",
         content:
-          "Sorry, I encountered an error connecting to the AI. Please make sure the backend is running.",
+          error instanceof BusyError
+            ? busyMessage(error)
+            : "Sorry, I encountered an error connecting to the AI. Please make sure the backend is running.",
         timestamp: new Date(),
       };
       setMessages((prev) => [...prev, errorMessage]);
@@ -271,39 +399,59 @@ export default function ChatWindow({ posts = [] }: ChatWindowProps) {
 
     try {
       const API_URL = getApiUrl();
-      const response = await fetch(`${API_URL}/tts`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          text: text,
-          voice_id: selectedVoice, // Use selected voice
-        }),
-      });
+      const cacheKey = `${messageId}:${selectedVoice}`;
+      const cachedUrl = audioUrlsRef.current[cacheKey];
+      let audioUrl: string;
+      let objectUrl: string | null = null;
+
+      if (cachedUrl) {
+        audioUrl = `${API_URL}${cachedUrl}`;
+      } else {
+        const response = await fetch(`${API_URL}/tts`, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({
+            text: text,
+            voice_id: selectedVoice, // Use selected voice
+          }),
+        });
+
+        if (!response.ok) {
+          throw busyError(response) || new Error(`HTTP error! status: ${response.status}`);
+        }
 
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
+        const cacheUrl = response.headers.get("X-Audio-URL");
+        if (cacheUrl) {
+          audioUrlsRef.current[cacheKey] = cacheUrl;
+        }
 
-      const audioBlob = await response.blob();
-      const audioUrl = URL.createObjectURL(audioBlob);
+        objectUrl = canStreamAudio() && response.body
+          ? streamAudioUrl(response.body)
+          : URL.createObjectURL(await response.blob());
+        audioUrl = objectUrl;
+      }
 
       const audio = new Audio(audioUrl);
       audioRef.current = audio;
 
       audio.onended = () => {
         setPlayingMessageId(null);
-        URL.revokeObjectURL(audioUrl);
+        if (objectUrl) URL.revokeObjectURL(objectUrl);
       };
 
       audio.onerror = () => {
         setPlayingMessageId(null);
-        URL.revokeObjectURL(audioUrl);
+        if (objectUrl) URL.revokeObjectURL(objectUrl);
       };
 
       await audio.play();
       setPlayingMessageId(messageId);
     } catch (error) {
-      alert("Failed to generate audio. Please try again later.");
+      alert(
+        error instanceof BusyError
+          ? busyMessage(error)
+          : "Failed to generate audio. Please try again later."
+      );
     } finally {
       setLoadingAudioId(null);
     }
@@ -9,6 +9,13 @@ export interface Post {
   contentSnippet?: string;
 }
 
+export interface PostsResult {
+  posts: Post[];
+  snapshotId: string | null;
+  // Pass to fetchNewPosts to get only the posts ingested since this response
+  cursor: string | null;
+}
+
 const accounts = Object.keys(feedsData);
 
 // Get API URL from environment variable (required)
@@ -20,40 +27,98 @@ const getApiUrl = (): string => {
   return apiUrl;
 };
 
-export async function fetchPostsFromAllAccounts(): Promise<Post[]> {
-  const allPosts: Post[] = [];
+export async function fetchPostsFromAllAccounts(): Promise<PostsResult> {
+  const API_URL = getApiUrl();
+
+  // The backend fetches every feed concurrently and returns them merged newest-first.
+  // Its ETag/Cache-Control headers let the browser reuse or revalidate the
+  // previous response instead of downloading the same posts again.
+  const res = await fetch(`${API_URL}/posts/all`, {
+    cache: 'default',
+  });
+
+  if (!res.ok) {
+    throw new Error(`Error fetching posts: ${res.status}`);
+  }
+
+  const posts = await res.json();
+
+  // Identifies these posts to the chat endpoint so they don't have to be uploaded
+  const snapshotId = res.headers.get('X-Posts-Snapshot');
+
+  return {
+    posts: posts.map(toPost),
+    snapshotId,
+    cursor: res.headers.get('X-Posts-Cursor'),
+  };
+}
+
+export async function fetchNewPosts(cursor: string): Promise<PostsResult> {
   const API_URL = getApiUrl();
 
-  for (const account of accounts) {
-    try {
-      const res = await fetch(`${API_URL}/posts?username=${account}`, {
-        cache: 'no-store',
-      });
-
-      if (!res.ok) {
-        continue;
-      }
-
-      const posts = await res.json();
-
-      posts.forEach((p: any) => {
-        allPosts.push({
-          title: p.title || "Untitled Post",
-          link: p.link || "",
-          pubDate: p.published || new Date().toISOString(),
-          account,
-          image: p.image || "",
-          contentSnippet: p.title || "",
-        });
-      });
-    } catch (error) {
-      // Error fetching posts for account - continue with other accounts
-    }
+  // Only posts ingested after the cursor are returned, so an idle poll is an
+  // empty list (or a 304 the browser answers from its cache)
+  const res = await fetch(`${API_URL}/posts?since=${encodeURIComponent(cursor)}`, {
+    cache: 'no-cache',
+  });
+
+  if (!res.ok) {
+    throw new Error(`Error fetching new posts: ${res.status}`);
   }
 
-  allPosts.sort((a, b) => new Date(b.pubDate).getTime() - new Date(a.pubDate).getTime());
+  const posts = await res.json();
+
+  return {
+    posts: posts.map(toPost),
+    snapshotId: null,
+    cursor: res.headers.get('X-Posts-Cursor') || cursor,
+  };
+}
+
+// Opens the live post stream; the browser resumes it with Last-Event-ID after drops.
+// Returns null where EventSource isn't available, so callers can fall back to polling.
+export function subscribeToNewPosts(
+  cursor: string,
+  onPosts: (posts: Post[], cursor: string) => void,
+  onClosed: () => void
+): EventSource | null {
+  if (typeof EventSource === 'undefined') return null;
+
+  const API_URL = getApiUrl();
+  const source = new EventSource(`${API_URL}/posts/stream?since=${encodeURIComponent(cursor)}`);
+  source.addEventListener('posts', (event) => {
+    const message = event as MessageEvent;
+    onPosts(JSON.parse(message.data).map(toPost), message.lastEventId);
+  });
+  source.onerror = () => {
+    // CLOSED means the server refused the stream (e.g. at capacity) and it won't retry
+    if (source.readyState === EventSource.CLOSED) onClosed();
+  };
+  return source;
+}
+
+// Newer versions of posts already shown replace them; the rest are added, newest first
+export function mergePosts(current: Post[], incoming: Post[]): Post[] {
+  if (incoming.length === 0) return current;
+
+  const byLink = new Map(current.map((post) => [post.link, post]));
+  for (const post of incoming) {
+    byLink.set(post.link, post);
+  }
+  return Array.from(byLink.values()).sort(
+    (a, b) => Date.parse(b.pubDate) - Date.parse(a.pubDate)
+  );
+}
 
-  return allPosts;
+function toPost(p: any): Post {
+  return {
+    title: p.title || "Untitled Post",
+    link: p.link || "",
+    pubDate: p.published || new Date().toISOString(),
+    account: p.account || "",
+    image: p.image || "",
+    contentSnippet: p.title || "",
+  };
 }
 
 export function getAccountNames(): string[] {